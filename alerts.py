@@ -0,0 +1,238 @@
+import os
+import time
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from telegram import InputMediaPhoto
+import config
+
+IMAGES_DIR = "images"
+MEDIA_GROUP_MAX = 10  # ліміт Telegram на media group
+MESSAGE_LIMIT = 4096
+CAPTION_LIMIT = 1024
+
+EVENT_ICONS = {"PUMP": "🟡", "DUMP": "🔵"}
+
+
+def _render(symbol, candles, path):
+    # Виконується у воркері пулу процесів: matplotlib не потокобезпечний
+    from render_chart import render_candles
+    render_candles(symbol, candles, path)
+    return path if os.path.exists(path) else None
+
+
+def _warm():
+    # Порожнє завдання: змушує воркер стартувати й мати render_chart уже в пам'яті
+    import render_chart  # noqa: F401
+    return os.getpid()
+
+
+def _make_pool(workers):
+    """
+    On platforms with forkserver, pandas/mplfinance are imported once in the
+    server process and every render worker forks with them already loaded.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(max_workers=workers)
+    ctx = multiprocessing.get_context("forkserver")
+    # Лише render_chart: "__main__" виконав би run.py у сервері (логування, бот, агрегатор)
+    ctx.set_forkserver_preload(["render_chart"])
+    return ProcessPoolExecutor(max_workers=workers, mp_context=ctx)
+
+
+def _fit_caption(caption, limit=CAPTION_LIMIT):
+    # Обрізаємо цілими рядками: кожен рядок format_alert - закритий HTML,
+    # тож обрізаний підпис лишається валідним для parse_mode="HTML"
+    if len(caption) <= limit:
+        return caption
+    out = ""
+    for line in caption.split("\n"):
+        if len(out) + len(line) + 1 > limit:
+            break
+        out += line + "\n"
+    return out.rstrip("\n")
+
+
+def _has_chart(alert):
+    details = alert["details"] or {}
+    return bool(details.get("symbol") and details.get("candles"))
+
+
+def _rank_key(alert):
+    try:
+        return -abs(float(alert["details"].get("percent")))
+    except (TypeError, ValueError, AttributeError):
+        return 0.0
+
+
+class AlertAggregator:
+    """
+    Collects alerts for alert_window seconds, renders their charts in a
+    process pool and sends one batch per chat: a single photo/message for a
+    lone alert, a media group for up to MEDIA_GROUP_MAX charted alerts, or a
+    ranked digest text (plus the top charts) during market-wide moves.
+    """
+
+    def __init__(self, bot, get_chats, format_alert, render_workers=2):
+        self.bot = bot
+        self.get_chats = get_chats
+        self.format_alert = format_alert
+        self.render_workers = render_workers
+        self._pool = None
+        self._pending = []
+        self._flush_task = None
+        self.stats = {"submitted": 0, "batches": 0, "sends": 0, "send_errors": 0}
+        config.register(self)
+
+    def apply_config(self, cfg):
+        self.window = cfg["alert_window"]
+        self.digest_threshold = cfg["alert_digest_threshold"]
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = _make_pool(self.render_workers)
+        return self._pool
+
+    async def warm_up(self):
+        """Starts the render workers in the background so the first alert does not pay the import."""
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        try:
+            await asyncio.gather(*(loop.run_in_executor(pool, _warm) for _ in range(self.render_workers)))
+        except Exception as e:
+            logging.error("Render warm-up failed: %s", e)
+            return
+        self.stats["warm_up"] = round(time.perf_counter() - start, 3)
+        logging.info("Render workers ready in %ss", self.stats["warm_up"])
+
+    @property
+    def backlog(self):
+        return len(self._pending)
+
+    def submit(self, event, details=None):
+        """Must run on the event loop thread; never blocks the caller."""
+        if details and details.get("candles") is not None:
+            # deque свічок продовжує змінюватися, тож фіксуємо зріз на момент події
+            details = {**details, "candles": list(details["candles"])}
+        self._pending.append({"event": event, "details": details, "ts": time.time()})
+        self.stats["submitted"] += 1
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_later())
+
+    async def _flush_later(self):
+        # Алерти, що прийшли під час рендеру/відправки, ідуть наступною пачкою
+        while self._pending:
+            await asyncio.sleep(self.window)
+            await self.flush()
+
+    async def flush(self):
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        self.stats["batches"] += 1
+
+        for alert in batch:
+            alert["caption"] = self.format_alert(alert["event"], alert["details"])
+        # У режимі дайджесту надсилаються лише топові графіки - лише їх і рендеримо
+        to_render = [a for a in batch if _has_chart(a)]
+        if len(batch) > self.digest_threshold:
+            to_render = sorted(to_render, key=_rank_key)[:MEDIA_GROUP_MAX]
+
+        paths = await asyncio.gather(*(self._render_chart(alert) for alert in to_render))
+        photos = {}
+        for alert, path in zip(to_render, paths):
+            if path:
+                with open(path, "rb") as f:
+                    photos[id(alert)] = f.read()
+                os.remove(path)
+
+        chats = self.get_chats()
+        await asyncio.gather(*(self._send_batch(chat_id, batch, photos) for chat_id in chats))
+
+    async def _render_chart(self, alert):
+        details = alert["details"]
+        symbol = details["symbol"]
+        candles = details["candles"]
+        pool = self._get_pool()
+        os.makedirs(IMAGES_DIR, exist_ok=True)
+        path = os.path.join(IMAGES_DIR, f"{symbol}_{int(alert['ts'] * 1000)}.png")
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, _render, symbol, candles, path)
+        except Exception as e:
+            logging.error("Chart render failed for %s: %s", symbol, e, extra={"symbol": symbol})
+            return None
+
+    async def _send(self, coro):
+        try:
+            await coro
+            self.stats["sends"] += 1
+        except Exception as e:
+            self.stats["send_errors"] += 1
+            logging.error("Failed to send alert: %s", e)
+
+    async def _send_batch(self, chat_id, batch, photos):
+        logging.info("Sending %d alert(s) to chat %s", len(batch), chat_id)
+        charted = [a for a in batch if id(a) in photos]
+        plain = [a for a in batch if id(a) not in photos]
+
+        if len(batch) > self.digest_threshold:
+            await self._send_digest(chat_id, batch)
+            charted = sorted(charted, key=_rank_key)[:MEDIA_GROUP_MAX]
+            await self._send_group(chat_id, charted, photos, short=True)
+            return
+
+        if len(charted) == 1:
+            a = charted[0]
+            await self._send(self.bot.send_photo(chat_id, photo=photos[id(a)], caption=_fit_caption(a["caption"]),
+                                                 parse_mode="HTML"))
+        elif charted:
+            for i in range(0, len(charted), MEDIA_GROUP_MAX):
+                await self._send_group(chat_id, charted[i:i + MEDIA_GROUP_MAX], photos)
+        for a in plain:
+            await self._send(self.bot.send_message(chat_id, text=a["caption"], parse_mode="HTML"))
+
+    async def _send_group(self, chat_id, alerts, photos, short=False):
+        if not alerts:
+            return
+        if len(alerts) == 1:
+            a = alerts[0]
+            caption = self._short_line(a) if short else _fit_caption(a["caption"])
+            await self._send(self.bot.send_photo(chat_id, photo=photos[id(a)], caption=caption, parse_mode="HTML"))
+            return
+        media = [
+            InputMediaPhoto(
+                photos[id(a)],
+                caption=self._short_line(a) if short else _fit_caption(a["caption"]),
+                parse_mode="HTML",
+            )
+            for a in alerts
+        ]
+        await self._send(self.bot.send_media_group(chat_id, media))
+
+    def _short_line(self, alert):
+        d = alert["details"] or {}
+        icon = EVENT_ICONS.get(alert["event"], "🔴")
+        line = f"{icon} <b>{alert['event']}</b>"
+        if d.get("symbol"):
+            line += f" <code>{d['symbol']}</code>"
+        if d.get("percent") is not None:
+            line += f" {d['percent']}%"
+        if d.get("price") is not None:
+            line += f" @ <code>{d['price']}</code>"
+        return line
+
+    async def _send_digest(self, chat_id, batch):
+        ranked = sorted(batch, key=_rank_key)
+        header = f"📣 <b>Market digest</b>: {len(batch)} alerts in {self.window:g}s\n"
+        chunks, current = [], header
+        for n, alert in enumerate(ranked, 1):
+            line = f"{n}. {self._short_line(alert)}\n"
+            if len(current) + len(line) > MESSAGE_LIMIT:
+                chunks.append(current)
+                current = ""
+            current += line
+        chunks.append(current)
+        for text in chunks:
+            await self._send(self.bot.send_message(chat_id, text=text, parse_mode="HTML"))
@@ -0,0 +1,227 @@
+import time
+import logging
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import requests
+import config
+import storage
+from symbols import BASE_URL
+from test import MarketAnalyzer
+from clock import VirtualClock
+
+KLINES_URL = BASE_URL + "/openApi/swap/v3/quote/klines"
+
+HORIZONS = (60, 300, 900)  # секунди для forward returns
+HIT_HORIZON = 300
+
+# Для якого знаку forward return подія вважається влучною
+EXPECTED_SIGN = {"PUMP": 1, "DUMP": -1, "OVERPUMP — SHORT ZONE": -1}
+
+
+# ---------------- DATA ---------------- #
+
+def fetch_klines(symbol, start, end, interval="1m"):
+    """
+    start/end in seconds. Returns list of candle dicts like the kline_1m stream.
+    """
+    candles = []
+    cursor = int(start * 1000)
+    end_ms = int(end * 1000)
+    while cursor < end_ms:
+        r = requests.get(KLINES_URL, params={
+            "symbol": symbol, "interval": interval,
+            "startTime": cursor, "endTime": end_ms, "limit": 1440
+        }, timeout=10)
+        r.raise_for_status()
+        data = r.json().get("data") or []
+        if not data:
+            break
+        batch = sorted(data, key=lambda k: int(k["time"]))
+        for k in batch:
+            candles.append({
+                "time": int(k["time"]),
+                "open": float(k["open"]),
+                "high": float(k["high"]),
+                "low": float(k["low"]),
+                "close": float(k["close"]),
+                "volume": float(k["volume"]),
+            })
+        cursor = int(batch[-1]["time"]) + 60_000
+    return candles
+
+
+def kline_ticks(times_ms, o, h, l, c):
+    """
+    Expands each 1m candle into 4 synthetic ticks: open, then low/high in the
+    order implied by the candle colour, then close.
+    """
+    t = np.asarray(times_ms, dtype=np.float64) / 1000
+    up = np.asarray(c) >= np.asarray(o)
+    first = np.where(up, l, h)
+    second = np.where(up, h, l)
+    ts = np.stack([t, t + 15, t + 30, t + 59.9], axis=1).ravel()
+    prices = np.stack([o, first, second, c], axis=1).ravel()
+    return ts, prices.astype(np.float64)
+
+
+def load_series(source, symbol, start, end):
+    """
+    source: path to a storage.py SQLite file, or "rest" for exchange klines.
+    Uses stored lastPrice ticks when present, otherwise stored/fetched klines.
+    """
+    if source == "rest":
+        candles = fetch_klines(symbol, start, end)
+        if not candles:
+            return np.empty(0), np.empty(0)
+        cols = {k: [cd[k] for cd in candles] for k in ("time", "open", "high", "low", "close")}
+        return kline_ticks(cols["time"], cols["open"], cols["high"], cols["low"], cols["close"])
+
+    ts, prices, _ = storage.load_ticks(source, symbol, start, end)
+    if len(ts):
+        return ts, prices
+    cd = storage.load_candles(source, symbol, start, end)
+    return kline_ticks(cd["time"], cd["open"], cd["high"], cd["low"], cd["close"])
+
+
+# ---------------- RUN ---------------- #
+
+def forward_returns(ts, prices, at, price):
+    out = {}
+    for h in HORIZONS:
+        idx = np.searchsorted(ts, at + h, side="right") - 1
+        out[h] = float(prices[idx] / price - 1) * 100 if at + h <= ts[-1] else None
+    return out
+
+
+def run_symbol(symbol, ts, prices, params):
+    """
+    Replays one symbol through the production MarketAnalyzer with a virtual
+    clock, calling detect_events at the live detect_interval cadence.
+    """
+    cfg = config.validate(params)
+    clock = VirtualClock()
+    alerts = []
+
+    a = MarketAnalyzer(symbol, clock)
+    a.apply_config(cfg)
+    a.on_event = lambda event, details: alerts.append({
+        "symbol": symbol, "event": event, "ts": clock.now, "price": details["price"]
+    })
+
+    detect_interval = cfg["detect_interval"]
+    last_detect = float("-inf")
+    for t, p in zip(ts.tolist(), prices.tolist()):
+        clock.set(t)
+        a.update_price(p)
+        if t - last_detect >= detect_interval:
+            last_detect = t
+            a.detect_events()
+
+    for alert in alerts:
+        alert["fwd"] = forward_returns(ts, prices, alert["ts"], alert["price"])
+    return alerts
+
+
+def _worker_init():
+    logging.getLogger().setLevel(logging.ERROR)
+
+
+def _symbol_job(job):
+    source, symbol, start, end, param_sets = job
+    ts, prices = load_series(source, symbol, start, end)
+    if len(ts) == 0:
+        return symbol, len(ts), [[] for _ in param_sets]
+    return symbol, len(ts), [run_symbol(symbol, ts, prices, params) for params in param_sets]
+
+
+def summarize(alerts):
+    summary = {"alerts": len(alerts), "by_event": {}, "hit_rate": None, "mean_fwd": {}}
+    hits = scored = 0
+    for alert in alerts:
+        summary["by_event"][alert["event"]] = summary["by_event"].get(alert["event"], 0) + 1
+        r = alert["fwd"].get(HIT_HORIZON)
+        sign = EXPECTED_SIGN.get(alert["event"])
+        if r is not None and sign:
+            scored += 1
+            hits += r * sign > 0
+    if scored:
+        summary["hit_rate"] = hits / scored
+    for h in HORIZONS:
+        # Знак нормалізуємо: додатне значення = рух у бік сигналу
+        vals = [a["fwd"][h] * EXPECTED_SIGN.get(a["event"], 1) for a in alerts if a["fwd"][h] is not None]
+        summary["mean_fwd"][h] = float(np.mean(vals)) if vals else None
+    return summary
+
+
+def run_backtest(source, symbols, start, end, param_sets, workers=None):
+    """
+    One process-pool job per symbol: data is loaded once in the worker and
+    every parameter set is replayed over it. Returns [(params, summary, alerts)].
+    """
+    jobs = [(source, s, start, end, param_sets) for s in symbols]
+    per_params = [[] for _ in param_sets]
+    ticks = 0
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init) as pool:
+        for symbol, n, results in pool.map(_symbol_job, jobs):
+            ticks += n
+            for i, alerts in enumerate(results):
+                per_params[i].extend(alerts)
+    elapsed = time.perf_counter() - t0
+    logging.warning(
+        f"[BACKTEST] {len(symbols)} symbols, {ticks} ticks, {len(param_sets)} param sets in {elapsed:.1f}s "
+        f"({ticks * len(param_sets) / elapsed if elapsed else 0:.0f} ticks/s)"
+    )
+    return [(params, summarize(alerts), alerts) for params, alerts in zip(param_sets, per_params)]
+
+
+def parse_grid(specs):
+    """["pump_min=8,10", "cooldown=30,60"] -> list of param dicts (cartesian product)."""
+    axes = []
+    for spec in specs:
+        if "=" not in spec:
+            raise ValueError(f"Expected key=v1,v2, got {spec!r}")
+        key, values = spec.split("=", 1)
+        axes.append([(key, v) for v in values.split(",")])
+    return [dict(combo) for combo in itertools.product(*axes)] or [{}]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay stored ticks/klines through MarketAnalyzer")
+    parser.add_argument("--source", default=storage.STORAGE_FILE or "rest", help="storage SQLite file or 'rest'")
+    parser.add_argument("--symbols", nargs="*", help="default: all symbols in the storage file")
+    parser.add_argument("--days", type=float, default=30)
+    parser.add_argument("--end", type=float, default=None, help="unix seconds, default now")
+    parser.add_argument("--sweep", nargs="*", default=[], help="key=v1,v2 ... (config keys)")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s', level=logging.WARNING)
+
+    try:
+        param_sets = parse_grid(args.sweep)
+        for params in param_sets:
+            config.validate(params)  # падаємо одразу, а не у воркерах
+    except ValueError as e:
+        parser.error(f"--sweep: {e}")
+
+    end = args.end or time.time()
+    start = end - args.days * 86400
+    if not args.symbols and args.source == "rest":
+        parser.error("--symbols is required with --source rest")
+    symbols = args.symbols or storage.list_symbols(args.source)
+
+    results = run_backtest(args.source, symbols, start, end, param_sets, args.workers)
+    results.sort(key=lambda r: (r[1]["hit_rate"] or 0), reverse=True)
+    for params, summary, _ in results:
+        hit = f"{summary['hit_rate'] * 100:.1f}%" if summary["hit_rate"] is not None else "n/a"
+        fwd = " ".join(
+            f"{h}s={v:+.2f}%" if v is not None else f"{h}s=n/a" for h, v in summary["mean_fwd"].items()
+        )
+        print(f"{params or 'defaults'} | alerts={summary['alerts']} {summary['by_event']} | hit={hit} | fwd {fwd}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import time
+import asyncio
+
+
+class SystemClock:
+    """Wall clock for timestamps, monotonic clock for throttling."""
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    Manually driven clock for replays, backtests and tests. time() and
+    monotonic() move together; sleep() advances the clock instead of waiting.
+    """
+
+    def __init__(self, start=0.0):
+        self.now = float(start)
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def set(self, now):
+        self.now = float(now)
+
+    def advance(self, seconds):
+        self.now += seconds
+
+    async def sleep(self, seconds):
+        self.now += seconds
+        await asyncio.sleep(0)
+
+
+default_clock = SystemClock()
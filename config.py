@@ -0,0 +1,224 @@
+import os
+import json
+import asyncio
+import logging
+import weakref
+
+CONFIG_FILE = "config.json"
+
+DEFAULTS = {
+    "cooldown": 30.0,
+    "min_price_change_for_repeat": 0.05,  # 5%
+    "price_reset_timeout": 3600.0,
+    "detect_interval": 0.5,  # 500ms
+    "min_price": 0.0001,
+    "max_price": 1.0,
+    # пороги detect_events
+    "window": 300.0,
+    "resample_interval": 1.0,  # крок найтоншого OHLC-рівня історії
+    "min_duration": 5.0,
+    "volatility_min": 0.03,
+    "pump_min": 10.0,  # %
+    "pump_max": 30.0,
+    "dump_min": 15.0,  # % падіння
+    "dump_max": 50.0,
+    # адаптивні пороги: zscore - рух у сигмах EWMA-волатильності символу
+    "threshold_mode": "fixed",
+    "pump_z": 6.0,
+    "dump_z": 6.0,
+    "zscore_floor": 3.0,  # % - мінімальний рух навіть для "сонних" монет
+    "vol_halflife": 1800.0,  # секунд
+    # сплеск об'єму: поточна 1m свічка проти середньої за volume_baseline закритих
+    "volume_spike_ratio": 5.0,  # 0 - вимкнено
+    "volume_baseline": 20,
+    "overpump_funding": 0.01,
+    "overpump_vwap": 1.03,
+    "overpump_funding_age": 10.0,  # секунд: OVERPUMP підтверджується лише свіжим funding
+    # супервізор з'єднань
+    "stall_timeout": 30.0,  # тиша в сокеті довше за це = завислий шард
+    "reconnect_base": 0.5,
+    "reconnect_max": 60.0,
+    "subscribe_rate": 100.0,  # кадрів sub на секунду на з'єднання
+    "hot_standby": False,
+    # профіль підписок і ескалація depth/bookTicker біля порогів
+    "subscription_profile": "minimal",
+    "escalate": True,
+    "escalate_ratio": 0.5,  # частка volatility_min, з якої символ вважається "гарячим"
+    "calm_timeout": 120.0,
+    # агрегація алертів перед відправкою в Telegram
+    "alert_window": 3.0,
+    "alert_digest_threshold": 10,
+    # ринковий режим: рухи, що пояснюються всім ринком
+    "regime_action": "relabel",  # relabel -> MARKET PUMP/DUMP, suppress -> без алерту, off
+    "regime_breadth": 0.6,  # частка монет, що рухаються в той же бік
+    "regime_corr_min": 0.5,  # кореляція символу з ринковим індексом
+    "regime_corr_window": 120,  # інтервалів по 1 с для кореляції
+}
+
+
+def _to_bool(v):
+    if isinstance(v, str):
+        if v.strip().lower() in ("1", "true", "yes", "on"):
+            return True
+        if v.strip().lower() in ("0", "false", "no", "off"):
+            return False
+        raise ValueError(v)
+    return bool(v)
+
+
+# key -> (type, check, hint)
+RULES = {
+    "cooldown": (float, lambda v: 0 <= v <= 86400, "0..86400 seconds"),
+    "min_price_change_for_repeat": (float, lambda v: 0 <= v <= 1, "0..1 (fraction)"),
+    "price_reset_timeout": (float, lambda v: 0 <= v <= 7 * 86400, "0..604800 seconds"),
+    "detect_interval": (float, lambda v: 0.01 <= v <= 60, "0.01..60 seconds"),
+    "min_price": (float, lambda v: v >= 0, ">= 0"),
+    "max_price": (float, lambda v: v > 0, "> 0"),
+    "window": (float, lambda v: 10 <= v <= 3600, "10..3600 seconds"),
+    "resample_interval": (float, lambda v: 0.1 <= v <= 10, "0.1..10 seconds"),
+    "min_duration": (float, lambda v: 0 <= v <= 3600, "0..3600 seconds"),
+    "volatility_min": (float, lambda v: 0 <= v <= 1, "0..1 (fraction)"),
+    "pump_min": (float, lambda v: 0 < v <= 1000, "0..1000 %"),
+    "pump_max": (float, lambda v: 0 < v <= 1000, "0..1000 %"),
+    "dump_min": (float, lambda v: 0 < v <= 100, "0..100 %"),
+    "dump_max": (float, lambda v: 0 < v <= 100, "0..100 %"),
+    "threshold_mode": (str, lambda v: v in ("fixed", "zscore"), "fixed/zscore"),
+    "pump_z": (float, lambda v: 0 < v <= 100, "0..100 sigmas"),
+    "dump_z": (float, lambda v: 0 < v <= 100, "0..100 sigmas"),
+    "zscore_floor": (float, lambda v: 0 <= v <= 100, "0..100 %"),
+    "vol_halflife": (float, lambda v: 10 <= v <= 7 * 86400, "10..604800 seconds"),
+    "volume_spike_ratio": (float, lambda v: v == 0 or 1 < v <= 1000, "0 (off) or 1..1000 (ratio)"),
+    "volume_baseline": (int, lambda v: 3 <= v <= 120, "3..120 candles"),
+    "overpump_funding": (float, lambda v: -1 <= v <= 1, "-1..1"),
+    "overpump_vwap": (float, lambda v: 1 <= v <= 10, "1..10 (ratio)"),
+    "overpump_funding_age": (float, lambda v: 1 <= v <= 300, "1..300 seconds"),
+    "stall_timeout": (float, lambda v: 5 <= v <= 600, "5..600 seconds"),
+    "reconnect_base": (float, lambda v: 0 <= v <= 60, "0..60 seconds"),
+    "reconnect_max": (float, lambda v: 1 <= v <= 600, "1..600 seconds"),
+    "subscribe_rate": (float, lambda v: 1 <= v <= 10000, "1..10000 frames/s"),
+    "hot_standby": (_to_bool, lambda v: True, "true/false"),
+    "subscription_profile": (str, lambda v: v in ("minimal", "standard", "deep"), "minimal/standard/deep"),
+    "escalate": (_to_bool, lambda v: True, "true/false"),
+    "escalate_ratio": (float, lambda v: 0 < v <= 1, "0..1 (fraction of volatility_min)"),
+    "calm_timeout": (float, lambda v: 0 <= v <= 3600, "0..3600 seconds"),
+    "alert_window": (float, lambda v: 0 <= v <= 60, "0..60 seconds"),
+    "alert_digest_threshold": (int, lambda v: 1 <= v <= 100, "1..100 alerts"),
+    "regime_action": (str, lambda v: v in ("relabel", "suppress", "off"), "relabel/suppress/off"),
+    "regime_breadth": (float, lambda v: 0.5 <= v <= 1, "0.5..1 (fraction of symbols)"),
+    "regime_corr_min": (float, lambda v: -1 <= v <= 1, "-1..1"),
+    "regime_corr_window": (int, lambda v: 10 <= v <= 3600, "10..3600 intervals"),
+}
+
+_current = dict(DEFAULTS)
+_targets = weakref.WeakSet()
+_listeners = []
+_file_mtime = None
+
+
+def get():
+    return _current
+
+
+def validate(changes):
+    """
+    changes: dict of key -> raw value (str from Telegram/file or number).
+    Returns a full new config dict, raises ValueError on any bad key/value.
+    """
+    new = dict(_current)
+    for key, raw in changes.items():
+        if key not in RULES:
+            raise ValueError(f"Unknown config key: {key}")
+        cast, check, hint = RULES[key]
+        try:
+            value = cast(raw)
+        except (TypeError, ValueError):
+            raise ValueError(f"{key}: cannot convert {raw!r} to {cast.__name__}")
+        if not check(value):
+            raise ValueError(f"{key}: {value} out of range ({hint})")
+        new[key] = value
+
+    if new["min_price"] >= new["max_price"]:
+        raise ValueError(f"min_price ({new['min_price']}) must be below max_price ({new['max_price']})")
+    for low, high in (("pump_min", "pump_max"), ("dump_min", "dump_max"), ("min_duration", "window"), ("resample_interval", "window"),
+                      ("zscore_floor", "pump_max"), ("zscore_floor", "dump_max")):
+        if new[low] > new[high]:
+            raise ValueError(f"{low} ({new[low]}) must not exceed {high} ({new[high]})")
+    return new
+
+
+def update(changes, source="api"):
+    """
+    Validates all changes first, then applies them to every registered
+    target in one synchronous pass, so no detect worker ever sees a mix
+    of old and new values.
+    """
+    global _current
+    new = validate(changes)
+    changed = {k for k in new if new[k] != _current[k]}
+    if not changed:
+        return set()
+
+    old = _current
+    _current = new
+    for target in list(_targets):
+        target.apply_config(new)
+
+    logging.warning("[CONFIG] Applied from %s: %s", source, ", ".join(f"{k}={new[k]}" for k in sorted(changed)))
+
+    for listener in _listeners:
+        try:
+            listener(old, new, changed)
+        except Exception as e:
+            logging.error("Config listener error: %s", e)
+    return changed
+
+
+def register(target):
+    """target must have apply_config(cfg); it is applied immediately."""
+    _targets.add(target)
+    target.apply_config(_current)
+
+
+def add_listener(callback):
+    """callback(old, new, changed_keys) runs after every applied change."""
+    _listeners.append(callback)
+
+
+def parse_assignments(args):
+    """["cooldown=60", "detect_interval=1"] -> {"cooldown": "60", ...}"""
+    changes = {}
+    for arg in args:
+        if "=" not in arg:
+            raise ValueError(f"Expected key=value, got {arg!r}")
+        key, value = arg.split("=", 1)
+        changes[key.strip()] = value.strip()
+    return changes
+
+
+def load_config(path=CONFIG_FILE):
+    global _file_mtime
+    if not os.path.exists(path):
+        return set()
+    _file_mtime = os.path.getmtime(path)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return update(data, source=path)
+
+
+def save_config(path=CONFIG_FILE):
+    global _file_mtime
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(_current, f, indent=2)
+    os.replace(tmp, path)
+    _file_mtime = os.path.getmtime(path)
+
+
+async def watch_config(path=CONFIG_FILE, interval=5.0):
+    while True:
+        try:
+            if os.path.exists(path) and os.path.getmtime(path) != _file_mtime:
+                load_config(path)
+        except Exception as e:
+            logging.error("Config reload from %s rejected, keeping current values: %s", path, e)
+        await asyncio.sleep(interval)
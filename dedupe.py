@@ -0,0 +1,134 @@
+import os
+import json
+import sqlite3
+import logging
+import threading
+
+DEDUPE_FILE = os.getenv("DEDUPE_FILE")  # не задано -> лише пам'ять процесу
+EVICT_EVERY = 1000  # записів між прибираннями прострочених ключів
+# update() викликається з циклу подій: довше чекати на чужий лок не можна
+BUSY_TIMEOUT = 0.005
+
+
+class MemoryStore:
+    """
+    Key -> (expires, value) in a dict. update() runs the whole
+    read-decide-write under one lock, so concurrent callers (shards, worker
+    threads) can't both claim the same key. Expired keys read as absent and
+    are swept every EVICT_EVERY writes.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, key, now):
+        item = self._data.get(key)
+        return item[1] if item and item[0] > now else None
+
+    def update(self, key, fn, ttl, now):
+        """
+        fn(current value or None) returns the new value, or None to leave
+        the key as is. Returns (stored, value now in the store).
+        """
+        with self._lock:
+            old = self.get(key, now)
+            new = fn(old)
+            if new is None:
+                return False, old
+            self._data[key] = (now + ttl, new)
+            self._writes += 1
+            if self._writes % EVICT_EVERY == 0:
+                self._evict(now)
+            return True, new
+
+    def check_and_set(self, key, ttl, now, value=True):
+        return self.update(key, lambda old: value if old is None else None, ttl, now)[0]
+
+    def _evict(self, now):
+        self._data = {k: item for k, item in self._data.items() if item[0] > now}
+
+    def __len__(self):
+        return len(self._data)
+
+    def close(self):
+        pass
+
+
+class SqliteStore:
+    """
+    Same contract on a WAL SQLite file, shared by every process that opens
+    it. update() is one BEGIN IMMEDIATE transaction: the write lock is taken
+    before the read, so check-and-set is atomic across processes. Values are
+    stored as JSON.
+
+    update() runs on the event loop, so the busy timeout is a few ms. If
+    another process holds the lock longer, the decision is made on a local
+    MemoryStore mirror of the values this process last saw (counted in
+    stats["contended"]): the detector never stalls, at the cost of a possible
+    duplicate across processes in that moment.
+    """
+
+    def __init__(self, path, timeout=BUSY_TIMEOUT):
+        self.path = path
+        self._local = MemoryStore()
+        self.stats = {"contended": 0}
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS dedupe (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)")
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, key, now):
+        row = self._conn.execute("SELECT value FROM dedupe WHERE key = ? AND expires > ?", (key, now)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, key, fn, ttl, now):
+        with self._lock:
+            conn = self._conn
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+            except sqlite3.OperationalError as e:
+                self.stats["contended"] += 1
+                logging.debug("Dedupe store busy (%s), deciding locally for %s", e, key)
+                return self._local.update(key, fn, ttl, now)
+            try:
+                old = self.get(key, now)
+                new = fn(old)
+                if new is not None:
+                    conn.execute("INSERT OR REPLACE INTO dedupe (key, value, expires) VALUES (?, ?, ?)",
+                                 (key, json.dumps(new), now + ttl))
+                    self._writes += 1
+                    if self._writes % EVICT_EVERY == 0:
+                        conn.execute("DELETE FROM dedupe WHERE expires <= ?", (now,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            seen = old if new is None else new
+            if seen is not None:
+                self._local.update(key, lambda _: seen, ttl, now)
+        return (False, old) if new is None else (True, new)
+
+    def check_and_set(self, key, ttl, now, value=True):
+        return self.update(key, lambda old: value if old is None else None, ttl, now)[0]
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM dedupe").fetchone()[0]
+
+    def close(self):
+        self._conn.close()
+
+
+store = MemoryStore()
+
+
+def open_store(path=DEDUPE_FILE):
+    """Switches the process-wide store to SQLite when DEDUPE_FILE is set."""
+    global store
+    if path:
+        store = SqliteStore(path)
+        logging.warning("Dedupe store: %s", path)
+    return store
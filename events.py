@@ -0,0 +1,106 @@
+import time
+import asyncio
+import logging
+import threading
+from typing import NamedTuple, Optional
+
+
+class Event(NamedTuple):
+    kind: str               # PUMP, DUMP, OVERPUMP — SHORT ZONE, ...
+    symbol: Optional[str]
+    ts: float               # час ринку (клок аналізатора), а не час доставки
+    details: Optional[dict]
+
+
+class Subscription:
+    """
+    One consumer with its own bounded queue. When the queue is full the
+    oldest event is dropped, so a stalled consumer loses history instead of
+    blocking the publisher.
+    """
+
+    def __init__(self, name, handler, maxsize, kinds):
+        self.name = name
+        self.handler = handler
+        self.kinds = set(kinds) if kinds else None
+        self.queue = asyncio.Queue(maxsize)
+        self.task = None
+        self.stats = {"delivered": 0, "dropped": 0, "errors": 0, "lag_max": 0.0, "lag_last": 0.0}
+
+    def offer(self, item):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.stats["dropped"] += 1
+        self.queue.put_nowait(item)
+
+    async def run(self):
+        stats = self.stats
+        while True:
+            queued_at, event = await self.queue.get()
+            try:
+                result = self.handler(event)
+                if asyncio.iscoroutine(result):
+                    await result
+                stats["delivered"] += 1
+            except Exception as e:
+                stats["errors"] += 1
+                logging.error("[BUS] %s failed on %s: %s", self.name, event.kind, e, extra={"symbol": event.symbol, "event": event.kind})
+            lag = time.monotonic() - queued_at
+            stats["lag_last"] = lag
+            if lag > stats["lag_max"]:
+                stats["lag_max"] = lag
+
+
+class EventBus:
+    """
+    In-process pub/sub for detector output. publish() never awaits: it only
+    appends to each subscriber's queue, and subscribers drain their queues
+    in their own tasks once start() has been called on the event loop.
+    """
+
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self.subscriptions = {}
+        self.published = {}
+        self._loop = None
+
+    def subscribe(self, name, handler, maxsize=None, kinds=None):
+        sub = Subscription(name, handler, maxsize or self.maxsize, kinds)
+        self.subscriptions[name] = sub
+        if self._loop is not None:
+            sub.task = self._loop.create_task(sub.run())
+        return sub
+
+    def unsubscribe(self, name):
+        sub = self.subscriptions.pop(name, None)
+        if sub and sub.task:
+            sub.task.cancel()
+
+    def start(self):
+        """Must run on the event loop thread."""
+        self._loop = asyncio.get_running_loop()
+        self._thread = threading.get_ident()
+        for sub in self.subscriptions.values():
+            if sub.task is None:
+                sub.task = self._loop.create_task(sub.run())
+
+    def publish(self, event):
+        if self._loop is not None and threading.get_ident() != self._thread:
+            self._loop.call_soon_threadsafe(self.publish, event)
+            return
+        self.published[event.kind] = self.published.get(event.kind, 0) + 1
+        queued_at = time.monotonic()
+        for sub in self.subscriptions.values():
+            if sub.kinds is None or event.kind in sub.kinds:
+                sub.offer((queued_at, event))
+
+    def stats(self):
+        return {
+            "published": dict(self.published),
+            "subscribers": {
+                name: {**sub.stats, "backlog": sub.queue.qsize()} for name, sub in self.subscriptions.items()
+            },
+        }
+
+
+bus = EventBus()
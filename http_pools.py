@@ -0,0 +1,77 @@
+import time
+import asyncio
+import importlib.util
+from telegram.error import TimedOut
+from telegram.request import BaseRequest, HTTPXRequest
+
+# Публічний сентинел PTB; його тип покриває всі значення "не задано"
+_DEFAULT = type(BaseRequest.DEFAULT_NONE)
+
+# HTTP/2 мультиплексує запити в одному з'єднанні, але httpx вміє його лише з пакетом h2
+HTTP_VERSION = "2" if importlib.util.find_spec("h2") else "1.1"
+
+pools = {}
+
+
+class MeteredRequest(HTTPXRequest):
+    """
+    HTTPXRequest with its own concurrency limit in front of the httpx pool,
+    so waiting for a free slot is measured (and timed out) per pool.
+    """
+
+    def __init__(self, name, connection_pool_size, pool_timeout=5.0, **kwargs):
+        super().__init__(connection_pool_size=connection_pool_size, pool_timeout=pool_timeout, **kwargs)
+        self.name = name
+        self.size = connection_pool_size
+        self.default_pool_timeout = pool_timeout
+        self._slots = asyncio.Semaphore(connection_pool_size)
+        self.stats = {
+            "requests": 0, "in_flight": 0, "waited": 0, "wait_total": 0.0, "wait_max": 0.0,
+            "pool_timeouts": 0, "errors": 0,
+        }
+        pools[name] = self
+
+    async def do_request(self, url, method, request_data=None, read_timeout=HTTPXRequest.DEFAULT_NONE,
+                         write_timeout=HTTPXRequest.DEFAULT_NONE, connect_timeout=HTTPXRequest.DEFAULT_NONE,
+                         pool_timeout=HTTPXRequest.DEFAULT_NONE):
+        stats = self.stats
+        wait_limit = self.default_pool_timeout if isinstance(pool_timeout, _DEFAULT) else pool_timeout
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), wait_limit)
+        except asyncio.TimeoutError:
+            stats["pool_timeouts"] += 1
+            raise TimedOut(f"Pool timeout: all {self.size} '{self.name}' slots are busy") from None
+        waited = time.monotonic() - start
+        stats["requests"] += 1
+        stats["wait_total"] += waited
+        if waited > 0.001:
+            stats["waited"] += 1
+        if waited > stats["wait_max"]:
+            stats["wait_max"] = waited
+
+        stats["in_flight"] += 1
+        try:
+            return await super().do_request(url, method, request_data, read_timeout, write_timeout,
+                                            connect_timeout, pool_timeout)
+        except Exception:
+            stats["errors"] += 1
+            raise
+        finally:
+            stats["in_flight"] -= 1
+            self._slots.release()
+
+
+def make_request(name, connection_pool_size, **kwargs):
+    kwargs.setdefault("http_version", HTTP_VERSION)
+    return MeteredRequest(name, connection_pool_size, **kwargs)
+
+
+def pool_stats():
+    out = {}
+    for name, req in pools.items():
+        s = dict(req.stats)
+        s["size"] = req.size
+        s["wait_avg"] = s["wait_total"] / s["requests"] if s["requests"] else 0.0
+        out[name] = s
+    return out
@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import logging.handlers
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "WARNING").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # text | json
+LOG_FILE = os.getenv("LOG_FILE")
+LOG_RATE = int(os.getenv("LOG_RATE", "5"))  # однакових записів на ключ за LOG_RATE_WINDOW
+LOG_RATE_WINDOW = 60.0
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+EXTRA_FIELDS = ("symbol", "shard", "role", "event")
+
+_listener = None
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """
+    The stock QueueHandler formats the message in the caller's thread
+    (prepare() -> format()). Here the record goes onto the queue untouched
+    and %-formatting happens in the listener thread, so the event loop only
+    pays for a LogRecord and a queue put.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    At most `rate` records per (logger, symbol, message template) within
+    `window` seconds. The rest are counted, and the count is attached to the
+    next record that gets through. Keys use the unformatted template, so
+    per-symbol messages must pass values as args, not via f-strings.
+    """
+
+    def __init__(self, rate=LOG_RATE, window=LOG_RATE_WINDOW, clock=time.monotonic):
+        super().__init__()
+        self.rate = rate
+        self.window = window
+        self.clock = clock
+        self._buckets = {}
+        self.suppressed = 0
+
+    def filter(self, record):
+        if self.rate <= 0 or record.levelno >= logging.ERROR:
+            return True
+        key = (record.name, getattr(record, "symbol", None), record.msg)
+        now = self.clock()
+        bucket = self._buckets.get(key)
+        if bucket is None or now - bucket[0] >= self.window:
+            dropped = bucket[2] if bucket else 0
+            self._buckets[key] = [now, 1, 0]
+            if dropped:
+                record.suppressed = dropped
+            if len(self._buckets) > 10_000:
+                self._buckets = {k: b for k, b in self._buckets.items() if now - b[0] < self.window}
+            return True
+        if bucket[1] < self.rate:
+            bucket[1] += 1
+            return True
+        bucket[2] += 1
+        self.suppressed += 1
+        return False
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        doc = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key in EXTRA_FIELDS + ("suppressed",):
+            value = getattr(record, key, None)
+            if value is not None:
+                doc[key] = value
+        if record.exc_info:
+            doc["exc"] = self.formatException(record.exc_info)
+        return json.dumps(doc, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        line = super().format(record)
+        if getattr(record, "suppressed", None):
+            line += f" [+{record.suppressed} similar suppressed]"
+        return line
+
+
+def setup_logging(level=LOG_LEVEL, fmt=LOG_FORMAT, path=LOG_FILE, rate=LOG_RATE):
+    """
+    Root logger -> unbounded queue -> writer thread (stderr and optional
+    file). Safe to call again: the previous listener is stopped first.
+    """
+    global _listener
+    stop_logging()
+
+    formatter = JsonFormatter() if fmt == "json" else TextFormatter(TEXT_FORMAT)
+    outputs = [logging.StreamHandler()]
+    if path:
+        outputs.append(logging.handlers.WatchedFileHandler(path, encoding="utf-8"))
+    for h in outputs:
+        h.setFormatter(formatter)
+
+    q = queue.SimpleQueue()
+    handler = LazyQueueHandler(q)
+    handler.addFilter(RateLimitFilter(rate))
+
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(q, *outputs, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return handler
+
+
+def stop_logging():
+    """Flushes what is still queued and stops the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
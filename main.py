@@ -1,17 +1,22 @@
 
 import logging
 import os
+import html
 import json
+import time
 from dotenv import load_dotenv
 from telegram import Update
-import asyncio
 import telegram
-from telegram.request import HTTPXRequest
 from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes
-from render_chart import render_candles
+import config
+from alerts import AlertAggregator
+from http_pools import make_request
+from events import bus, Event
+import profiler
 
 load_dotenv()
 TOKEN = os.getenv("TOKEN")
+ADMIN_IDS = {int(x) for x in os.getenv("ADMIN_IDS", "").replace(" ", "").split(",") if x}
 
 NOTIFY_FILE = "notify_chats.json"
 
@@ -30,12 +35,11 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("/notifyhere - Send messages about BingX USDT 0.0001-1$ Coins events.")
     #logging.info("Sent /start response")
 
-def notify(event, details=None):
+def format_alert(event, details=None):
     lines = []
 
     # Заголовок події
     lines.append(f"{'🟡' if event=='PUMP' else '🔵' if event=='DUMP' else '🔴'} <b>{event}</b>\n")
-    path = None
     if details:
         # Символ
         if "symbol" in details:
@@ -45,41 +49,32 @@ def notify(event, details=None):
         if "price" in details:
             lines.append(f"💰 <b>Price:</b> <code>{details['price']}</code>\n")
 
-        if "percent" in details:
+        if details.get("percent") is not None:
             lines.append(f"📈 <b>Change:</b> <code>{details['percent']}%</code>\n")
 
+        # Рух у сигмах власної волатильності символу (threshold_mode=zscore)
+        if details.get("zscore") is not None:
+            lines.append(f"📐 <b>Z-score:</b> <code>{details['zscore']}σ</code>\n")
+
+        # Ринковий контекст: медіана ринку, частка монет у тому ж русі, кореляція
+        market = details.get("market")
+        if market:
+            lines.append(
+                f"🌐 <b>Market:</b> <code>{market['median']:+.2f}%</code> median, "
+                f"{market['breadth_up']:.0%} up / {market['breadth_down']:.0%} down, corr <code>{market['corr']}</code>\n"
+            )
+
         # Обʼєм
         if "volume" in details and details["volume"] is not None:
-            lines.append(f"📊 <b>Volume:</b> <code>{details['volume']}</code>\n")
+            volume = f"{details['volume']:g}"
+            if details.get("rvol") is not None:
+                volume += f"  (x{details['rvol']} avg 1m)"
+            lines.append(f"📊 <b>Volume 1m:</b> <code>{volume}</code>\n")
 
         # Funding rate
         if "funding_rate" in details and details["funding_rate"] is not None:
             lines.append(f"⚡ <b>Funding rate:</b> <code>{details['funding_rate']}</code>\n")
 
-        # Свічка
-
-        candles = list(details.get("candles"))
-        symbol = details.get("symbol")
-
-        if isinstance(candles, list) and symbol:
-            path = f"images/{symbol}_chart.png"
-            for filename in os.listdir("images/"):
-                try:
-                    os.remove(f"images/{filename}")
-                except Exception as e:
-                    logging.error(f"Error deleting file {filename}: {e}")
-                    
-
-            render_candles(symbol, candles, path)
-
-        # candle = details.get("candle")
-        # if isinstance(candle, dict):
-        #     lines.append("🕯 <b>Candle (1m):</b>")
-        #     for key in ("open", "high", "low", "close", "volume"):
-        #         if key in candle:
-        #             lines.append(f"   > {key}: <code>{candle[key]}</code>")
-        #     lines.append("\n")
-
         # Стакан
         orderbook = details.get("orderbook")
         if isinstance(orderbook, dict):
@@ -99,26 +94,11 @@ def notify(event, details=None):
                     lines.append(f"    <code>{price} × {qty}</code>")
             lines.append("\n")
 
-    message_text = "\n".join(lines)
-
-    for chat_id in load_notify_chats():
-        logging.info(f"Sending notification to chat {chat_id}")
-        asyncio.run_coroutine_threadsafe(
-            application.bot.send_photo(
-                chat_id,
-                photo=open(path, 'rb') if os.path.exists(path) else None,
-                caption=message_text,
-                parse_mode="HTML"          
-            ),
-            notify_loop  
-        ) if path else asyncio.run_coroutine_threadsafe(
-            application.bot.send_message(
-                chat_id,
-                text=message_text,
-                parse_mode="HTML"
-            ),
-            notify_loop  
-        )
+    return "\n".join(lines)
+
+def notify(event, details=None):
+    # Службові повідомлення йдуть тією ж шиною, що й ринкові події
+    bus.publish(Event(event, None, time.time(), details))
 
 async def notifyhere(update: Update, context: ContextTypes.DEFAULT_TYPE):
     chat_id = update.effective_chat.id
@@ -134,23 +114,113 @@ async def notifyhere(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("✅ Notifications enabled for this chat")
 
 
+def is_admin(update: Update):
+    return update.effective_user is not None and update.effective_user.id in ADMIN_IDS
+
+async def config_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if not is_admin(update):
+        await update.message.reply_text("⛔ Admin only")
+        return
+
+    if context.args:
+        try:
+            changed = config.update(config.parse_assignments(context.args), source=f"telegram:{update.effective_user.id}")
+        except ValueError as e:
+            await update.message.reply_text(f"❌ {e}")
+            return
+        if changed:
+            config.save_config()
+        await update.message.reply_text(f"✅ Applied: {', '.join(sorted(changed)) or 'nothing changed'}")
+        return
+
+    lines = ["⚙️ <b>Config</b>"]
+    for key, value in config.get().items():
+        lines.append(f"<code>{key}={value}</code>")
+    lines.append("\nUsage: /config key=value [key=value ...]")
+    await update.message.reply_text("\n".join(lines), parse_mode="HTML")
+
+
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    # /profile [seconds] [collapsed|speedscope] - семплінг усіх потоків і задач, файл у відповідь
+    if not is_admin(update):
+        await update.message.reply_text("⛔ Admin only")
+        return
+    args = context.args or []
+    try:
+        duration = float(args[0]) if args else 30.0
+    except ValueError:
+        await update.message.reply_text("Usage: /profile [seconds] [collapsed|speedscope]")
+        return
+    fmt = args[1] if len(args) > 1 and args[1] in ("collapsed", "speedscope") else "collapsed"
+    if profiler.is_running():
+        await update.message.reply_text("⏳ A profile is already running")
+        return
+
+    await update.message.reply_text(f"🔬 Profiling for {min(duration, profiler.MAX_DURATION):g}s...")
+    try:
+        path, prof = await profiler.profile(duration, fmt)
+    except RuntimeError:
+        # Між перевіркою вище і стартом міг запуститися профіль від SIGUSR1
+        await update.message.reply_text("⏳ A profile is already running")
+        return
+    # Імена кадрів обрізаємо до екранування: 8 рядків гарантовано влазять у 1024 символи
+    top = "\n".join(f"<code>{share:5.1%} {html.escape(fn[:90])}</code>" for fn, share in prof.top(8))
+    with open(path, "rb") as f:
+        await update.message.reply_document(
+            f, filename=os.path.basename(path),
+            caption=f"{prof.samples} samples in {prof.elapsed:.0f}s\n{top}", parse_mode="HTML",
+        )
+
 async def error_handler(update: object, context: ContextTypes.DEFAULT_TYPE) -> None:
     logging.error(f"Exception occurred: {context.error}")
     if isinstance(context.error, telegram.error.TimedOut):
         logging.info("Retrying on TimedOut...")
 
-request = HTTPXRequest(
-    connection_pool_size=10,
-    read_timeout=90.0,
-    write_timeout=90.0,
-    connect_timeout=90.0,
+# Окремі пули: long polling, відповіді на команди і розсилка алертів не конкурують за з'єднання
+control_request = make_request(
+    "control",
+    connection_pool_size=8,
+    read_timeout=30.0,
+    write_timeout=30.0,
+    connect_timeout=30.0,
     pool_timeout=10.0,
-    http_version="1.1"
 )
 
-application = ApplicationBuilder().token(TOKEN).request(request).build()
+# Long polling тримає з'єднання до 90 с, тому йому один власний слот
+get_updates_request = make_request(
+    "polling",
+    connection_pool_size=1,
+    read_timeout=100.0,
+    connect_timeout=30.0,
+    pool_timeout=5.0,
+)
+
+# Сплеск алертів може чекати в черзі довше, ніж команда адміністратора
+alert_request = make_request(
+    "alerts",
+    connection_pool_size=16,
+    read_timeout=60.0,
+    write_timeout=60.0,
+    connect_timeout=30.0,
+    pool_timeout=60.0,
+    media_write_timeout=60.0,
+)
+alert_bot = telegram.Bot(TOKEN, request=alert_request)
+
+application = (
+    ApplicationBuilder()
+    .token(TOKEN)
+    .request(control_request)
+    .get_updates_request(get_updates_request)
+    .build()
+)
 application.add_handler(CommandHandler("start", start))
 application.add_handler(CommandHandler("notifyhere", notifyhere))
+application.add_handler(CommandHandler("config", config_command))
+# block=False: профіль триває десятки секунд і не повинен затримувати інші команди
+application.add_handler(CommandHandler("profile", profile_command, block=False))
 application.add_error_handler(error_handler) 
 
-notify_loop = None
\ No newline at end of file
+aggregator = AlertAggregator(alert_bot, load_notify_chats, format_alert)
+# Графік рендериться і розсилається агрегатором пачками (див. alerts.py)
+bus.subscribe("telegram", lambda event: aggregator.submit(event.kind, event.details))
\ No newline at end of file
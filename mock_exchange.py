@@ -0,0 +1,325 @@
+"""
+Local stand-in for the BingX swap API, for offline load tests.
+
+    python mock_exchange.py --symbols 3000 --events-per-min 20
+    BINGX_REST_URL=http://127.0.0.1:8765 BINGX_WS_URL=ws://127.0.0.1:8765/swap-market python run.py
+
+Serves the contracts, ticker, fundingRate and v3 klines REST endpoints and
+the gzip WebSocket (sub/unsub, Ping/Pong) for lastPrice, kline_1m,
+bookTicker and depth5@500ms. Prices are a vectorized random walk with
+injected pumps/dumps; /stats lists what was injected so detection recall
+can be checked against the bot's alerts.
+"""
+import json
+import gzip
+import time
+import asyncio
+import logging
+import argparse
+from collections import deque
+import numpy as np
+from aiohttp import web, WSMsgType
+
+WS_PATH = "/swap-market"
+PING_INTERVAL = 5.0
+
+
+class MockMarket:
+    """
+    Synthetic prices for n symbols. step() advances every symbol at once on
+    NumPy arrays; only a tick_prob share of symbols "trade" per step, which
+    sets the message rate together with the step interval.
+    """
+
+    def __init__(self, n_symbols=500, seed=1, tick_interval=0.5, tick_prob=0.5, volatility=0.002,
+                 events_per_min=5.0, move_range=(0.12, 0.30), move_duration=(10, 60)):
+        self.rng = np.random.default_rng(seed)
+        self.seed = seed
+        self.symbols = [f"M{i:04d}-USDT" for i in range(n_symbols)]
+        self.index = {s: i for i, s in enumerate(self.symbols)}
+        # Лог-рівномірно від 0.001 до 5$, тож частина символів поза ціновим діапазоном бота
+        self.log_price = self.rng.uniform(np.log(0.001), np.log(5.0), n_symbols)
+        self.funding = self.rng.normal(0.0001, 0.0003, n_symbols)
+        self.drift = np.zeros(n_symbols)
+        self.remaining = np.zeros(n_symbols, dtype=np.int64)
+        self.tick_interval = tick_interval
+        self.tick_prob = tick_prob
+        self.volatility = volatility
+        self.events_per_min = events_per_min
+        self.move_range = move_range
+        self.move_duration = move_duration
+        self.events = deque(maxlen=1000)
+        self.candle_start = None
+        self._reset_candles()
+        self.now = time.time()
+        self.steps = 0
+
+    @property
+    def prices(self):
+        return np.exp(self.log_price)
+
+    def _reset_candles(self):
+        self.c_open = self.prices
+        self.c_high = self.c_open.copy()
+        self.c_low = self.c_open.copy()
+        self.c_vol = np.zeros(len(self.symbols))
+
+    def inject(self, symbol, move, duration):
+        """Starts a move of `move` (fraction, negative for a dump) over `duration` seconds."""
+        i = self.index[symbol]
+        steps = max(1, int(duration / self.tick_interval))
+        self.drift[i] = np.log1p(move) / steps
+        self.remaining[i] = steps
+        self.events.append({"symbol": symbol, "move": round(move, 4), "duration": duration, "ts": self.now})
+
+    def _random_events(self):
+        k = self.rng.poisson(self.events_per_min * self.tick_interval / 60)
+        for i in self.rng.integers(0, len(self.symbols), k):
+            move = self.rng.uniform(*self.move_range) * self.rng.choice((-1, 1))
+            self.inject(self.symbols[i], float(move), float(self.rng.uniform(*self.move_duration)))
+
+    def step(self, now=None):
+        """Advances one tick; returns indices of symbols that traded."""
+        self.now = time.time() if now is None else now
+        self.steps += 1
+        self._random_events()
+        n = len(self.symbols)
+        noise = self.rng.normal(0.0, self.volatility, n)
+        active = self.remaining > 0
+        self.log_price += noise + np.where(active, self.drift, 0.0)
+        self.remaining[active] -= 1
+
+        minute = int(self.now // 60) * 60
+        if minute != self.candle_start:
+            self.candle_start = minute
+            self._reset_candles()
+        prices = self.prices
+        np.maximum(self.c_high, prices, out=self.c_high)
+        np.minimum(self.c_low, prices, out=self.c_low)
+        traded = np.flatnonzero((self.rng.random(n) < self.tick_prob) | active)
+        self.c_vol[traded] += self.rng.exponential(1000.0, len(traded))
+        return traded
+
+    # ---------------- PAYLOADS ---------------- #
+
+    def payloads(self, traded):
+        """{dataType: gzip frame} for the traded symbols, built once per step for all connections."""
+        now_ms = int(self.now * 1000)
+        prices = self.prices
+        out = {}
+        for i in traded.tolist():
+            s = self.symbols[i]
+            p = prices[i]
+            spread = p * 0.0005
+            out[f"{s}@lastPrice"] = {"e": "lastPriceUpdate", "E": now_ms, "s": s, "c": f"{p:.6g}"}
+            out[f"{s}@kline_1m"] = [{
+                "o": f"{self.c_open[i]:.6g}", "h": f"{self.c_high[i]:.6g}", "l": f"{self.c_low[i]:.6g}",
+                "c": f"{p:.6g}", "v": f"{self.c_vol[i]:.2f}", "T": self.candle_start * 1000,
+            }]
+            out[f"{s}@bookTicker"] = {
+                "e": "bookTicker", "u": self.steps, "E": now_ms, "s": s,
+                "b": f"{p - spread:.6g}", "B": "1000", "a": f"{p + spread:.6g}", "A": "1000",
+            }
+            out[f"{s}@depth5@500ms"] = {
+                "bids": [[f"{p - spread * k:.6g}", "1000"] for k in range(1, 6)],
+                "asks": [[f"{p + spread * k:.6g}", "1000"] for k in range(5, 0, -1)],
+            }
+        return out
+
+    def klines(self, symbol, start_ms, end_ms, limit=1440):
+        """Deterministic 1m history: the same request always returns the same candles."""
+        i = self.index[symbol]
+        first = start_ms // 60_000
+        last = min(end_ms // 60_000, first + limit - 1)
+        minutes = np.arange(first, last + 1)
+        if not len(minutes):
+            return []
+        rng = np.random.default_rng([self.seed, i, int(first)])
+        steps = rng.normal(0.0, self.volatility * 8, (len(minutes), 4))
+        base = np.exp(self.log_price[i] + np.cumsum(steps[:, 3]))
+        o = base * np.exp(-steps[:, 3])
+        c = base
+        h = np.maximum(o, c) * np.exp(np.abs(steps[:, 1]))
+        l = np.minimum(o, c) * np.exp(-np.abs(steps[:, 2]))
+        vol = rng.exponential(50_000.0, len(minutes))
+        return [
+            {"time": int(m * 60_000), "open": f"{o[k]:.6g}", "high": f"{h[k]:.6g}", "low": f"{l[k]:.6g}",
+             "close": f"{c[k]:.6g}", "volume": f"{vol[k]:.2f}"}
+            for k, m in enumerate(minutes.tolist())
+        ]
+
+
+MARKET_KEY = web.AppKey("market", MockMarket)
+STATS_KEY = web.AppKey("stats", dict)
+PUBLISH_KEY = web.AppKey("publish")  # publish(traded): розсилає один крок ринку підписникам
+TICKER_KEY = web.AppKey("ticker", asyncio.Task)
+
+
+def frame(data_type, data):
+    msg = {"code": 0, "dataType": data_type, "data": data}
+    if isinstance(data, list):
+        msg["s"] = data_type.split("@")[0]
+    # Рівень 1: стиснення на стороні мока не повинно бути вузьким місцем тесту
+    return gzip.compress(json.dumps(msg, separators=(",", ":")).encode(), 1)
+
+
+# ---------------- SERVER ---------------- #
+
+class Connection:
+    def __init__(self, ws, queue_size):
+        self.ws = ws
+        self.subs = set()
+        self.queue = asyncio.Queue(queue_size)
+        self.pongs = 0
+
+    def offer(self, data, stats):
+        if self.queue.full():
+            stats["dropped"] += 1
+            return
+        self.queue.put_nowait(data)
+
+    async def sender(self, stats):
+        while True:
+            data = await self.queue.get()
+            await self.ws.send_bytes(data)
+            stats["sent"] += 1
+
+
+def make_app(market, queue_size=10_000, autostart=True):
+    conns = set()
+    stats = {"sent": 0, "dropped": 0, "connections": 0, "subscriptions": 0, "rest": 0, "steps": 0}
+
+    def ok(data):
+        stats["rest"] += 1
+        return web.json_response({"code": 0, "msg": "", "data": data})
+
+    async def contracts(request):
+        return ok([{"symbol": s, "currency": "USDT", "asset": s.split("-")[0]} for s in market.symbols])
+
+    async def ticker(request):
+        prices = market.prices
+        return ok([{"symbol": s, "lastPrice": f"{prices[i]:.6g}"} for i, s in enumerate(market.symbols)])
+
+    async def funding_rate(request):
+        symbol = request.query.get("symbol")
+        if symbol not in market.index:
+            return web.json_response({"code": 109400, "msg": f"{symbol} does not exist"})
+        return ok({"symbol": symbol, "fundingRate": f"{market.funding[market.index[symbol]]:.6f}"})
+
+    async def klines(request):
+        q = request.query
+        if q.get("symbol") not in market.index:
+            return web.json_response({"code": 109400, "msg": "symbol does not exist"})
+        end = int(q.get("endTime", time.time() * 1000))
+        start = int(q.get("startTime", end - 1440 * 60_000))
+        return ok(market.klines(q["symbol"], start, end, int(q.get("limit", 1440))))
+
+    async def stats_handler(request):
+        return web.json_response({
+            **stats, "symbols": len(market.symbols), "injected": list(market.events),
+        })
+
+    async def websocket(request):
+        ws = web.WebSocketResponse(autoping=False)
+        await ws.prepare(request)
+        conn = Connection(ws, queue_size)
+        conns.add(conn)
+        stats["connections"] += 1
+        sender = asyncio.create_task(conn.sender(stats))
+        pinger = asyncio.create_task(_ping(conn))
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                if msg.data == "Pong":
+                    conn.pongs += 1
+                    continue
+                try:
+                    req = json.loads(msg.data)
+                except ValueError:
+                    continue
+                data_type = req.get("dataType", "")
+                if req.get("reqType") == "sub":
+                    conn.subs.add(data_type)
+                    stats["subscriptions"] += 1
+                elif req.get("reqType") == "unsub":
+                    conn.subs.discard(data_type)
+                    stats["subscriptions"] -= 1
+                conn.offer(gzip.compress(json.dumps({"id": req.get("id"), "code": 0, "msg": ""}).encode(), 1), stats)
+        finally:
+            sender.cancel()
+            pinger.cancel()
+            conns.discard(conn)
+            stats["subscriptions"] -= len(conn.subs)
+        return ws
+
+    async def _ping(conn):
+        ping = gzip.compress(b"Ping")
+        while True:
+            await asyncio.sleep(PING_INTERVAL)
+            await conn.ws.send_bytes(ping)
+
+    def publish(traded):
+        """Pushes one step's updates to every connection subscribed to them."""
+        stats["steps"] += 1
+        if not conns:
+            return
+        payloads = market.payloads(traded)
+        frames = {}
+        for conn in list(conns):
+            for data_type in conn.subs.intersection(payloads):
+                data = frames.get(data_type)
+                if data is None:
+                    data = frames[data_type] = frame(data_type, payloads[data_type])
+                conn.offer(data, stats)
+
+    async def ticker_loop(app):
+        while True:
+            start = time.perf_counter()
+            publish(market.step())
+            await asyncio.sleep(max(0.0, market.tick_interval - (time.perf_counter() - start)))
+
+    async def on_startup(app):
+        if autostart:
+            app[TICKER_KEY] = asyncio.create_task(ticker_loop(app))
+
+    async def on_cleanup(app):
+        task = app.get(TICKER_KEY)
+        if task:
+            task.cancel()
+
+    app = web.Application()
+    app[MARKET_KEY] = market
+    app[STATS_KEY] = stats
+    app[PUBLISH_KEY] = publish
+    app.router.add_get("/openApi/swap/v2/quote/contracts", contracts)
+    app.router.add_get("/openApi/swap/v2/quote/ticker", ticker)
+    app.router.add_get("/openApi/swap/v2/quote/fundingRate", funding_rate)
+    app.router.add_get("/openApi/swap/v3/quote/klines", klines)
+    app.router.add_get("/stats", stats_handler)
+    app.router.add_get(WS_PATH, websocket)
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the BingX swap API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tick-interval", type=float, default=0.5, help="seconds between market steps")
+    parser.add_argument("--tick-prob", type=float, default=0.5, help="share of symbols trading per step")
+    parser.add_argument("--events-per-min", type=float, default=5.0, help="injected pumps/dumps per minute")
+    args = parser.parse_args()
+
+    logging.basicConfig(format='%(asctime)s - %(levelname)s - %(message)s', level=logging.INFO)
+    market = MockMarket(args.symbols, args.seed, args.tick_interval, args.tick_prob,
+                        events_per_min=args.events_per_min)
+    logging.info("BINGX_REST_URL=http://%s:%s BINGX_WS_URL=ws://%s:%s%s", args.host, args.port, args.host, args.port, WS_PATH)
+    web.run_app(make_app(market), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
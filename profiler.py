@@ -0,0 +1,178 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import logging
+import threading
+from collections import Counter
+
+PROFILE_DIR = "profiles"
+DEFAULT_INTERVAL = 0.005  # 200 семплів/с: помітно, але дешево для GIL
+MAX_DURATION = 300
+
+_active = None
+
+
+def _frame_name(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _stack(frame):
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame.f_code))
+        frame = frame.f_back
+    names.reverse()
+    return names
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampler in a daemon thread: every interval it walks
+    sys._current_frames() for all threads (the event loop thread shows the
+    coroutine that is running right now). With tasks=True it also records
+    where every suspended asyncio task is waiting, once per 10 samples.
+    Stacks are aggregated into counts, so memory depends on the number of
+    distinct stacks, not on the duration.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL, tasks=False, loop=None):
+        self.interval = interval
+        self.tasks = tasks
+        self.loop = loop
+        self.counts = Counter()
+        self.samples = 0
+        self.started = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = [f"thread:{names.get(ident, ident)}"] + _stack(frame)
+                self.counts[tuple(stack)] += 1
+            if self.tasks and self.loop is not None and self.samples % 10 == 0:
+                self._sample_tasks()
+            self.samples += 1
+
+    def _sample_tasks(self):
+        try:
+            tasks = list(asyncio.all_tasks(self.loop))
+        except RuntimeError:
+            return
+        for task in tasks:
+            try:
+                frames = task.get_stack()
+            except Exception:
+                continue
+            if not frames:
+                continue
+            stack = [f"task:{task.get_name()}"] + [_frame_name(f.f_code) for f in frames]
+            self.counts[tuple(stack)] += 10
+
+    # ---------------- OUTPUT ---------------- #
+
+    def collapsed(self):
+        """Brendan Gregg's collapsed format, for flamegraph.pl / speedscope / inferno."""
+        return "".join(f"{';'.join(stack)} {n}\n" for stack, n in self.counts.most_common())
+
+    def speedscope(self, name="bingx-bot"):
+        frames, index = [], {}
+        by_root = {}
+        for stack, n in self.counts.items():
+            ids = []
+            for fn in stack[1:]:
+                if fn not in index:
+                    index[fn] = len(frames)
+                    frames.append({"name": fn})
+                ids.append(index[fn])
+            by_root.setdefault(stack[0], []).append((ids, n))
+
+        profiles = []
+        for root, samples in sorted(by_root.items()):
+            profiles.append({
+                "type": "sampled",
+                "name": root,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(n for _, n in samples) * self.interval,
+                "samples": [ids for ids, _ in samples],
+                "weights": [n * self.interval for _, n in samples],
+            })
+        return json.dumps({
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": frames},
+            "profiles": profiles,
+            "name": name,
+            "exporter": "profiler.py",
+        })
+
+    def top(self, limit=10, thread="thread:MainThread"):
+        """Hottest leaf frames of one thread, as (frame, share of its samples)."""
+        leaves = Counter()
+        total = 0
+        for stack, n in self.counts.items():
+            if stack[0] != thread or len(stack) < 2:
+                continue
+            leaves[stack[-1]] += n
+            total += n
+        return [(fn, n / total) for fn, n in leaves.most_common(limit)] if total else []
+
+
+def write(profiler, fmt="collapsed", directory=PROFILE_DIR):
+    os.makedirs(directory, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+    if fmt == "speedscope":
+        path = os.path.join(directory, f"profile_{stamp}.speedscope.json")
+        data = profiler.speedscope()
+    else:
+        path = os.path.join(directory, f"profile_{stamp}.collapsed")
+        data = profiler.collapsed()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(data)
+    return path
+
+
+async def profile(duration, fmt="collapsed", interval=DEFAULT_INTERVAL, tasks=True, directory=PROFILE_DIR):
+    """
+    Time-boxed profile of the running process. Only one runs at a time;
+    returns (path, profiler).
+    """
+    global _active
+    if _active is not None:
+        raise RuntimeError("A profile is already running")
+    duration = min(max(duration, 1), MAX_DURATION)
+    loop = asyncio.get_running_loop()
+    _active = SamplingProfiler(interval, tasks=tasks, loop=loop)
+    try:
+        _active.start()
+        logging.warning("[PROFILE] Sampling for %gs", duration)
+        await asyncio.sleep(duration)
+    finally:
+        profiler, _active = _active, None
+        profiler.stop()
+    path = await loop.run_in_executor(None, write, profiler, fmt, directory)
+    logging.warning("[PROFILE] %d samples -> %s", profiler.samples, path)
+    return path, profiler
+
+
+def is_running():
+    return _active is not None
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import numpy as np
+import config
+from clock import default_clock
+
+INTERVAL = 1.0  # крок оновлення крос-секційної статистики, секунди
+MIN_SYMBOLS = 10  # менше - ринкового контексту немає (бектест одного символу, старт)
+
+
+class MarketRegime:
+    """
+    Cross-sectional market state over all tracked symbols, updated once per
+    INTERVAL on column-per-symbol NumPy arrays:
+
+    - median window return and breadth (share of symbols up/down) over the
+      detection window,
+    - rolling correlation of every symbol's per-interval returns to a
+      reference index (the cross-sectional median return), kept as running
+      sums so each update is O(symbols) regardless of corr_window.
+    """
+
+    def __init__(self, clock=None):
+        self.clock = clock or default_clock
+        self.index = {}
+        self.symbols = []
+        self.stats = {"updates": 0, "relabeled": 0, "suppressed": 0}
+        self.apply_config(config.get())
+        config.register(self)
+
+    def apply_config(self, cfg):
+        horizon = max(2, int(cfg["window"] / INTERVAL) + 1)
+        corr_window = cfg["regime_corr_window"]
+        self.cfg = cfg
+        if getattr(self, "horizon", None) == horizon and getattr(self, "corr_window", None) == corr_window:
+            return
+        self.horizon = horizon
+        self.corr_window = corr_window
+        self._reset(max(64, len(self.symbols)))
+
+    def _reset(self, capacity):
+        self.capacity = capacity
+        self.logp = np.full((self.horizon, capacity), np.nan)  # кільце лог-цін за вікно
+        self.rets = np.zeros((self.corr_window, capacity))     # кільце доходностей для кореляції
+        self.ref = np.zeros(self.corr_window)
+        self.sx = np.zeros(capacity)
+        self.sxx = np.zeros(capacity)
+        self.sxy = np.zeros(capacity)
+        self.sy = 0.0
+        self.syy = 0.0
+        self.row = -1
+        self.count = 0
+        self.median_return = 0.0
+        self.breadth_up = 0.0
+        self.breadth_down = 0.0
+        self.active = 0
+        self.corr = np.zeros(capacity)
+
+    def _grow(self, capacity):
+        def widen(arr, fill):
+            out = np.full(arr.shape[:-1] + (capacity,), fill)
+            out[..., :arr.shape[-1]] = arr
+            return out
+
+        self.logp = widen(self.logp, np.nan)
+        self.rets = widen(self.rets, 0.0)
+        self.sx, self.sxx, self.sxy, self.corr = (widen(a, 0.0) for a in (self.sx, self.sxx, self.sxy, self.corr))
+        self.capacity = capacity
+
+    def column(self, symbol):
+        col = self.index.get(symbol)
+        if col is None:
+            col = self.index[symbol] = len(self.symbols)
+            self.symbols.append(symbol)
+            if col >= self.capacity:
+                self._grow(self.capacity * 2)
+        return col
+
+    def update(self, prices):
+        """prices: array aligned to columns, NaN where a symbol has no price yet."""
+        n = len(prices)
+        logp = np.full(self.capacity, np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            logp[:n] = np.log(np.where(prices > 0, prices, np.nan))
+
+        prev = self.logp[self.row] if self.count else logp
+        self.row = (self.row + 1) % self.horizon
+        # Найстаріший рядок кільця - ціна на початку вікна (до перезапису)
+        start = self.logp[self.row] if self.count >= self.horizon else self.logp[0]
+        self.logp[self.row] = logp
+        self.count += 1
+
+        valid = np.isfinite(logp)
+        self.active = int(valid.sum())
+
+        # -------- Кореляція до індексу (ковзні суми) -------- #
+        r = logp - prev
+        r[~np.isfinite(r)] = 0.0
+        moved = r[valid]
+        ref = float(np.median(moved)) if len(moved) else 0.0
+        k = (self.count - 1) % self.corr_window
+        if self.count > self.corr_window:
+            old_r, old_ref = self.rets[k], self.ref[k]
+            self.sx -= old_r
+            self.sxx -= old_r * old_r
+            self.sxy -= old_r * old_ref
+            self.sy -= old_ref
+            self.syy -= old_ref * old_ref
+        self.rets[k] = r
+        self.ref[k] = ref
+        self.sx += r
+        self.sxx += r * r
+        self.sxy += r * ref
+        self.sy += ref
+        self.syy += ref * ref
+
+        m = min(self.count, self.corr_window)
+        var_y = m * self.syy - self.sy * self.sy
+        var_x = m * self.sxx - self.sx * self.sx
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = (m * self.sxy - self.sx * self.sy) / np.sqrt(var_x * var_y)
+        self.corr = np.where(np.isfinite(corr), corr, 0.0)
+
+        # -------- Медіана та ширина ринку за вікно детекції -------- #
+        window = logp - start
+        window = window[np.isfinite(window)]
+        if len(window) >= MIN_SYMBOLS:
+            self.median_return = float(np.expm1(np.median(window)) * 100)
+            self.breadth_up = float((window > 0).mean())
+            self.breadth_down = float((window < 0).mean())
+        else:
+            self.median_return = self.breadth_up = self.breadth_down = 0.0
+        self.stats["updates"] += 1
+
+    def update_from(self, analyzers):
+        cols, values = [], []
+        for a in analyzers:
+            price = a.last.price
+            if price is not None:
+                cols.append(self.column(a.symbol))
+                values.append(price)
+        prices = np.full(len(self.symbols), np.nan)
+        prices[cols] = values
+        self.update(prices)
+
+    def context(self, symbol):
+        """Market state as seen by one symbol, or None until enough symbols are tracked."""
+        col = self.index.get(symbol)
+        if col is None or self.active < MIN_SYMBOLS or self.count < 2:
+            return None
+        return {
+            "median": round(self.median_return, 2),
+            "breadth_up": round(self.breadth_up, 2),
+            "breadth_down": round(self.breadth_down, 2),
+            "corr": round(float(self.corr[col]), 2),
+        }
+
+    def classify(self, symbol, direction, move, threshold=None):
+        """
+        direction: +1 pump / -1 dump, move: the symbol's move in % (signed),
+        threshold: the detection threshold in % the move had to clear
+        (pump_min/dump_min by default; the z-score mode passes its own).
+        Returns (action, context): action is None for an idiosyncratic move,
+        otherwise cfg["regime_action"] ("relabel"/"suppress").
+        """
+        cfg = self.cfg
+        ctx = self.context(symbol)
+        if cfg["regime_action"] == "off" or ctx is None:
+            return None, ctx
+        breadth = ctx["breadth_up"] if direction > 0 else ctx["breadth_down"]
+        if threshold is None:
+            threshold = cfg["pump_min"] if direction > 0 else cfg["dump_min"]
+        # Рух пояснюється ринком: більшість монет іде туди ж, символ корелює з індексом,
+        # а надлишок над медіаною сам по собі не дотягує до порогу детекції
+        market_driven = (
+            ctx["median"] * direction > 0
+            and breadth >= cfg["regime_breadth"]
+            and ctx["corr"] >= cfg["regime_corr_min"]
+            and abs(move - ctx["median"]) < threshold
+        )
+        if not market_driven:
+            return None, ctx
+        self.stats["relabeled" if cfg["regime_action"] == "relabel" else "suppressed"] += 1
+        return cfg["regime_action"], ctx
+
+
+market = MarketRegime()
+
+
+async def regime_loop(get_analyzers, interval=INTERVAL):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            market.update_from(get_analyzers())
+        except Exception as e:
+            logging.error("Market regime update failed: %s", e)
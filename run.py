@@ -1,26 +1,75 @@
-# run.py (updated with nest_asyncio)
+# run.py
+import startup  # першим: T0 для метрик старту
+import sys
+import signal
 import asyncio
-import nest_asyncio
-from main import application
-from ws_manager import start_all_ws
-from main import notify
 import logging
+import config
+import storage
+import dedupe
+import tickbus
+import main as bot
+import ws_manager
+from ws_manager import start_all_ws
+from webhook import run_update_intake
+from events import bus
+import profiler
+from logs import setup_logging
+from status import serve_status
+
+# Запис логів - у фоновому потоці (LOG_LEVEL, LOG_FORMAT=json, LOG_FILE, LOG_RATE)
+setup_logging()
+startup.mark("imports")
+
+
+def _profile_on_signal():
+    # kill -USR1 <pid>: 30 с профілю у profiles/, шлях - у лог
+    if profiler.is_running():
+        logging.warning("[PROFILE] Already running, SIGUSR1 ignored")
+        return
+    asyncio.create_task(profiler.profile(30, "speedscope"))
 
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.WARNING
-)
-nest_asyncio.apply()
-import main
-main.notify_loop = asyncio.get_event_loop()
 
 async def main():
-    asyncio.create_task(start_all_ws())
-    notify("Bot started", None)
-    try:  
-        await application.run_polling(timeout=90)
+    """Returns the process exit code: non-zero lets restart: on-failure bring the bot back."""
+    exit_code = 0
+    try:
+        config.load_config()
     except Exception as e:
-        logging.error(f"Error running the polling: {e}")
+        logging.error("Failed to load %s, using defaults: %s", config.CONFIG_FILE, e)
+    storage.open_sink()
+    dedupe.open_store()
+    tickbus.open_ring()
+    if hasattr(signal, "SIGUSR1"):
+        asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, _profile_on_signal)
+    bus.subscribe("storage", storage.record_bus_event, maxsize=10000)
+    bus.start()
+    application = bot.application
+    try:
+        # Явний життєвий цикл замість run_polling: без nest_asyncio і вкладених циклів
+        async with application, bot.alert_bot:
+            await application.start()
+            startup.mark("telegram_ready")
+            bot.notify("Bot started", None)
+            try:
+                async with asyncio.TaskGroup() as tg:
+                    tg.create_task(config.watch_config())
+                    tg.create_task(start_all_ws())
+                    # Воркери графіків піднімаються у фоні, не затримуючи підписку на ринок
+                    tg.create_task(bot.aggregator.warm_up())
+                    tg.create_task(run_update_intake(application))
+                    tg.create_task(serve_status(lambda: ws_manager.shards, bot.aggregator))
+            finally:
+                await application.stop()
+    except Exception:
+        # logging.exception показує й вкладені винятки ExceptionGroup з TaskGroup
+        logging.exception("Error running the bot")
+        exit_code = 1
+    finally:
+        storage.close_sink()
+        dedupe.store.close()
+        tickbus.close_ring()
+    return exit_code
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,324 @@
+import math
+from collections import deque
+import numpy as np
+
+# (інтервал бакета, глибина в секундах) для OHLC-рівнів історії
+TIERS = ((1.0, 600), (10.0, 2 * 3600), (60.0, 6 * 3600))
+RAW_SPAN = 60  # повна роздільність за останню хвилину
+RAW_CAPACITY = 512
+
+
+class PriceSeries:
+    """
+    Raw ticks of one stream type (last trade, best bid, best ask).
+    Only a short tail is kept; detection works on TieredHistory.
+    """
+
+    def __init__(self, maxlen=32):
+        self.prices = deque(maxlen=maxlen)
+        self.times = deque(maxlen=maxlen)
+        self.qty = None
+        self.count = 0
+
+    def add(self, ts, price, qty=None):
+        self.prices.append(price)
+        self.times.append(ts)
+        self.qty = qty
+        self.count += 1
+
+    @property
+    def price(self):
+        return self.prices[-1] if self.prices else None
+
+    @property
+    def ts(self):
+        return self.times[-1] if self.times else None
+
+
+class CandleVolume:
+    """
+    Volume per 1m candle from kline pushes. A push carries the running total
+    of the in-progress candle, so only the change since the previous push is
+    new volume; the total is final once a push for a later candle arrives.
+    Closed totals feed a rolling baseline kept as a running sum.
+    """
+
+    def __init__(self, baseline=20):
+        self.closed = deque(maxlen=baseline)
+        self._sum = 0.0
+        self.candle = None  # час відкриття поточної свічки, мс
+        self.current = 0.0
+        self.delta = 0.0  # приріст з останнього пушу
+
+    def set_baseline(self, baseline):
+        if baseline != self.closed.maxlen:
+            self.load(list(self.closed)[-baseline:], baseline)
+
+    def load(self, totals, baseline=None):
+        self.closed = deque(totals, maxlen=baseline or self.closed.maxlen)
+        self._sum = float(sum(self.closed))
+
+    def update(self, candle, total):
+        if self.candle is not None and candle < self.candle:
+            return
+        if candle != self.candle:
+            if self.candle is not None:
+                if len(self.closed) == self.closed.maxlen:
+                    self._sum -= self.closed[0]
+                self.closed.append(self.current)
+                self._sum += self.current
+            self.candle = candle
+            self.current = 0.0
+        self.delta = total - self.current
+        self.current = total
+
+    @property
+    def baseline(self):
+        return self._sum / len(self.closed) if self.closed else 0.0
+
+    @property
+    def rvol(self):
+        """In-progress candle volume relative to the average closed candle."""
+        base = self.baseline
+        return self.current / base if base > 0 else 0.0
+
+
+class EwmaVolatility:
+    """
+    Exponentially weighted variance of log returns between consecutive
+    interval closes, updated once per closed bucket. Constant memory per
+    symbol; half-life in seconds.
+    """
+
+    MIN_SAMPLES = 30
+
+    def __init__(self, halflife=1800.0, interval=1.0):
+        self.var = 0.0
+        self.n = 0
+        self.bucket = None
+        self.close = None
+        self.ref = None  # закриття останнього завершеного бакета
+        self.ref_bucket = None
+        self.set_params(halflife, interval)
+
+    def set_params(self, halflife, interval):
+        self.halflife = halflife
+        self.interval = interval
+        self.alpha = 1 - 0.5 ** (interval / halflife)
+
+    @property
+    def ready(self):
+        return self.n >= self.MIN_SAMPLES and self.var > 0
+
+    @property
+    def sigma(self):
+        return math.sqrt(self.var)
+
+    def add(self, ts, price):
+        bucket = ts - ts % self.interval
+        if bucket == self.bucket:
+            self.close = price
+            return
+        if self.bucket is not None and bucket < self.bucket:
+            return
+        if self.ref is not None and self.ref > 0 and self.close > 0:
+            # Пропущені бакети: дохідність за k інтервалів зводимо до одного
+            k = max(1.0, (self.bucket - self.ref_bucket) / self.interval)
+            r = math.log(self.close / self.ref)
+            self.var += self.alpha * (r * r / k - self.var)
+            self.n += 1
+        if self.close is not None:
+            self.ref, self.ref_bucket = self.close, self.bucket
+        self.bucket = bucket
+        self.close = price
+
+    def seed(self, times, closes):
+        """Rebuilds the estimate from bucket closes, e.g. after a snapshot restore."""
+        for ts, price in zip(times, closes):
+            self.add(ts, price)
+
+    def zscore(self, move, duration):
+        """move: fractional price change over `duration` seconds."""
+        if not self.ready or move <= -1:
+            return 0.0
+        steps = max(duration, self.interval) / self.interval
+        return math.log1p(move) / (self.sigma * math.sqrt(steps))
+
+    def move_for(self, z, duration):
+        """Inverse of zscore(): the fractional move that scores `z` over `duration` seconds."""
+        steps = max(duration, self.interval) / self.interval
+        return math.expm1(z * self.sigma * math.sqrt(steps))
+
+
+class RingTier:
+    """
+    Fixed-capacity ring of OHLC buckets on flat float64 arrays. interval=0
+    stores every tick as its own bucket (the raw tier). Appends are O(1),
+    memory is 5 * 8 bytes * capacity regardless of the tick rate. t is kept
+    non-decreasing in ring order: out-of-order frames are counted in `late`
+    and dropped, so scan() can binary-search it.
+    """
+
+    def __init__(self, interval, capacity):
+        self.interval = interval
+        self.capacity = capacity
+        self.t = np.zeros(capacity)
+        self.o = np.zeros(capacity)
+        self.h = np.zeros(capacity)
+        self.l = np.zeros(capacity)
+        self.c = np.zeros(capacity)
+        self.head = -1
+        self.count = 0
+        self.late = 0
+
+    @property
+    def span(self):
+        return self.interval * self.capacity
+
+    def oldest_ts(self):
+        if not self.count:
+            return None
+        return self.t[(self.head - self.count + 1) % self.capacity]
+
+    def add(self, ts, price):
+        self.add_ohlc(ts, price, price, price, price)
+
+    def add_ohlc(self, ts, o, h, l, c):
+        interval = self.interval
+        bucket = ts - ts % interval if interval else ts
+        if self.count:
+            i = self.head
+            last = self.t[i]
+            if bucket < last:
+                # Кадр із запізненням - у закритий бакет (чи перед останнім тіком) не пишемо
+                self.late += 1
+                return
+            if interval and bucket == last:
+                if h > self.h[i]:
+                    self.h[i] = h
+                if l < self.l[i]:
+                    self.l[i] = l
+                self.c[i] = c
+                return
+        i = self.head = (self.head + 1) % self.capacity
+        self.t[i] = bucket
+        self.o[i] = o
+        self.h[i] = h
+        self.l[i] = l
+        self.c[i] = c
+        if self.count < self.capacity:
+            self.count += 1
+
+    def chrono(self, arr):
+        """arr (one of t/o/h/l/c) in oldest-to-newest order."""
+        end = self.head + 1
+        if self.count < self.capacity:
+            return arr[:end]
+        return np.concatenate((arr[end:], arr[:end]))
+
+    def rows(self):
+        return np.stack([self.chrono(a) for a in (self.t, self.o, self.h, self.l, self.c)], axis=1)
+
+    def _window(self, since):
+        """Physical (lo, hi) slices, oldest first, holding buckets with t >= since."""
+        end = self.head + 1
+        if self.count < self.capacity:
+            halves = [(0, end)]
+        else:
+            # Кільце - дві відсортовані половини: [end:] старша, [:end] новіша
+            halves = [(end, self.capacity), (0, end)]
+        t = self.t
+        for n, (lo, hi) in enumerate(halves):
+            if hi > lo and t[hi - 1] >= since:
+                start = lo + int(np.searchsorted(t[lo:hi], since, side="left"))
+                return [(start, hi)] + [h for h in halves[n + 1:] if h[1] > h[0]]
+        return []
+
+    def scan(self, since):
+        """
+        Stats over buckets with t >= since. Binary search runs on the two
+        sorted halves of the ring, then only the window slices are read:
+        no copy of the ring, O(log capacity + window) per call.
+        Returns (n, low, low_ts, high, high_ts, close_sum) or None.
+        """
+        if not self.count:
+            return None
+        slices = self._window(since)
+        if not slices:
+            return None
+        n = 0
+        close_sum = 0.0
+        low = high = None
+        for lo, hi in slices:
+            # argmin/argmax і строге порівняння беруть найстаріший екстремум
+            li = lo + int(self.l[lo:hi].argmin())
+            hi_i = lo + int(self.h[lo:hi].argmax())
+            if low is None or self.l[li] < low[0]:
+                low = (float(self.l[li]), float(self.t[li]))
+            if high is None or self.h[hi_i] > high[0]:
+                high = (float(self.h[hi_i]), float(self.t[hi_i]))
+            close_sum += float(self.c[lo:hi].sum())
+            n += hi - lo
+        return n, low[0], low[1], high[0], high[1], close_sum
+
+
+class TieredHistory:
+    """
+    Raw ticks for the last minute plus 1 s / 10 s / 1 m OHLC rings going back
+    hours. Every tick is folded into all tiers in O(1); a window query reads
+    only the finest tier that still covers the window.
+    """
+
+    def __init__(self, fine_interval=1.0):
+        self.raw = RingTier(0, RAW_CAPACITY)
+        self.tiers = [RingTier(interval, int(span / interval)) for interval, span in TIERS]
+        if fine_interval != TIERS[0][0]:
+            self.set_fine_interval(fine_interval)
+
+    @property
+    def fine(self):
+        return self.tiers[0]
+
+    def add(self, ts, price):
+        self.raw.add(ts, price)
+        for tier in self.tiers:
+            tier.add(ts, price)
+
+    def tier_for(self, window, now):
+        since = now - window
+        if window <= RAW_SPAN:
+            oldest = self.raw.oldest_ts()
+            # Сирий рівень придатний, лише якщо його ємність ще покриває вікно
+            if oldest is not None and (oldest <= since or self.raw.count < self.raw.capacity):
+                return self.raw
+        for tier in self.tiers:
+            if tier.span >= window:
+                return tier
+        return self.tiers[-1]
+
+    def extremes(self, window, now):
+        return self.tier_for(window, now).scan(now - window)
+
+    def set_fine_interval(self, interval):
+        # Перебакетизуємо наявні дані в новий крок без втрати історії
+        old = self.tiers[0]
+        if interval == old.interval:
+            return
+        span = TIERS[0][1]
+        new = RingTier(interval, max(1, int(span / interval)))
+        for row in old.rows().tolist():
+            new.add_ohlc(*row)
+        self.tiers[0] = new
+
+    def export(self):
+        """[(interval, rows)] for the raw tier and every OHLC tier, oldest first."""
+        return [(tier.interval, tier.rows()) for tier in [self.raw] + self.tiers]
+
+    def load(self, exported):
+        by_interval = {tier.interval: tier for tier in [self.raw] + self.tiers}
+        for interval, rows in exported:
+            tier = by_interval.get(interval)
+            if tier is None:
+                continue
+            for row in rows:
+                tier.add_ohlc(*row)
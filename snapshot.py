@@ -0,0 +1,161 @@
+import os
+import io
+import time
+import asyncio
+import logging
+import numpy as np
+
+SNAPSHOT_FILE = "state.npz"
+SNAPSHOT_INTERVAL = 30
+FRESH_AGE = 300  # буфер, молодший за вікно детекції, відновлюємо повністю
+
+CANDLE_KEYS = ("time", "open", "high", "low", "close", "volume")
+SCALAR_KEYS = ("last_event_ts", "last_pump_price", "last_dump_price", "last_pump_time", "last_dump_time")
+
+
+def _none_to_nan(v):
+    return np.nan if v is None else v
+
+
+def _nan_to_none(v):
+    return None if np.isnan(v) else float(v)
+
+
+def _flatten(seqs, width=None):
+    offsets = np.zeros(len(seqs) + 1, dtype=np.int64)
+    np.cumsum([len(s) for s in seqs], out=offsets[1:])
+    shape = (int(offsets[-1]),) if width is None else (int(offsets[-1]), width)
+    flat = np.empty(shape, dtype=np.float64)
+    pos = 0
+    for s in seqs:
+        n = len(s)
+        if n:
+            flat[pos:pos + n] = s
+        pos += n
+    return flat, offsets
+
+
+def pack(analyzers):
+    analyzers = list(analyzers)
+    arrays = {
+        "saved_at": np.float64(time.time()),
+        "symbols": np.array([a.symbol for a in analyzers], dtype=str),
+    }
+    for key in SCALAR_KEYS:
+        arrays[key] = np.array([_none_to_nan(getattr(a, key)) for a in analyzers], dtype=np.float64)
+
+    # Рівні історії: 0 - сирі тіки, далі OHLC-кільця (t, o, h, l, c)
+    exported = [a.history.export() for a in analyzers]
+    for k in range(len(exported[0]) if exported else 0):
+        arrays[f"tier{k}_interval"] = np.array([e[k][0] for e in exported], dtype=np.float64)
+        arrays[f"tier{k}"], arrays[f"tier{k}_off"] = _flatten([e[k][1] for e in exported], width=5)
+    arrays["candles"], arrays["candles_off"] = _flatten(
+        [[[c[k] for k in CANDLE_KEYS] for c in a.candles] for a in analyzers], width=len(CANDLE_KEYS)
+    )
+    return arrays
+
+
+def _write(arrays, path):
+    buf = io.BytesIO()
+    np.savez_compressed(buf, **arrays)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(buf.getbuffer())
+    os.replace(tmp, path)  # атомарна заміна: після краху лишається або старий, або новий файл
+
+
+def save_snapshot(analyzers, path=SNAPSHOT_FILE):
+    arrays = pack(analyzers)
+    _write(arrays, path)
+    return len(arrays["symbols"])
+
+
+def load_snapshot(path=SNAPSHOT_FILE):
+    """
+    Returns {symbol: state dict} or {} when there is no usable snapshot.
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with np.load(path, allow_pickle=False) as z:
+            data = {k: z[k] for k in z.files}
+    except Exception as e:
+        logging.error("Failed to read snapshot %s: %s", path, e)
+        return {}
+
+    try:
+        return _unpack(data)
+    except KeyError as e:
+        logging.error("Snapshot %s has an outdated layout (missing %s), ignoring it", path, e)
+        return {}
+
+
+def _unpack(data):
+    c_off = data["candles_off"]
+    n_tiers = sum(1 for k in data if k.startswith("tier") and k.endswith("_interval"))
+    state = {}
+    for i, symbol in enumerate(data["symbols"]):
+        candles = data["candles"][c_off[i]:c_off[i + 1]]
+        tiers = []
+        for k in range(n_tiers):
+            off = data[f"tier{k}_off"]
+            tiers.append((float(data[f"tier{k}_interval"][i]), data[f"tier{k}"][off[i]:off[i + 1]].tolist()))
+        state[str(symbol)] = {
+            **{key: data[key][i] for key in SCALAR_KEYS},
+            "history": tiers,
+            "candles": [
+                {k: (int(row[j]) if k == "time" else float(row[j])) for j, k in enumerate(CANDLE_KEYS)}
+                for row in candles
+            ],
+        }
+    return state
+
+
+def restore(analyzers, state, now=None):
+    """
+    analyzers: {symbol: MarketAnalyzer}. Dedupe/cooldown state and the
+    tiered price history are always restored (window queries skip stale
+    buckets by time); volume/candle buffers only if the last tick is
+    younger than FRESH_AGE. Fresh symbols detect without a warm-up.
+    Ages are measured on each analyzer's own clock unless `now` is given.
+    Returns number of symbols with fresh buffers.
+    """
+    fresh = 0
+    for symbol, a in analyzers.items():
+        s = state.get(symbol)
+        if s is None:
+            continue
+        at = a.clock.time() if now is None else now
+
+        a.last_event_ts = float(s["last_event_ts"])
+        a.last_pump_time = float(s["last_pump_time"])
+        a.last_dump_time = float(s["last_dump_time"])
+        a.last_pump_price = _nan_to_none(s["last_pump_price"])
+        a.last_dump_price = _nan_to_none(s["last_dump_price"])
+        a.seed_store(at)
+
+        a.history.load(s["history"])
+        fine = a.history.fine
+        a.vol.seed(fine.chrono(fine.t).tolist(), fine.chrono(fine.c).tolist())
+        last_ts = a.history.raw.t[a.history.raw.head] if a.history.raw.count else None
+        if last_ts is None or at - last_ts > FRESH_AGE:
+            continue
+
+        a.candles.extend(s["candles"])
+        # Підсумки закритих свічок відновлюємо з самих свічок, поточну - як незавершену
+        for c in s["candles"]:
+            a.volume.update(c["time"], c["volume"])
+        fresh += 1
+    return fresh
+
+
+async def snapshot_loop(get_analyzers, path=SNAPSHOT_FILE, interval=SNAPSHOT_INTERVAL):
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            # Пакуємо в циклі подій (консистентний зріз), пишемо на диск у потоці
+            arrays = pack(get_analyzers())
+            await loop.run_in_executor(None, _write, arrays, path)
+        except Exception as e:
+            logging.error("Snapshot save failed: %s", e)
@@ -0,0 +1,14 @@
+import time
+import logging
+
+# Імпортується першим у run.py, тож T0 ~ старт процесу
+T0 = time.perf_counter()
+marks = {}
+
+
+def mark(name):
+    """Records seconds since T0 for the first occurrence of a startup milestone."""
+    if name in marks:
+        return
+    marks[name] = time.perf_counter() - T0
+    logging.warning("[STARTUP] %s: %.3fs", name, marks[name])
@@ -0,0 +1,62 @@
+"""
+Import-time profile of the bot's startup path.
+
+    python startup_profile.py             # top imports for `import run`
+    python startup_profile.py --top 40 --modules test ws_manager
+
+Runs the import in a fresh interpreter with -X importtime and prints the
+slowest modules by cumulative time, plus any heavy rendering modules that
+were pulled in eagerly (they should load only in the render workers).
+"""
+import os
+import sys
+import argparse
+import subprocess
+
+HEAVY = ("pandas", "matplotlib", "mplfinance")
+
+
+def profile_imports(modules):
+    env = dict(os.environ)
+    env.setdefault("TOKEN", "0:profile")  # main.py будує Application вже при імпорті
+    code = "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=env, capture_output=True, text=True,
+    )
+    if proc.returncode:
+        raise SystemExit(proc.stderr.strip().splitlines()[-1])
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cum_us)))
+    return rows
+
+
+def report(rows, top):
+    total = sum(cum for _, depth, _, cum in rows if depth == 0)
+    print(f"Total import time: {total / 1e6:.3f}s, {len(rows)} modules\n")
+    print(f"{'cumulative':>12} {'self':>10}  module")
+    for name, depth, self_us, cum_us in sorted(rows, key=lambda r: -r[3])[:top]:
+        print(f"{cum_us / 1e3:>10.1f}ms {self_us / 1e3:>8.1f}ms  {'  ' * depth}{name}")
+
+    eager = sorted({name for name, *_ in rows if name.split(".")[0] in HEAVY and "." not in name})
+    print(f"\nHeavy modules imported eagerly: {', '.join(eager) if eager else 'none'}")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile of the startup path")
+    parser.add_argument("--modules", nargs="+", default=["run"])
+    parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+    report(profile_imports(args.modules), args.top)
+
+
+if __name__ == "__main__":
+    main()
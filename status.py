@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import asyncio
+import logging
+from aiohttp import web
+import config
+import storage
+import startup
+import http_pools
+from events import bus
+from test import funding
+
+STATUS_HOST = os.getenv("STATUS_HOST", "0.0.0.0")
+STATUS_PORT = int(os.getenv("STATUS_PORT", "8080"))
+STALE_SYMBOL_AGE = 300  # символ без тіків довше за це вважається застарілим
+FUNDING_MAX_AGE = 120
+STATUS_RETRY_BASE = 5.0
+STATUS_RETRY_MAX = 300.0
+
+
+def shard_state(ws, stall_timeout):
+    age = ws.last_message_age()
+    return {
+        "shard": ws.symbols[0],
+        "symbols": len(ws.symbols),
+        "active": ws.active,
+        "connected": age is not None,
+        "last_message_age": None if age is None else round(age, 3),
+        "fresh": age is not None and age < stall_timeout,
+        "reconnects": sum(h["reconnects"] for h in ws.health.values()),
+        "stalls": sum(h["stalls"] for h in ws.health.values()),
+        "detect_queue": ws.detect_queue.qsize(),
+    }
+
+
+def collect(shards, aggregator=None):
+    """One pass over shards and analyzers; cheap enough to poll every second."""
+    cfg = config.get()
+    now = time.time()
+    states = [shard_state(ws, cfg["stall_timeout"]) for ws in shards]
+
+    stale = 0
+    total = 0
+    for ws in shards:
+        now_ws = ws.clock.time()
+        for a in ws.analyzers.values():
+            total += 1
+            ts = a.last.ts
+            if ts is None or now_ws - ts > STALE_SYMBOL_AGE:
+                stale += 1
+
+    sink = storage.sink
+    return {
+        "uptime": round(time.perf_counter() - startup.T0, 1),
+        "startup": dict(startup.marks),
+        "shards": states,
+        "symbols": total,
+        "stale_symbols": stale,
+        "detect_queue": sum(s["detect_queue"] for s in states),
+        "funding": funding.stats(now, FUNDING_MAX_AGE),
+        "alerts": {"backlog": aggregator.backlog, **aggregator.stats} if aggregator else None,
+        "bus": bus.stats(),
+        "storage": dict(sink.stats, backlog=sink.backlog) if sink else None,
+        "http_pools": http_pools.pool_stats(),
+    }
+
+
+def readiness(state):
+    reasons = []
+    if "first_subscription" not in state["startup"]:
+        reasons.append("no subscription yet")
+    if not state["shards"]:
+        reasons.append("no shards")
+    stale_shards = [s["shard"] for s in state["shards"] if not s["fresh"]]
+    if stale_shards:
+        reasons.append(f"stale shards: {', '.join(stale_shards)}")
+    return reasons
+
+
+def liveness(state):
+    # Перезапуск потрібен, лише коли завис увесь процес, а не один шард:
+    # окремі шарди супервізор перепідключає сам
+    shards = state["shards"]
+    if not shards:
+        return []
+    stale = sum(1 for s in shards if not s["fresh"])
+    if stale * 2 >= len(shards) and state["uptime"] > 2 * config.get()["stall_timeout"]:
+        return [f"{stale}/{len(shards)} shards without fresh data"]
+    return []
+
+
+def prometheus(state):
+    lines = []
+
+    def metric(name, value, help_text=None, labels=None, kind="gauge"):
+        if value is None:
+            return
+        if help_text:
+            lines.append(f"# HELP bot_{name} {help_text}")
+            lines.append(f"# TYPE bot_{name} {kind}")
+        label = "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}" if labels else ""
+        lines.append(f"bot_{name}{label} {float(value):g}")
+
+    metric("uptime_seconds", state["uptime"], "Seconds since process start")
+    for i, (mark, seconds) in enumerate(state["startup"].items()):
+        metric("startup_seconds", seconds, "Startup milestones" if i == 0 else None, {"mark": mark})
+    metric("symbols", state["symbols"], "Tracked symbols")
+    metric("stale_symbols", state["stale_symbols"], f"Symbols without ticks for {STALE_SYMBOL_AGE}s")
+    metric("detect_queue", state["detect_queue"], "Symbols waiting for detection")
+    for i, s in enumerate(state["shards"]):
+        first = i == 0
+        labels = {"shard": s["shard"]}
+        metric("shard_connected", s["connected"], "Shard has an active connection" if first else None, labels)
+        metric("shard_message_age_seconds", s["last_message_age"], "Seconds since last message" if first else None, labels)
+        metric("shard_reconnects_total", s["reconnects"], "Reconnects" if first else None, labels, "counter")
+        metric("shard_stalls_total", s["stalls"], "Stalls detected by the watchdog" if first else None, labels, "counter")
+    metric("funding_cached", state["funding"]["cached"], "Symbols with a cached funding rate")
+    metric("funding_fresh", state["funding"]["fresh"], f"Funding rates younger than {FUNDING_MAX_AGE}s")
+    metric("funding_oldest_age_seconds", state["funding"]["oldest_age"], "Age of the oldest funding rate")
+    if state["alerts"]:
+        metric("alert_backlog", state["alerts"]["backlog"], "Alerts waiting for the next batch")
+        metric("alert_send_errors_total", state["alerts"]["send_errors"], "Failed Telegram sends", kind="counter")
+    for i, (name, sub) in enumerate(state["bus"]["subscribers"].items()):
+        labels = {"subscriber": name}
+        metric("bus_backlog", sub["backlog"], "Queued events per subscriber" if i == 0 else None, labels)
+        metric("bus_dropped_total", sub["dropped"], "Events dropped per subscriber" if i == 0 else None, labels, "counter")
+        metric("bus_lag_max_seconds", sub["lag_max"], "Max delivery lag" if i == 0 else None, labels)
+    if state["storage"]:
+        metric("storage_backlog", state["storage"]["backlog"], "Rows waiting for the writer thread")
+        metric("storage_dropped_total", state["storage"]["dropped"], "Rows dropped by the storage sink", kind="counter")
+    for i, (name, pool) in enumerate(state["http_pools"].items()):
+        labels = {"pool": name}
+        metric("http_pool_in_flight", pool["in_flight"], "Requests in flight" if i == 0 else None, labels)
+        metric("http_pool_wait_max_seconds", pool["wait_max"], "Max wait for a pool slot" if i == 0 else None, labels)
+        metric("http_pool_timeouts_total", pool["pool_timeouts"], "Pool timeouts" if i == 0 else None, labels, "counter")
+    return "\n".join(lines) + "\n"
+
+
+def make_status_app(get_shards, aggregator=None):
+    async def healthz(request):
+        reasons = liveness(collect(get_shards(), aggregator))
+        return web.json_response({"ok": not reasons, "reasons": reasons}, status=503 if reasons else 200)
+
+    async def readyz(request):
+        state = collect(get_shards(), aggregator)
+        reasons = readiness(state)
+        return web.json_response({"ready": not reasons, "reasons": reasons, "stale_symbols": state["stale_symbols"]},
+                                 status=503 if reasons else 200)
+
+    async def metrics(request):
+        return web.Response(text=prometheus(collect(get_shards(), aggregator)),
+                            content_type="text/plain", charset="utf-8")
+
+    async def status(request):
+        return web.json_response(collect(get_shards(), aggregator), dumps=lambda o: json.dumps(o, default=str))
+
+    app = web.Application()
+    app.router.add_get("/healthz", healthz)
+    app.router.add_get("/readyz", readyz)
+    app.router.add_get("/metrics", metrics)
+    app.router.add_get("/status", status)
+    return app
+
+
+async def serve_status(get_shards, aggregator=None, host=STATUS_HOST, port=STATUS_PORT):
+    """
+    Optional endpoint, supervised on its own: a bind failure (STATUS_PORT
+    taken by another instance) is logged and retried with backoff instead
+    of cancelling the shards and update intake next to it.
+    """
+    delay = STATUS_RETRY_BASE
+    while True:
+        runner = web.AppRunner(make_status_app(get_shards, aggregator), access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, host, port).start()
+            logging.warning("Status server on %s:%s (/healthz /readyz /metrics /status)", host, port)
+            await asyncio.Event().wait()
+        except OSError as e:
+            logging.error("Status server on %s:%s failed: %s; retrying in %gs", host, port, e, delay)
+        finally:
+            await runner.cleanup()
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, STATUS_RETRY_MAX)
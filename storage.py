@@ -0,0 +1,226 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import deque
+import numpy as np
+
+STORAGE_FILE = os.getenv("STORAGE_FILE")  # не задано -> запис вимкнено
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ticks (
+    symbol TEXT NOT NULL,
+    stream TEXT NOT NULL,
+    ts REAL NOT NULL,
+    price REAL NOT NULL,
+    qty REAL
+);
+CREATE INDEX IF NOT EXISTS ticks_symbol_ts ON ticks (symbol, ts);
+
+CREATE TABLE IF NOT EXISTS candles (
+    symbol TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    open REAL, high REAL, low REAL, close REAL, volume REAL,
+    PRIMARY KEY (symbol, ts)
+);
+
+CREATE TABLE IF NOT EXISTS events (
+    symbol TEXT,
+    event TEXT NOT NULL,
+    ts REAL NOT NULL,
+    price REAL,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS events_symbol_ts ON events (symbol, ts);
+"""
+
+TICK, CANDLE, EVENT = 0, 1, 2
+
+INSERT_SQL = {
+    TICK: "INSERT INTO ticks (symbol, stream, ts, price, qty) VALUES (?, ?, ?, ?, ?)",
+    # kline_1m приходить багато разів за хвилину, зберігаємо останній стан свічки
+    CANDLE: "INSERT OR REPLACE INTO candles (symbol, ts, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?, ?)",
+    EVENT: "INSERT INTO events (symbol, event, ts, price, details) VALUES (?, ?, ?, ?, ?)",
+}
+
+EVENT_DETAIL_KEYS = ("percent", "volume", "funding_rate", "market", "zscore", "rvol")
+
+
+def connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class StorageSink:
+    """
+    Ingest side only appends to an in-memory buffer; a background thread
+    drains it and writes batches with executemany in one transaction.
+    """
+
+    def __init__(self, path, flush_interval=1.0, batch_size=5000, max_pending=500000):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._pending = deque()
+        self._stop = threading.Event()
+        self.stats = {"written": 0, "dropped": 0, "flushes": 0}
+        self._thread = threading.Thread(target=self._run, name="storage-writer", daemon=True)
+        self._thread.start()
+
+    @property
+    def backlog(self):
+        return len(self._pending)
+
+    def _put(self, item):
+        if len(self._pending) >= self.max_pending:
+            self.stats["dropped"] += 1
+            return
+        self._pending.append(item)
+
+    def record_tick(self, symbol, stream, ts, price, qty=None):
+        self._put((TICK, (symbol, stream, ts, price, qty)))
+
+    def record_candle(self, symbol, candle):
+        self._put((CANDLE, (
+            symbol, int(candle["time"]), candle["open"], candle["high"],
+            candle["low"], candle["close"], candle["volume"]
+        )))
+
+    def record_event(self, event, details=None, ts=None):
+        details = details or {}
+        extra = {k: details.get(k) for k in EVENT_DETAIL_KEYS if details.get(k) is not None}
+        self._put((EVENT, (
+            details.get("symbol"), event, time.time() if ts is None else ts,
+            details.get("price"), json.dumps(extra, default=str)
+        )))
+
+    def _drain(self, conn):
+        rows = {TICK: [], CANDLE: [], EVENT: []}
+        n = 0
+        while self._pending and n < self.batch_size:
+            kind, row = self._pending.popleft()
+            rows[kind].append(row)
+            n += 1
+        if not n:
+            return 0
+        with conn:
+            for kind, batch in rows.items():
+                if batch:
+                    conn.executemany(INSERT_SQL[kind], batch)
+        self.stats["written"] += n
+        self.stats["flushes"] += 1
+        return n
+
+    def _run(self):
+        conn = connect(self.path)
+        try:
+            while not self._stop.is_set():
+                try:
+                    # Повні батчі пишемо одразу, інакше чекаємо flush_interval
+                    if self._drain(conn) < self.batch_size:
+                        self._stop.wait(self.flush_interval)
+                except Exception as e:
+                    logging.error("Storage write error: %s", e)
+                    self._stop.wait(self.flush_interval)
+            while self._drain(conn):
+                pass
+        finally:
+            conn.close()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=10)
+
+
+sink = None
+
+
+def open_sink(path=STORAGE_FILE, **kwargs):
+    global sink
+    if not path:
+        return None
+    sink = StorageSink(path, **kwargs)
+    logging.warning("Storage sink enabled: %s", path)
+    return sink
+
+
+def close_sink():
+    global sink
+    if sink:
+        sink.close()
+        sink = None
+
+
+def record_bus_event(event):
+    # Підписник шини подій; службові повідомлення (без символу) не зберігаємо
+    if sink and event.symbol:
+        sink.record_event(event.kind, event.details, event.ts)
+
+
+# ---------------- QUERY ---------------- #
+
+def load_ticks(path, symbol, start=0.0, end=None, stream="last"):
+    """
+    Returns (ts, price, qty) NumPy arrays for one symbol/stream, sorted by ts.
+    """
+    end = time.time() if end is None else end
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute(
+            "SELECT ts, price, qty FROM ticks WHERE symbol = ? AND stream = ? AND ts >= ? AND ts < ? ORDER BY ts",
+            (symbol, stream, start, end),
+        ).fetchall()
+    finally:
+        conn.close()
+    arr = np.array(rows, dtype=np.float64).reshape(-1, 3)
+    return arr[:, 0], arr[:, 1], arr[:, 2]
+
+
+def load_candles(path, symbol, start=0.0, end=None):
+    """
+    start/end in seconds; returns {"time", "open", "high", "low", "close", "volume"} arrays
+    (time in ms, as pushed by kline_1m).
+    """
+    end = time.time() if end is None else end
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute(
+            "SELECT ts, open, high, low, close, volume FROM candles WHERE symbol = ? AND ts >= ? AND ts < ? ORDER BY ts",
+            (symbol, int(start * 1000), int(end * 1000)),
+        ).fetchall()
+    finally:
+        conn.close()
+    arr = np.array(rows, dtype=np.float64).reshape(-1, 6)
+    return {k: arr[:, i] for i, k in enumerate(("time", "open", "high", "low", "close", "volume"))}
+
+
+def load_events(path, symbol=None, start=0.0, end=None):
+    end = time.time() if end is None else end
+    conn = sqlite3.connect(path)
+    try:
+        sql = "SELECT symbol, event, ts, price, details FROM events WHERE ts >= ? AND ts < ?"
+        params = [start, end]
+        if symbol:
+            sql += " AND symbol = ?"
+            params.append(symbol)
+        rows = conn.execute(sql + " ORDER BY ts", params).fetchall()
+    finally:
+        conn.close()
+    return [
+        {"symbol": s, "event": e, "ts": ts, "price": p, **json.loads(d or "{}")}
+        for s, e, ts, p, d in rows
+    ]
+
+
+def list_symbols(path, stream="last"):
+    conn = sqlite3.connect(path)
+    try:
+        return [r[0] for r in conn.execute("SELECT DISTINCT symbol FROM ticks WHERE stream = ?", (stream,))]
+    finally:
+        conn.close()
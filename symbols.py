@@ -1,13 +1,52 @@
+import os
 import requests
 import logging
+import config
 
-BASE_URL = "https://open-api.bingx.com"
+# Перевизначається для навантажувальних тестів на mock_exchange.py
+BASE_URL = os.getenv("BINGX_REST_URL", "https://open-api.bingx.com").rstrip("/")
 CONTRACTS_URL = BASE_URL + "/openApi/swap/v2/quote/contracts"
 TICKER_URL = BASE_URL + "/openApi/swap/v2/quote/ticker"
 
 
-MAX_PRICE = 1.0
-MIN_PRICE = 0.0001
+class SymbolRegistry:
+    """
+    Process-wide symbol <-> dense integer id. Ids are handed out when a
+    shard is built for its symbols and are never reused, so per-symbol
+    state can live in plain lists/arrays indexed by id. routes maps every
+    subscribable dataType ("WIF-USDT@kline_1m") to (id, channel), so the
+    message path needs one dict lookup instead of splitting strings.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.names = []
+        self.routes = {}
+
+    def intern(self, symbol):
+        sid = self.ids.get(symbol)
+        if sid is None:
+            sid = self.ids[symbol] = len(self.names)
+            self.names.append(symbol)
+        return sid
+
+    def register(self, symbols, channels):
+        ids = []
+        for symbol in symbols:
+            sid = self.intern(symbol)
+            for ch in channels:
+                self.routes[f"{symbol}@{ch}"] = (sid, ch)
+            ids.append(sid)
+        return ids
+
+    def name(self, sid):
+        return self.names[sid]
+
+    def __len__(self):
+        return len(self.names)
+
+
+registry = SymbolRegistry()
 
 
 def get_usdtm_symbols():
@@ -78,7 +117,12 @@ def get_prices():
         return {}
 
 
-def get_filtered_symbols(min_price=MIN_PRICE, max_price=MAX_PRICE): #0.1 2.0
+def get_filtered_symbols(min_price=None, max_price=None): #0.1 2.0
+    # Ціновий діапазон за замовчуванням береться з config (min_price/max_price)
+    cfg = config.get()
+    min_price = cfg["min_price"] if min_price is None else min_price
+    max_price = cfg["max_price"] if max_price is None else max_price
+
     symbols = get_usdtm_symbols()
     prices = get_prices()
 
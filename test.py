@@ -1,23 +1,95 @@
+import os
 import json
 import time
 import gzip
 import aiohttp
 import websockets
 import asyncio
+import random
 import threading
 from collections import deque
-from main import notify  
+import numpy as np
 import logging  
+import config
+from clock import default_clock
+from series import PriceSeries, TieredHistory, EwmaVolatility, CandleVolume
+from dedupe import MemoryStore
+import storage
+import tickbus
+import startup
+from events import bus, Event
+from symbols import BASE_URL, registry
+import regime
 
 
 DEBUG = True
-URL = "wss://open-api-swap.bingx.com/swap-market"
-FUNDING_URL = "https://open-api.bingx.com/openApi/swap/v2/quote/fundingRate"
+URL = os.getenv("BINGX_WS_URL", "wss://open-api-swap.bingx.com/swap-market")
+FUNDING_URL = BASE_URL + "/openApi/swap/v2/quote/fundingRate"
+
+KLINE_INTERVAL = 60  # секунд, канал kline_1m
+# Ключ сплеску об'єму живе ще одну свічку після своєї
+VOLUME_SPIKE_TTL = 2 * KLINE_INTERVAL
+
+# Канали, на які підписується кожен символ, залежно від профілю
+SUBSCRIPTION_PROFILES = {
+    "minimal": ("lastPrice", "kline_1m"),
+    "standard": ("lastPrice", "kline_1m", "bookTicker"),
+    "deep": ("lastPrice", "kline_1m", "depth5@500ms", "bookTicker"),
+}
+# Додаються лише "гарячим" символам поблизу порогів детекції
+ESCALATION_CHANNELS = ("depth5@500ms", "bookTicker")
+# Усі канали, що можуть прийти в dataType: маршрути реєструються для кожного
+ALL_CHANNELS = tuple(dict.fromkeys(ch for p in SUBSCRIPTION_PROFILES.values() for ch in p + ESCALATION_CHANNELS))
 
 # ---------------- FUNDING ---------------- #
 
-funding_cache = {}
-funding_ts = {}
+class FundingTable:
+    """
+    Last funding rate and its fetch time per symbol id (registry ids).
+    Arrays grow with the registry; freshness stats are vectorized.
+    """
+
+    def __init__(self, capacity=1024):
+        self.rate = np.full(capacity, np.nan)
+        self.ts = np.zeros(capacity)
+
+    def _ensure(self, sid):
+        if sid >= len(self.rate):
+            size = max(sid + 1, len(self.rate) * 2)
+            self.rate = np.concatenate((self.rate, np.full(size - len(self.rate), np.nan)))
+            self.ts = np.concatenate((self.ts, np.zeros(size - len(self.ts))))
+
+    def set(self, sid, rate, ts):
+        self._ensure(sid)
+        self.rate[sid] = rate
+        self.ts[sid] = ts
+
+    def get(self, sid):
+        if sid >= len(self.rate):
+            return None
+        rate = self.rate[sid]
+        return None if rate != rate else float(rate)
+
+    def age(self, sid, now):
+        if sid >= len(self.ts) or not self.ts[sid]:
+            return None
+        return now - float(self.ts[sid])
+
+    def is_fresh(self, sid, now, max_age):
+        # Явна перевірка: щойно отриманий курс має вік 0.0, а не "немає"
+        age = self.age(sid, now)
+        return age is not None and age < max_age
+
+    def stats(self, now, max_age):
+        ts = self.ts[self.ts > 0]
+        if not len(ts):
+            return {"cached": 0, "fresh": 0, "oldest_age": None}
+        return {"cached": len(ts), "fresh": int(((now - ts) < max_age).sum()),
+                "oldest_age": round(now - float(ts.min()), 1)}
+
+
+funding = FundingTable()
+_funding_inflight = {}  # sid -> Task: один HTTP-запит на символ, решта чекають на нього
 _funding_session = None
 _funding_lock = threading.Lock()
 
@@ -35,113 +107,160 @@ async def close_global_funding_session():
             await _funding_session.close()
             _funding_session = None
 
-async def get_funding_rate_async(symbol):
-    now = time.time()
-    if symbol in funding_cache and now - funding_ts[symbol] < 60:
-        return funding_cache[symbol]
-
+async def _fetch_funding(symbol, sid, clock):
     try:
         session = await get_global_funding_session()
         async with session.get(FUNDING_URL, params={"symbol": symbol}, timeout=aiohttp.ClientTimeout(total=2)) as r:
             if r.status == 200:
                 data = await r.json()
                 rate = float(data["data"]["fundingRate"])
-                funding_cache[symbol] = rate
-                funding_ts[symbol] = now
+                funding.set(sid, rate, clock.time())
                 return rate
     except Exception as e:
-        logging.debug(f"Failed to get funding rate for {symbol}: {e}")
+        logging.debug("Failed to get funding rate for %s: %s", symbol, e, extra={"symbol": symbol})
     return None
 
+async def get_funding_rate_async(symbol, clock=default_clock, max_age=60):
+    """
+    Cached rate if younger than max_age, otherwise a fetch. Concurrent
+    callers for one symbol (background loop, OVERPUMP candidates from any
+    shard) share a single in-flight request.
+    """
+    sid = registry.intern(symbol)
+    if funding.is_fresh(sid, clock.time(), max_age):
+        return funding.get(sid)
+
+    task = _funding_inflight.get(sid)
+    if task is None:
+        task = _funding_inflight[sid] = asyncio.ensure_future(_fetch_funding(symbol, sid, clock))
+        task.add_done_callback(lambda _: _funding_inflight.pop(sid, None))
+    # shield: скасування одного з очікувачів не обриває запит для інших
+    return await asyncio.shield(task)
+
 # ---------------- ANALYZER ---------------- #
 
 class MarketAnalyzer:
-    def __init__(self, symbol):
+    def __init__(self, symbol, clock=None, store=None):
         self.symbol = symbol
-        self.prices = deque(maxlen=120)
-        self.times = deque(maxlen=120)
-        self.volumes = deque(maxlen=120)
+        self.sid = registry.intern(symbol)
+        self.clock = clock or default_clock
+        # Спільне сховище cooldown/повторів; без нього - власне в пам'яті
+        self.store = store if store is not None else MemoryStore()
+        self.on_event = None  # перехоплювач подій замість шини
+        self.request_funding = None  # шард: позачергове оновлення funding для кандидата OVERPUMP
+        self.funding_requested = float("-inf")
+
+        # Окремі серії по типу потоку; детекція працює лише з ресемплом last
+        self.last = PriceSeries()
+        self.bid = PriceSeries()
+        self.ask = PriceSeries()
+        self.history = TieredHistory(config.get()["resample_interval"])
+        self.vol = EwmaVolatility(config.get()["vol_halflife"], config.get()["resample_interval"])
+        self.volume = CandleVolume(config.get()["volume_baseline"])
+        self.last_spike_candle = None
 
 
         self.candles = deque(maxlen=120)
         self.orderbook = None
+        self.regime = regime.market
 
 
+        # Локальні дзеркала запису в self.store: швидка перевірка cooldown і снапшот
         self.last_event_ts = 0
-        self.cooldown = 30
         self.last_debug_ts = 0
-        self._cached_vwap = None
-        self._cached_volume_sum = None
+        self.last_volatility = 0.0
 
         self.last_pump_price = None
         self.last_dump_price = None
         self.last_pump_time = 0
         self.last_dump_time = 0
 
-        self.min_price_change_for_repeat = 0.05  # 5%
+        self.apply_config(config.get())
+
+    def apply_config(self, cfg):
+        self.cooldown = cfg["cooldown"]
+        self.min_price_change_for_repeat = cfg["min_price_change_for_repeat"]
+        self.price_reset_timeout = cfg["price_reset_timeout"]
+        self.cfg = cfg
+        self.history.set_fine_interval(cfg["resample_interval"])
+        if (self.vol.halflife, self.vol.interval) != (cfg["vol_halflife"], cfg["resample_interval"]):
+            self.vol.set_params(cfg["vol_halflife"], cfg["resample_interval"])
+        self.volume.set_baseline(cfg["volume_baseline"])
+
+    # prices/times - закриття та початки бакетів найтоншого рівня (одна ціна на resample_interval)
+    @property
+    def prices(self):
+        fine = self.history.fine
+        return fine.chrono(fine.c).tolist()
+
+    @property
+    def times(self):
+        fine = self.history.fine
+        return fine.chrono(fine.t).tolist()
 
-        self.price_reset_timeout = 3600  
 
+    def update_price(self, price, ts=None):
+        # ts - час події біржі (E), якщо кадр його містить; інакше локальний годинник
+        ts = self.clock.time() if ts is None else ts
+        self.last.add(ts, price)
+        self.history.add(ts, price)
+        self.vol.add(ts, price)
 
-    def update_price(self, price):
-        self.prices.append(price)
-        self.times.append(time.time())
-        self._cached_vwap = None
+    def update_book(self, bid, bid_qty, ask, ask_qty, ts=None):
+        ts = self.clock.time() if ts is None else ts
+        if bid is not None:
+            self.bid.add(ts, bid, bid_qty)
+        if ask is not None:
+            self.ask.add(ts, ask, ask_qty)
 
 
 
-    def update_volume(self, volume):
-        self.volumes.append(volume)
-        self._cached_volume_sum = None
+    def update_volume(self, volume, candle_time):
+        # volume - наростаючий підсумок свічки candle_time з пушу kline_1m
+        self.volume.update(candle_time, volume)
 
 
     def detect_events(self):
-        if len(self.prices) < 30:
+        if self.history.fine.count < 30:
             return
 
-        cur = self.prices[-1]
-        now = time.time()
+        cur = self.last.price
+        now = self.clock.time()
+        cfg = self.cfg
+
+        self.detect_volume_spike(cur)
 
 
         # -------- DEBUG lastPrice flow --------
         if now - self.last_debug_ts > 60:
-            logging.info(
-                f"[DEBUG] {self.symbol} lastPrice={cur} ticks={len(self.prices)}"
-                )
+            logging.debug("[DEBUG] %s lastPrice=%s ticks=%d", self.symbol, cur, self.last.count,
+                          extra={"symbol": self.symbol})
             self.last_debug_ts = now
                 
 
 
-        if now - self.last_event_ts < self.cooldown:
+        # Запит торкається лише найтоншого рівня історії, що покриває вікно
+        window_stats = self.history.extremes(cfg["window"], now)
+        if window_stats is None or window_stats[0] < 2:
             return
+        n, low, low_ts, high, high_ts, close_sum = window_stats
 
+        # Волатильність оновлюємо й під час cooldown: за нею шард знімає ескалацію підписок
+        volatility = (high - low) / low if low > 0 else 0
+        self.last_volatility = volatility
 
-        indices = [i for i, t in enumerate(self.times) if now - t <= 300]
-        if len(indices) < 2:
+        if now - self.last_event_ts < self.cooldown:
             return
-
-        first_idx = indices[0]
-        low = high = self.prices[first_idx]
-        low_idx = high_idx = first_idx
-
-        for i in indices:
-            price = self.prices[i]
-            if price < low:
-                low = price
-                low_idx = i
-            if price > high:
-                high = price
-                high_idx = i
-
-        volatility = (high - low) / low if low > 0 else 0
-        if volatility < 0.03:  
+        # До прогріву EWMA працюють фіксовані пороги
+        z_mode = cfg["threshold_mode"] == "zscore" and self.vol.ready
+        if volatility < (cfg["zscore_floor"] / 100 if z_mode else cfg["volatility_min"]):
             return
 
         delta_up = (cur - low) / low * 100
         delta_down = (cur - high) / high * 100
 
-        duration_up = now - self.times[low_idx]
-        duration_down = now - self.times[high_idx]
+        duration_up = now - low_ts
+        duration_down = now - high_ts
 
 
         speed_up = delta_up / duration_up if duration_up > 0 else 0
@@ -151,81 +270,198 @@ class MarketAnalyzer:
 
         # -------- DEBUG thresholds --------
         if now - self.last_debug_ts > 5:
-            logging.info(
-                f"[DEBUG] {self.symbol} Δup={delta_up:.2f}% v_up={speed_up:.4f} Δdown={delta_down:.2f}% v_down={speed_down:.4f}"
-                )
+            logging.debug("[DEBUG] %s Δup=%.2f%% v_up=%.4f Δdown=%.2f%% v_down=%.4f",
+                          self.symbol, delta_up, speed_up, delta_down, speed_down, extra={"symbol": self.symbol})
                 
 
-        if self.last_pump_time > 0 and now - self.last_pump_time > self.price_reset_timeout:
-            self.last_pump_price = None
-            self.last_pump_time = 0
-        
-        if self.last_dump_time > 0 and now - self.last_dump_time > self.price_reset_timeout:
-            self.last_dump_price = None
-            self.last_dump_time = 0
-
-        if delta_up >= 10 and delta_up <= 30 and duration_up >= 5 and duration_up <= 300:      
-            should_notify_pump = False
-            
-            if self.last_pump_price is None:
-                should_notify_pump = True
-            else:
- 
-                price_change_from_last = abs(cur - self.last_pump_price) / self.last_pump_price
-                if price_change_from_last >= self.min_price_change_for_repeat:
-                    should_notify_pump = True
-            
-            if should_notify_pump:
-                logging.warning(f"Pump detected on {self.symbol}: {delta_up:.2f}% за {duration_up:.1f}с (ціна: {cur})")
-                notify("PUMP", self.details(cur,f"{delta_up:.2f}"))
-                self.last_event_ts = now
-                self.last_pump_price = cur
-                self.last_pump_time = now
+        z_up = z_down = None
+        if z_mode:
+            z_up = self.vol.zscore(delta_up / 100, duration_up)
+            z_down = -self.vol.zscore(delta_down / 100, duration_down)
+            pump_hit = z_up >= cfg["pump_z"] and cfg["zscore_floor"] <= delta_up <= cfg["pump_max"]
+            dump_hit = z_down >= cfg["dump_z"] and cfg["zscore_floor"] <= -delta_down <= cfg["dump_max"]
+        else:
+            pump_hit = cfg["pump_min"] <= delta_up <= cfg["pump_max"]
+            dump_hit = cfg["dump_min"] <= -delta_down <= cfg["dump_max"]
+
+        if pump_hit and cfg["min_duration"] <= duration_up <= cfg["window"]:
+            if self.claim("PUMP", cur, now):
+                event, market = self._classify("PUMP", 1, delta_up, duration_up, z_mode)
+                if event:
+                    logging.warning("Pump detected on %s: %.2f%% за %.1fс (ціна: %s)", self.symbol, delta_up, duration_up, cur,
+                                    extra={"symbol": self.symbol, "event": event})
+                    self._emit(event, self.details(cur, f"{delta_up:.2f}", market=market, zscore=z_up))
                 return
 
 
 
-        if delta_down <= -15 and delta_down >= -50 and duration_down >= 5 and duration_down <= 300:
-            should_notify_dump = False
-            
-            if self.last_dump_price is None:
-
-                should_notify_dump = True
-            else:
-                price_change_from_last = abs(cur - self.last_dump_price) / self.last_dump_price
-                if price_change_from_last >= self.min_price_change_for_repeat:
-                    should_notify_dump = True
-            
-            if should_notify_dump:
-                logging.warning(f"Dump detected on {self.symbol}: {abs(delta_down):.2f}% за {duration_down:.1f}с (ціна: {cur})")
-                notify("DUMP", self.details(cur, f"{abs(delta_down):.2f}"))
-                self.last_event_ts = now
-                self.last_dump_price = cur
-                self.last_dump_time = now
+        if dump_hit and cfg["min_duration"] <= duration_down <= cfg["window"]:
+            if self.claim("DUMP", cur, now):
+                event, market = self._classify("DUMP", -1, delta_down, duration_down, z_mode)
+                if event:
+                    logging.warning("Dump detected on %s: %.2f%% за %.1fс (ціна: %s)", self.symbol, abs(delta_down), duration_down, cur,
+                                    extra={"symbol": self.symbol, "event": event})
+                    self._emit(event, self.details(cur, f"{abs(delta_down):.2f}", market=market, zscore=z_down))
                 return
 
 
-        vwap = sum(self.prices) / len(self.prices) if self.prices else cur
-        
-        funding = funding_cache.get(self.symbol) if self.symbol in funding_cache else None
+        vwap = close_sum / n
+        if cur > vwap * cfg["overpump_vwap"]:
+            self._overpump_candidate(cur, vwap, now)
 
+    # ---------------- OVERPUMP ---------------- #
 
-        if funding is not None and funding > 0.01 and cur > vwap * 1.03:
-            logging.warning(f"OVERPUMP detected on {self.symbol}")
-            notify("OVERPUMP — SHORT ZONE", self.details(cur, funding))
-            self.last_event_ts = now
+    def _overpump_candidate(self, cur, vwap, now):
+        # Ціна над VWAP - лише кандидат: рішення приймаємо на свіжому funding,
+        # а оновлення йде у фоні шарду, не блокуючи детектор
+        age = funding.age(self.sid, now)
+        if age is not None and age <= self.cfg["overpump_funding_age"]:
+            self._confirm_overpump(cur, vwap, now)
+            return
+        if self.request_funding and now - self.funding_requested >= self.cfg["overpump_funding_age"]:
+            self.funding_requested = now
+            self.request_funding(self)
+
+    def confirm_overpump(self):
+        """Called after the funding refresh; price and VWAP are re-read, they may have moved."""
+        now = self.clock.time()
+        cfg = self.cfg
+        if now - self.last_event_ts < self.cooldown:
+            return
+        age = funding.age(self.sid, now)
+        if age is None or age > cfg["overpump_funding_age"]:
+            return
+        window_stats = self.history.extremes(cfg["window"], now)
+        if window_stats is None or window_stats[0] < 2:
+            return
+        vwap = window_stats[5] / window_stats[0]
+        cur = self.last.price
+        if cur > vwap * cfg["overpump_vwap"]:
+            self._confirm_overpump(cur, vwap, now)
+
+    def _confirm_overpump(self, cur, vwap, now):
+        funding_rate = funding.get(self.sid)
+        if funding_rate is None or funding_rate <= self.cfg["overpump_funding"]:
+            return
+        if self.claim("OVERPUMP", cur, now):
+            logging.warning("OVERPUMP detected on %s: funding %s, %.2f%% over VWAP", self.symbol, funding_rate,
+                            (cur / vwap - 1) * 100, extra={"symbol": self.symbol, "event": "OVERPUMP"})
+            self._emit("OVERPUMP — SHORT ZONE", self.details(cur, f"{(cur / vwap - 1) * 100:.2f}", funding=funding_rate))
+
+    def detect_volume_spike(self, cur):
+        # Не частіше одного разу на свічку і незалежно від цінового cooldown
+        cfg = self.cfg
+        v = self.volume
+        if not cfg["volume_spike_ratio"] or v.candle == self.last_spike_candle:
+            return
+        if len(v.closed) < v.closed.maxlen // 2 or v.rvol < cfg["volume_spike_ratio"]:
+            return
+        self.last_spike_candle = v.candle
+        if not self.store.check_and_set(f"{self.symbol}:volume:{v.candle}", VOLUME_SPIKE_TTL, self.clock.time()):
+            return
+        logging.warning("Volume spike on %s: x%.1f of %.0f avg", self.symbol, v.rvol, v.baseline, extra={"symbol": self.symbol})
+        self._emit("VOLUME SPIKE", self.details(cur, None))
+
+    # ---------------- DEDUPE ---------------- #
+
+    def _dedupe_ttl(self):
+        return max(self.cooldown, self.price_reset_timeout)
+
+    def claim(self, event, price, now):
+        """
+        Atomic cooldown + repeat-price check against the shared store: of
+        all shards/processes watching the symbol, exactly one gets True.
+        PUMP/DUMP also remember their price; a repeat needs a move of
+        min_price_change_for_repeat until price_reset_timeout passes.
+        """
+        def decide(record):
+            record = dict(record or {})
+            if self._suppressed(price, now, record.get("ts", 0), record.get(event)):
+                return None
+            if event in ("PUMP", "DUMP"):
+                record[event] = [price, now]
+            record["ts"] = now
+            return record
+
+        # Спершу локальне дзеркало: поки символ тримається за порогом на тій самій ціні,
+        # повтор відсікається без транзакції в сховищі (для SQLite - синхронної, у циклі подій)
+        last = None
+        if event in ("PUMP", "DUMP"):
+            last_price = getattr(self, f"last_{event.lower()}_price")
+            if last_price is not None:
+                last = [last_price, getattr(self, f"last_{event.lower()}_time")]
+        if self._suppressed(price, now, self.last_event_ts, last):
+            return False
+
+        ok, record = self.store.update(self.symbol, decide, self._dedupe_ttl(), now)
+        self._mirror(record, now)
+        return ok
+
+    def _suppressed(self, price, now, last_ts, last):
+        # last - [ціна, час] попереднього алерту цього типу або None
+        if now - last_ts < self.cooldown:
+            return True
+        return bool(last and now - last[1] <= self.price_reset_timeout
+                    and abs(price - last[0]) / last[0] < self.min_price_change_for_repeat)
+
+    def _mirror(self, record, now):
+        record = record or {}
+        self.last_event_ts = record.get("ts", 0)
+        for event in ("PUMP", "DUMP"):
+            price, ts = record.get(event) or (None, 0)
+            if ts and now - ts > self.price_reset_timeout:
+                price, ts = None, 0
+            setattr(self, f"last_{event.lower()}_price", price)
+            setattr(self, f"last_{event.lower()}_time", ts)
+
+    def seed_store(self, now):
+        """Puts restored (snapshot) state into the store unless it already has newer."""
+        record = {"ts": self.last_event_ts}
+        if self.last_pump_price is not None:
+            record["PUMP"] = [self.last_pump_price, self.last_pump_time]
+        if self.last_dump_price is not None:
+            record["DUMP"] = [self.last_dump_price, self.last_dump_time]
+        latest = max(self.last_event_ts, self.last_pump_time, self.last_dump_time)
+        ttl = latest + self._dedupe_ttl() - now
+        if ttl > 0:
+            self.store.update(self.symbol, lambda old: record if old is None else None, ttl, now)
+
+    def _classify(self, event, direction, move, duration, z_mode):
+        # Рух разом з усім ринком: перейменовуємо в MARKET PUMP/DUMP або мовчимо.
+        # Стан (cooldown, остання ціна) оновлюється в будь-якому разі
+        threshold = None
+        if z_mode:
+            # Надлишок над ринком міряємо тим самим порогом, що й детекція: z-score
+            # у сигмах власної волатильності символу, але не нижче zscore_floor
+            cfg = self.cfg
+            z = cfg["pump_z"] if direction > 0 else -cfg["dump_z"]
+            threshold = max(cfg["zscore_floor"], abs(self.vol.move_for(z, duration)) * 100)
+        action, market = self.regime.classify(self.symbol, direction, move, threshold)
+        if action == "suppress":
+            return None, market
+        if action == "relabel":
+            return f"MARKET {event}", market
+        return event, market
+
+    def _emit(self, event, details):
+        # Аналізатор не знає про Telegram чи БД: лише публікує подію на шину
+        if self.on_event:
+            self.on_event(event, details)
+            return
+        bus.publish(Event(event, self.symbol, self.clock.time(), details))
 
-    def details(self, price, prcent,funding=None):
-        if self._cached_volume_sum is None:
-            self._cached_volume_sum = sum(self.volumes)
+    def details(self, price, prcent, funding=None, market=None, zscore=None):
         return {
             "symbol": self.symbol,
             "price": price,
-            "volume": self._cached_volume_sum,
+            "volume": self.volume.current,
+            "rvol": f"{self.volume.rvol:.1f}" if self.volume.baseline else None,
             "candles": self.candles,
             "orderbook": self.orderbook,
             "funding_rate": funding,
-            "percent": prcent
+            "percent": prcent,
+            "market": market,
+            "zscore": None if zscore is None else f"{zscore:.1f}",
         }
 
 
@@ -233,41 +469,128 @@ class MarketAnalyzer:
 # ---------------- WS ---------------- #
 
 class BingXWS:
-    def __init__(self, symbols, num_workers=3):
+    def __init__(self, symbols, num_workers=3, clock=None, store=None):
         self.symbols = symbols
-        self.analyzers = {s: MarketAnalyzer(s) for s in symbols}
+        self.clock = clock or default_clock
+        self.use_exchange_time = True
+        store = store if store is not None else MemoryStore()
+        self.ids = registry.register(symbols, ALL_CHANNELS)
+        self.analyzers = {s: MarketAnalyzer(s, self.clock, store) for s in symbols}
+        self.funding_queue = asyncio.Queue()  # кандидати OVERPUMP на позачергове оновлення funding
+        self._overpump_tasks = set()
+        for a in self.analyzers.values():
+            a.request_funding = self.funding_queue.put_nowait
+        # Стан шарду індексується id реєстру; слоти чужих символів порожні
+        size = max(self.ids) + 1
+        self.by_id = [None] * size
+        for a in self.analyzers.values():
+            self.by_id[a.sid] = a
+        self.last_detect = [float("-inf")] * size
+        self.pending = bytearray(size)
         self.detect_queue = asyncio.Queue(maxsize=len(symbols) * 2)
-        self.last_detect = {}
-        self.detect_interval = 0.5  # 500ms
-        self.pending_symbols = set()
         self._detect_tasks = []
+        self._conn_tasks = []
+        self._funding_task = None
         self.num_workers = num_workers
         self.perf_stats = {
             'total_processed': 0,
             'total_time': 0.0,
             'max_time': 0.0,
             'min_time': float('inf'),
-            'last_report_time': time.monotonic(),
+            'last_report_time': self.clock.monotonic(),
             'times': [],
             'lock': asyncio.Lock()  
         }
+        # Стан з'єднань шарду: основне + опційне гаряче резервне
+        self.conns = {}
+        self.health = {}
+        self.active = None
+        self.base_channels = None
+        self.escalated = {}  # symbol -> monotonic час, коли він востаннє був "гарячим"
+        self._req_id = 0
+        config.register(self)
+
+    def apply_config(self, cfg):
+        self.detect_interval = cfg["detect_interval"]
+        self.stall_timeout = cfg["stall_timeout"]
+        self.reconnect_base = cfg["reconnect_base"]
+        self.reconnect_max = cfg["reconnect_max"]
+        self.subscribe_rate = cfg["subscribe_rate"]
+        self.hot_standby = cfg["hot_standby"]
+        self.escalate = cfg["escalate"]
+        self.escalate_volatility = cfg["volatility_min"] * cfg["escalate_ratio"]
+        self.calm_timeout = cfg["calm_timeout"]
+
+        base = SUBSCRIPTION_PROFILES[cfg["subscription_profile"]]
+        old, self.base_channels = self.base_channels, base
+        if old is not None and old != base and any(self.conns.values()):
+            asyncio.get_running_loop().create_task(self._resync_profile(old, base))
+        for a in self.analyzers.values():
+            a.apply_config(cfg)
+
+    def channels_for(self, symbol):
+        channels = self.base_channels
+        if symbol in self.escalated:
+            channels = channels + tuple(ch for ch in ESCALATION_CHANNELS if ch not in channels)
+        return channels
+
+    async def _send_requests(self, ws, req_type, data_types):
+        # Кадри шлемо пачками по 10 з паузою, щоб вкластися в subscribe_rate
+        burst = 10
+        pause = burst / self.subscribe_rate
+        for n, ch in enumerate(data_types, 1):
+            self._req_id += 1
+            await ws.send(json.dumps({
+                "id": str(self._req_id),
+                "reqType": req_type,
+                "dataType": ch
+            }))
+            if n % burst == 0:
+                await asyncio.sleep(pause)
+
+    async def _send_all(self, req_type, data_types):
+        for ws in list(self.conns.values()):
+            if ws is None:
+                continue
+            try:
+                await self._send_requests(ws, req_type, data_types)
+            except Exception as e:
+                logging.debug("Failed to %s %s: %s", req_type, data_types, e, extra={"shard": self.symbols[0]})
 
     async def subscribe(self, ws):
-        logging.info(f"WebSocket connected for symbols: {self.symbols}")
-        i = 1
-        for s in self.symbols:
-            for ch in (
-                f"{s}@lastPrice",
-                f"{s}@kline_1m",
-                f"{s}@depth5@500ms",
-                f"{s}@bookTicker"
-            ):
-                await ws.send(json.dumps({
-                    "id": str(i),
-                    "reqType": "sub",
-                    "dataType": ch
-                }))
-                i += 1
+        logging.info("WebSocket connected for symbols: %s", self.symbols, extra={"shard": self.symbols[0]})
+        await self._send_requests(ws, "sub", [
+            f"{s}@{ch}" for s in self.symbols for ch in self.channels_for(s)
+        ])
+        startup.mark("first_subscription")
+
+    async def _resync_profile(self, old, new):
+        unsub = [f"{s}@{ch}" for s in self.symbols for ch in old if ch not in new and ch not in self.channels_for(s)]
+        sub = [f"{s}@{ch}" for s in self.symbols for ch in new if ch not in old]
+        await self._send_all("unsub", unsub)
+        await self._send_all("sub", sub)
+
+    async def _update_escalation(self, symbol):
+        if not self.escalate:
+            return
+        a = self.analyzers[symbol]
+        now = self.clock.monotonic()
+        extra = [ch for ch in ESCALATION_CHANNELS if ch not in self.base_channels]
+        if not extra:
+            return
+
+        if a.last_volatility >= self.escalate_volatility:
+            if symbol not in self.escalated:
+                logging.info("[SUB] Escalating %s: volatility %.4f", symbol, a.last_volatility, extra={"symbol": symbol})
+                self.escalated[symbol] = now
+                await self._send_all("sub", [f"{symbol}@{ch}" for ch in extra])
+            else:
+                self.escalated[symbol] = now
+        elif symbol in self.escalated and now - self.escalated[symbol] > self.calm_timeout:
+            logging.info("[SUB] %s calmed down, dropping %s", symbol, extra, extra={"symbol": symbol})
+            del self.escalated[symbol]
+            a.orderbook = None
+            await self._send_all("unsub", [f"{symbol}@{ch}" for ch in extra])
 
 
     async def process_message(self, message):
@@ -275,7 +598,7 @@ class BingXWS:
             raw = gzip.decompress(message).decode()
             #logging.info(f"Raw message: {raw}")  
         except Exception as e:
-            logging.error(f"Decompression error: {e}")
+            logging.error("Decompression error: %s", e, extra={"shard": self.symbols[0]})
             return
 
         if raw == "Ping":
@@ -284,7 +607,7 @@ class BingXWS:
         try:
             msg = json.loads(raw)
         except json.JSONDecodeError as e:
-            logging.error(f"JSON decode error: {e}")
+            logging.error("JSON decode error: %s", e, extra={"shard": self.symbols[0]})
             return None
 
         data = msg.get("data")
@@ -300,44 +623,48 @@ class BingXWS:
 
         return None  
 
-    def handle_data(self, d, dataType="", symbol_from_msg=None):
-        symbol = d.get("s") or symbol_from_msg
-        
-        if not symbol and dataType:
-            # dataType має формат "SYMBOL@channel", наприклад "WIF-USDT@lastPrice"
-            parts = dataType.split("@")
-            if parts:
-                symbol = parts[0]
-        
-        if not symbol or symbol not in self.analyzers:
+    def _queue_detect(self, sid):
+        if self.pending[sid] or self.clock.monotonic() - self.last_detect[sid] < self.detect_interval:
             return
+        try:
+            self.detect_queue.put_nowait(sid)
+            self.pending[sid] = 1
+        except asyncio.QueueFull:
+            pass
 
-        a = self.analyzers[symbol]
-
-        def _queue_symbol_if_needed(sym):
-            now = time.monotonic()
-            if sym in self.last_detect and now - self.last_detect[sym] < self.detect_interval:
-                return
-            if sym in self.pending_symbols:
+    def handle_data(self, d, dataType="", symbol_from_msg=None):
+        # dataType ("WIF-USDT@lastPrice") -> (id, канал) одним пошуком; "s" - для кадрів без нього
+        route = registry.routes.get(dataType)
+        if route is not None:
+            sid = route[0]
+        else:
+            sid = registry.ids.get(d.get("s") or symbol_from_msg)
+            if sid is None:
                 return
-            try:
-                self.detect_queue.put_nowait(sym)
-                self.pending_symbols.add(sym)
-            except asyncio.QueueFull:
-                pass  
+        a = self.by_id[sid] if sid < len(self.by_id) else None
+        if a is None:
+            return
+        symbol = a.symbol
+
+        sink = storage.sink
+        ring = tickbus.ring
+        # Час події біржі в мс (lastPrice, bookTicker); kline його не має
+        event_ts = d["E"] / 1000 if self.use_exchange_time and "E" in d else None
 
         # Обробка @lastPrice: має поле "c" (latest transaction price)
         if "c" in d and "e" in d and d.get("e") == "lastPriceUpdate":
-            a.update_price(float(d["c"]))
-            _queue_symbol_if_needed(symbol)
+            a.update_price(float(d["c"]), event_ts)
+            if sink:
+                sink.record_tick(symbol, "last", a.last.ts, a.last.price)
+            if ring:
+                ring.publish(sid, tickbus.LAST, a.last.ts, a.last.price)
+            self._queue_detect(sid)
 
         # Обробка @kline_1m: має поля c, o, h, l, v, T
         if "v" in d and "T" in d:
-            # Це kline дані
-            if "c" in d:
-                a.update_price(float(d["c"]))
-            if "v" in d:
-                a.update_volume(float(d["v"]))
+            # Це kline дані. Ціни угод беремо лише з lastPrice (час біржі E):
+            # закриття свічки без E зі своїм годинником зламало б порядок історії
+            a.update_volume(float(d["v"]), d["T"])
             
             new_candle = {
                 "time": d.get("T", 0),
@@ -352,17 +679,30 @@ class BingXWS:
                 a.candles[-1] = new_candle
             else:
                 a.candles.append(new_candle)
+            if sink:
+                sink.record_candle(symbol, new_candle)
+            if ring:
+                # ts - початок свічки, qty - наростаючий обсяг
+                ring.publish(sid, tickbus.KLINE, new_candle["time"] / 1000, new_candle["close"], new_candle["volume"])
             
-            _queue_symbol_if_needed(symbol)
+            self._queue_detect(sid)
 
         # Обробка @bookTicker: має поля b, B, a, A
-        # Використовуємо best ask price (a) або best bid price (b) як ціну
+        # Котирування йдуть в окремі серії bid/ask і не змішуються з ціною угод
         if "e" in d and d.get("e") == "bookTicker":
-            if "a" in d:
-                a.update_price(float(d["a"]))
-            elif "b" in d:
-                a.update_price(float(d["b"]))
-            _queue_symbol_if_needed(symbol)
+            bid = float(d["b"]) if "b" in d else None
+            ask = float(d["a"]) if "a" in d else None
+            a.update_book(bid, float(d.get("B", 0)), ask, float(d.get("A", 0)), event_ts)
+            if sink:
+                if bid is not None:
+                    sink.record_tick(symbol, "bid", a.bid.ts, bid, a.bid.qty)
+                if ask is not None:
+                    sink.record_tick(symbol, "ask", a.ask.ts, ask, a.ask.qty)
+            if ring:
+                if bid is not None:
+                    ring.publish(sid, tickbus.BID, a.bid.ts, bid, a.bid.qty)
+                if ask is not None:
+                    ring.publish(sid, tickbus.ASK, a.ask.ts, ask, a.ask.qty)
 
         # Обробка @depth5@500ms: має поля bids та asks
         if "bids" in d and "asks" in d:
@@ -372,47 +712,64 @@ class BingXWS:
     async def _funding_rate_updater(self):
         while True:
             try:
-                now = time.time()
+                now = self.clock.time()
                 symbols_to_update = [
-                    s for s in self.symbols 
-                    if s not in funding_cache or now - funding_ts.get(s, 0) >= 60
+                    a.symbol for a in self.analyzers.values()
+                    if not funding.is_fresh(a.sid, now, 60)
                 ]
                 
 
                 for i in range(0, len(symbols_to_update), 10):
                     batch = symbols_to_update[i:i+10]
-                    tasks = [get_funding_rate_async(s) for s in batch]
+                    tasks = [get_funding_rate_async(s, self.clock) for s in batch]
                     await asyncio.gather(*tasks, return_exceptions=True)
                 
                 await asyncio.sleep(30)
             except Exception as e:
-                logging.error(f"Error in funding_rate_updater: {e}")
+                logging.error("Error in funding_rate_updater: %s", e, extra={"shard": self.symbols[0]})
                 await asyncio.sleep(5)
     
+    async def _overpump_worker(self):
+        # Кожен кандидат - окрема задача: повільний запит не затримує інші символи.
+        # Задачі живуть на шарді, щоб зупинка шарду скасувала й незавершені перевірки
+        while True:
+            a = await self.funding_queue.get()
+            task = asyncio.create_task(self._refresh_and_confirm(a))
+            self._overpump_tasks.add(task)
+            task.add_done_callback(self._overpump_tasks.discard)
+
+    async def _refresh_and_confirm(self, a):
+        try:
+            await get_funding_rate_async(a.symbol, self.clock, a.cfg["overpump_funding_age"])
+            a.confirm_overpump()
+        except Exception as e:
+            logging.error("OVERPUMP confirmation failed for %s: %s", a.symbol, e, extra={"symbol": a.symbol})
+
     async def _detect_events_worker(self, worker_id):
         while True:
             try:
-                symbol = await asyncio.wait_for(self.detect_queue.get(), timeout=1.0)
+                sid = await asyncio.wait_for(self.detect_queue.get(), timeout=1.0)
                 
-                self.pending_symbols.discard(symbol)
+                self.pending[sid] = 0
                 
-                now = time.monotonic()
-                if symbol in self.last_detect and now - self.last_detect[symbol] < self.detect_interval:
+                now = self.clock.monotonic()
+                if now - self.last_detect[sid] < self.detect_interval:
                     continue
                 
-                self.last_detect[symbol] = now
-                
-                if symbol in self.analyzers:
-                    start_time = time.perf_counter()
-                    self.analyzers[symbol].detect_events()
-                    elapsed = time.perf_counter() - start_time
+                self.last_detect[sid] = now
                 
-                    await self._update_perf_stats(elapsed)
+                a = self.by_id[sid]
+                start_time = time.perf_counter()
+                a.detect_events()
+                elapsed = time.perf_counter() - start_time
+            
+                await self._update_perf_stats(elapsed)
+                await self._update_escalation(a.symbol)
                     
             except asyncio.TimeoutError:
                 continue
             except Exception as e:
-                logging.error(f"Error in detect_events_worker {worker_id}: {e} ")
+                logging.error("Error in detect_events_worker %d: %s", worker_id, e, extra={"shard": self.symbols[0]})
     
     async def _update_perf_stats(self, elapsed_time):
         async with self.perf_stats['lock']:
@@ -426,7 +783,7 @@ class BingXWS:
             if len(stats['times']) > 100:
                 stats['times'].pop(0)
             
-            now = time.monotonic()
+            now = self.clock.monotonic()
             if now - stats['last_report_time'] >= 10.0:
                 await self._log_perf_stats()
                 stats['last_report_time'] = now
@@ -450,17 +807,13 @@ class BingXWS:
         rate = stats['total_processed'] / 10.0  
         
         queue_size = self.detect_queue.qsize()
-        pending_count = len(self.pending_symbols)
+        pending_count = self.pending.count(1)
         
         logging.info(
-            f"[PERF] Processed: {stats['total_processed']} symbols | "
-            f"Rate: {rate:.1f} sym/s | "
-            f"Avg: {avg_time_ms:.3f}ms | "
-            f"Median: {median_ms:.3f}ms | "
-            f"Min: {min_time_ms:.3f}ms | "
-            f"Max: {max_time_ms:.3f}ms | "
-            f"Queue: {queue_size} | "
-            f"Pending: {pending_count}"
+            "[PERF] Processed: %d symbols | Rate: %.1f sym/s | Avg: %.3fms | Median: %.3fms | "
+            "Min: %.3fms | Max: %.3fms | Queue: %d | Pending: %d",
+            stats['total_processed'], rate, avg_time_ms, median_ms, min_time_ms, max_time_ms,
+            queue_size, pending_count, extra={"shard": self.symbols[0]}
         )
         
         stats['total_processed'] = 0
@@ -468,38 +821,120 @@ class BingXWS:
         stats['max_time'] = 0.0
         stats['min_time'] = float('inf')
 
+    # ---------------- CONNECTION SUPERVISOR ---------------- #
+
+    def _backoff_delay(self, attempt):
+        # Експоненційна затримка з jitter, щоб шарди не перепідключались хором
+        cap = min(self.reconnect_max, self.reconnect_base * (2 ** attempt))
+        return cap * random.uniform(0.5, 1.0)
+
+    def _is_fresh(self, role):
+        h = self.health.get(role)
+        return bool(h and h["connected"] and self.clock.monotonic() - h["last_msg"] < self.stall_timeout)
+
+    def _failover(self, from_role):
+        if self.active != from_role:
+            return
+        for role in self.conns:
+            if role != from_role and self._is_fresh(role):
+                logging.warning("[WS] Failover %s -> %s for shard %s..", from_role, role, self.symbols[0],
+                                extra={"shard": self.symbols[0], "role": role})
+                self.active = role
+                return
+
+    def last_message_age(self):
+        h = self.health.get(self.active)
+        if not h or not h["connected"]:
+            return None
+        return self.clock.monotonic() - h["last_msg"]
+
+    async def _run_connection(self, role):
+        attempt = 0
+        h = self.health[role] = {"connected": False, "last_msg": 0.0, "reconnects": 0, "stalls": 0}
+        while True:
+            connected_at = None
+            try:
+                async with websockets.connect(URL) as ws:
+                    self.conns[role] = ws
+                    h["connected"] = True
+                    h["last_msg"] = connected_at = self.clock.monotonic()
+                    if self.active is None or not self._is_fresh(self.active):
+                        self.active = role
+                    await self.subscribe(ws)
+                    async for message in ws:
+                        h["last_msg"] = self.clock.monotonic()
+                        if role == self.active:
+                            response = await self.process_message(message)
+                        else:
+                            # Резерв лише тримає підписки живими: відповідаємо на Ping
+                            response = "Pong" if gzip.decompress(message) == b"Ping" else None
+                        if response:
+                            await ws.send(response)
+            except websockets.exceptions.ConnectionClosed as e:
+                logging.info("Connection closed (%s): %s", role, e, extra={"shard": self.symbols[0], "role": role})
+            except Exception as e:
+                logging.error("Unexpected error (%s): %s", role, e, extra={"shard": self.symbols[0], "role": role})
+            finally:
+                h["connected"] = False
+                self.conns[role] = None
+                self._failover(role)
+
+            # Скидаємо backoff лише після з'єднання, що протрималось stall_timeout:
+            # сокет, який рветься одразу після підписки, має чекати все довше
+            if connected_at is not None and self.clock.monotonic() - connected_at >= self.stall_timeout:
+                attempt = 0
+            delay = self._backoff_delay(attempt)
+            attempt += 1
+            h["reconnects"] += 1
+            logging.info("Reconnecting %s in %.1f seconds...", role, delay, extra={"shard": self.symbols[0], "role": role})
+            await self.clock.sleep(delay)
+
+    async def _watchdog(self):
+        while True:
+            await self.clock.sleep(1)
+            now = self.clock.monotonic()
+            for role, ws in list(self.conns.items()):
+                h = self.health[role]
+                if ws is None or now - h["last_msg"] < self.stall_timeout:
+                    continue
+                logging.warning("[WS] %s stalled for %.0fs, reconnecting", role, now - h["last_msg"],
+                                extra={"shard": self.symbols[0], "role": role})
+                h["stalls"] += 1
+                self._failover(role)
+                # Напіввідкритий сокет не завершить close-handshake, тож рвемо транспорт
+                ws.transport.abort()
+
     async def start(self):
         self._detect_tasks = [
             asyncio.create_task(self._detect_events_worker(i))
             for i in range(self.num_workers)
         ]
+        self._detect_tasks.append(asyncio.create_task(self._overpump_worker()))
         
         self._funding_task = asyncio.create_task(self._funding_rate_updater())
-        
+
+        roles = ["primary", "standby"] if self.hot_standby else ["primary"]
+        self._conn_tasks = [asyncio.create_task(self._run_connection(role)) for role in roles]
+        self._conn_tasks.append(asyncio.create_task(self._watchdog()))
+
         try:
-            while True:
-                try:
-                    async with websockets.connect(URL) as ws:
-                        await self.subscribe(ws)
-                        async for message in ws:
-                            response = await self.process_message(message)
-                            if response:
-                                await ws.send(response)
-                except websockets.exceptions.ConnectionClosed as e:
-                    logging.info(f"Connection closed: {e}")
-                except Exception as e:
-                    logging.error(f"Unexpected error: {e}")
-                logging.info("Reconnecting in 5 seconds...")
-                await asyncio.sleep(5)
+            await asyncio.gather(*self._conn_tasks)
         finally:
-            for task in self._detect_tasks:
-                task.cancel()
-            if self._funding_task:
-                self._funding_task.cancel()
-            
-            await asyncio.gather(*self._detect_tasks, return_exceptions=True)
-            if self._funding_task:
-                try:
-                    await self._funding_task
-                except asyncio.CancelledError:
-                    pass
\ No newline at end of file
+            await self.stop()
+
+    async def stop(self):
+        # Разом із воркерами скасовуємо й перевірки OVERPUMP, що ще чекають funding:
+        # після зупинки шарду вони не мають емітити подій
+        overpump = list(self._overpump_tasks)
+        tasks = self._detect_tasks + self._conn_tasks + overpump
+        for task in tasks:
+            task.cancel()
+        if self._funding_task:
+            self._funding_task.cancel()
+        
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._funding_task:
+            try:
+                await self._funding_task
+            except asyncio.CancelledError:
+                pass
\ No newline at end of file
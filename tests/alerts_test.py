@@ -0,0 +1,66 @@
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alerts import AlertAggregator, MEDIA_GROUP_MAX, CAPTION_LIMIT, _fit_caption
+
+
+class StubBot:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.sent = []
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        await asyncio.sleep(self.delay)
+        self.sent.append(text)
+
+
+def make_aggregator(bot):
+    agg = AlertAggregator(bot, lambda: [1], lambda event, details: event)
+    agg.window = 0.05
+    return agg
+
+
+def test_alert_submitted_during_send_is_flushed():
+    async def scenario():
+        bot = StubBot(delay=0.2)
+        agg = make_aggregator(bot)
+        agg.submit("A")
+        await asyncio.sleep(0.1)  # A вже відправляється
+        agg.submit("B")
+        await asyncio.sleep(0.6)
+        return bot.sent, agg.backlog
+
+    sent, backlog = asyncio.run(scenario())
+    assert sent == ["A", "B"] and backlog == 0
+
+
+def test_digest_renders_only_charts_it_sends():
+    rendered = []
+
+    async def scenario():
+        agg = make_aggregator(StubBot())
+        agg.digest_threshold = 5
+
+        async def fake_render(alert):
+            rendered.append(alert["details"]["percent"])
+            return None
+
+        agg._render_chart = fake_render
+        for i in range(30):
+            agg.submit("PUMP", {"symbol": f"S{i}-USDT", "percent": f"{i}.00", "candles": [{"time": 0}]})
+        await asyncio.sleep(0.2)
+
+    asyncio.run(scenario())
+    assert len(rendered) == MEDIA_GROUP_MAX
+    assert sorted(float(p) for p in rendered) == list(range(30 - MEDIA_GROUP_MAX, 30))
+
+
+def test_long_caption_is_cut_on_line_boundaries():
+    caption = "\n".join(f"<b>Line {i}:</b> <code>{'x' * 40}</code>" for i in range(60))
+    short = _fit_caption(caption)
+
+    assert len(short) <= CAPTION_LIMIT
+    assert short.endswith("</code>") and short.count("<b>") == short.count("</b>")
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage
+from backtest import run_backtest, parse_grid, main
+
+T0 = 1_700_000_000.0
+
+
+def make_fixture(path):
+    # 2 хв рівно, +15% за 10 с, далі повільне зростання на горизонт forward returns
+    prices = [1.0] * 120 + [1.0 + 0.015 * (i + 1) for i in range(10)] + [1.15 + 0.00001 * i for i in range(600)]
+    conn = storage.connect(path)
+    with conn:
+        conn.executemany(storage.INSERT_SQL[storage.TICK],
+                         [("PUMP-USDT", "last", T0 + i, p, None) for i, p in enumerate(prices)])
+    conn.close()
+    return T0, T0 + len(prices)
+
+
+def test_replay_finds_known_pump(tmp_path):
+    path = str(tmp_path / "market.db")
+    start, end = make_fixture(path)
+
+    (params, summary, alerts), = run_backtest(path, ["PUMP-USDT"], start, end, [{}], workers=1)
+
+    assert summary["alerts"] == 1 and summary["by_event"] == {"PUMP": 1}
+    assert alerts[0]["ts"] == pytest.approx(T0 + 126, abs=2)
+    assert summary["hit_rate"] == 1.0 and summary["mean_fwd"][300] > 0
+
+
+def test_parse_grid():
+    assert parse_grid(["pump_min=8,10", "cooldown=60"]) == [
+        {"pump_min": "8", "cooldown": "60"}, {"pump_min": "10", "cooldown": "60"}
+    ]
+    assert parse_grid([]) == [{}]
+
+
+def test_bad_sweep_is_a_usage_error(capsys):
+    with pytest.raises(SystemExit) as exc:
+        main(["--source", "rest", "--symbols", "WIF-USDT", "--sweep", "pump_min"])
+    assert exc.value.code == 2
+    assert "Expected key=v1,v2, got 'pump_min'" in capsys.readouterr().err
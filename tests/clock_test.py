@@ -0,0 +1,94 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clock import VirtualClock
+from test import BingXWS
+
+
+def test_pump_with_virtual_clock(make_analyzer):
+    clock = VirtualClock(1_700_000_000)
+    a, events = make_analyzer(clock)
+
+    for _ in range(30):
+        a.update_price(1.0)
+        clock.advance(1)
+    a.update_price(1.15)
+    a.detect_events()
+
+    assert [e for e, _ in events] == ["PUMP"]
+    assert events[0][1]["percent"] == "15.00"
+
+
+def test_cooldown_follows_virtual_time(make_analyzer):
+    clock = VirtualClock(1_700_000_000)
+    a, events = make_analyzer(clock)
+
+    for _ in range(30):
+        a.update_price(1.0)
+        clock.advance(1)
+    a.update_price(1.15)
+    a.detect_events()
+
+    # Повторний памп вище на 10%: в межах cooldown мовчимо, після - сповіщаємо
+    clock.advance(10)
+    a.update_price(1.27)
+    a.detect_events()
+    assert len(events) == 1
+
+    clock.advance(a.cooldown)
+    a.update_price(1.27)
+    a.detect_events()
+    assert len(events) == 2
+
+
+def test_exchange_event_time_is_used():
+    clock = VirtualClock(1_700_000_100)
+    ws = BingXWS(["WIF-USDT"], clock=clock)
+    ws.handle_data({"e": "lastPriceUpdate", "E": 1_700_000_000_500, "s": "WIF-USDT", "c": "0.33"})
+
+    a = ws.analyzers["WIF-USDT"]
+    assert a.last.ts == 1_700_000_000.5
+    assert a.times[-1] == 1_700_000_000.0  # початок 1s бакета
+    assert a.prices[-1] == 0.33
+
+
+def test_detect_throttle_uses_clock():
+    clock = VirtualClock(0)
+    ws = BingXWS(["WIF-USDT"], clock=clock)
+    ws.last_detect[ws.analyzers["WIF-USDT"].sid] = clock.monotonic()
+
+    ws.handle_data({"e": "lastPriceUpdate", "E": 1, "s": "WIF-USDT", "c": "0.33"})
+    assert ws.detect_queue.qsize() == 0
+
+    clock.advance(ws.detect_interval)
+    ws.handle_data({"e": "lastPriceUpdate", "E": 2, "s": "WIF-USDT", "c": "0.34"})
+    assert ws.detect_queue.qsize() == 1
+
+
+def test_book_ticker_does_not_feed_trade_prices():
+    clock = VirtualClock(1_700_000_000)
+    ws = BingXWS(["WIF-USDT"], clock=clock)
+    ws.handle_data({"e": "lastPriceUpdate", "E": 1_700_000_000_000, "s": "WIF-USDT", "c": "0.33"})
+    ws.handle_data({"e": "bookTicker", "E": 1_700_000_000_200, "s": "WIF-USDT",
+                    "b": "0.32", "B": "10", "a": "0.34", "A": "20"})
+
+    a = ws.analyzers["WIF-USDT"]
+    assert list(a.prices) == [0.33]
+    assert (a.bid.price, a.ask.price, a.ask.qty) == (0.32, 0.34, 20.0)
+
+
+def test_frames_are_routed_by_data_type():
+    clock = VirtualClock(1_700_000_000)
+    ws = BingXWS(["WIF-USDT", "PEPE-USDT"], clock=clock)
+    sid = ws.analyzers["PEPE-USDT"].sid
+
+    # kline-кадр не має поля "s": символ відомий лише з dataType
+    ws.handle_data({"c": "0.0002", "o": "0.0001", "h": "0.0002", "l": "0.0001", "v": "100", "T": 60_000},
+                   "PEPE-USDT@kline_1m")
+    ws.handle_data({"e": "lastPriceUpdate", "s": "UNKNOWN-USDT", "c": "1"}, "UNKNOWN-USDT@lastPrice")
+
+    assert ws.analyzers["PEPE-USDT"].candles[-1]["close"] == 0.0002
+    assert ws.pending[sid] == 1 and ws.detect_queue.get_nowait() == sid
+    assert ws.analyzers["WIF-USDT"].last.count == 0
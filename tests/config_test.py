@@ -0,0 +1,95 @@
+import os
+import sys
+import json
+import weakref
+import asyncio
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+
+@pytest.fixture(autouse=True)
+def isolated_config(monkeypatch):
+    # Кожен тест міняє власну копію стану модуля; глобальний конфіг інших тестів не зачіпаємо
+    monkeypatch.setattr(config, "_current", dict(config.DEFAULTS))
+    monkeypatch.setattr(config, "_targets", weakref.WeakSet())
+    monkeypatch.setattr(config, "_listeners", [])
+    monkeypatch.setattr(config, "_file_mtime", None)
+
+
+class Target:
+    def __init__(self):
+        self.applied = []
+
+    def apply_config(self, cfg):
+        self.applied.append(cfg["cooldown"])
+
+
+def test_validate_rejects_bad_values():
+    with pytest.raises(ValueError, match="cannot convert 'soon' to float"):
+        config.validate({"cooldown": "soon"})
+    with pytest.raises(ValueError, match=r"out of range \(0..86400 seconds\)"):
+        config.validate({"cooldown": "-1"})
+    with pytest.raises(ValueError, match="pump_min .* must not exceed pump_max"):
+        config.validate({"pump_min": "40"})
+    with pytest.raises(ValueError, match="Unknown config key: cooldwon"):
+        config.validate({"cooldwon": "60"})
+    assert config.validate({"cooldown": "60", "hot_standby": "on"})["hot_standby"] is True
+
+
+def test_failed_update_changes_nothing():
+    target = Target()
+    config.register(target)
+    with pytest.raises(ValueError):
+        config.update({"cooldown": "60", "detect_interval": "0"})
+    assert config.get()["cooldown"] == config.DEFAULTS["cooldown"]
+    assert target.applied == [config.DEFAULTS["cooldown"]]
+
+
+def test_update_applies_and_reports_diff():
+    target = Target()
+    config.register(target)
+    calls = []
+    config.add_listener(lambda old, new, changed: calls.append((old["cooldown"], new["cooldown"], changed)))
+
+    changed = config.update({"cooldown": "60", "detect_interval": str(config.DEFAULTS["detect_interval"])})
+
+    assert changed == {"cooldown"}
+    assert calls == [(config.DEFAULTS["cooldown"], 60.0, {"cooldown"})]
+    assert target.applied[-1] == 60.0
+    assert config.update({"cooldown": 60}) == set() and len(calls) == 1
+
+
+def test_parse_assignments():
+    assert config.parse_assignments(["cooldown = 60", "regime_action=off"]) == {"cooldown": "60", "regime_action": "off"}
+    with pytest.raises(ValueError, match="Expected key=value"):
+        config.parse_assignments(["cooldown"])
+
+
+def test_config_file_change_is_reloaded(tmp_path):
+    path = str(tmp_path / "config.json")
+    with open(path, "w") as f:
+        json.dump({"cooldown": 60}, f)
+
+    def rewrite(data, mtime):
+        with open(path, "w") as f:
+            f.write(data)
+        os.utime(path, (mtime, mtime))
+
+    async def scenario():
+        task = asyncio.create_task(config.watch_config(path, interval=0.01))
+        await asyncio.sleep(0.05)
+        loaded = config.get()["cooldown"]
+        rewrite(json.dumps({"cooldown": 90}), 1_700_000_000)
+        await asyncio.sleep(0.05)
+        reloaded = config.get()["cooldown"]
+        rewrite(json.dumps({"cooldown": -5}), 1_700_000_100)  # невалідний файл не застосовується
+        await asyncio.sleep(0.05)
+        task.cancel()
+        return loaded, reloaded
+
+    assert asyncio.run(scenario()) == (60.0, 90.0)
+    assert config.get()["cooldown"] == 90.0
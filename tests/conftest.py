@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from test import MarketAnalyzer
+
+
+@pytest.fixture
+def make_analyzer():
+    """Factory: make_analyzer(clock) -> (analyzer, events), events collected as (event, details)."""
+    def make(clock, symbol="TEST-USDT"):
+        events = []
+        a = MarketAnalyzer(symbol, clock)
+        a.on_event = lambda event, details: events.append((event, details))
+        return a, events
+    return make
@@ -0,0 +1,141 @@
+import os
+import sys
+import random
+import asyncio
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import test
+from clock import VirtualClock
+from test import BingXWS
+
+
+class RecordingClock(VirtualClock):
+    def __init__(self, start=0.0):
+        super().__init__(start)
+        self.sleeps = []
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        await super().sleep(seconds)
+
+
+class FakeTransport:
+    def __init__(self):
+        self.aborted = 0
+
+    def abort(self):
+        self.aborted += 1
+
+
+class FakeSocket:
+    """З'єднання, що живе `lifetime` секунд віртуального часу і закривається без даних."""
+
+    def __init__(self, clock, lifetime=0.0):
+        self.clock = clock
+        self.lifetime = lifetime
+        self.sent = []
+        self.transport = FakeTransport()
+
+    async def send(self, frame):
+        self.sent.append(frame)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        self.clock.advance(self.lifetime)
+        raise StopAsyncIteration
+
+
+def make_shard(clock):
+    ws = BingXWS(["TEST-USDT"], clock=clock)
+    ws.reconnect_base, ws.reconnect_max, ws.stall_timeout = 0.5, 60.0, 30.0
+    return ws
+
+
+def run_connections(monkeypatch, clock, lifetimes):
+    lifetimes = list(lifetimes)
+
+    def connect(url):
+        if not lifetimes:
+            raise asyncio.CancelledError
+        return FakeSocket(clock, lifetimes.pop(0))
+
+    monkeypatch.setattr(test.websockets, "connect", connect)
+    monkeypatch.setattr(test.random, "uniform", lambda lo, hi: hi)
+    ws = make_shard(clock)
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(ws._run_connection("primary"))
+    return ws
+
+
+def test_backoff_grows_with_jitter_and_cap():
+    ws = make_shard(VirtualClock())
+    random.seed(1)
+    for attempt in range(10):
+        cap = min(60.0, 0.5 * 2 ** attempt)
+        assert cap * 0.5 <= ws._backoff_delay(attempt) <= cap
+    assert ws._backoff_delay(20) <= 60.0
+
+
+def test_flapping_connection_keeps_backing_off(monkeypatch):
+    clock = RecordingClock()
+    ws = run_connections(monkeypatch, clock, [0, 0, 0, 0])
+
+    assert clock.sleeps == [0.5, 1.0, 2.0, 4.0]
+    assert ws.health["primary"]["reconnects"] == 4 and not ws.health["primary"]["connected"]
+
+
+def test_backoff_resets_after_stable_connection(monkeypatch):
+    clock = RecordingClock()
+    run_connections(monkeypatch, clock, [0, 0, 0, 45, 0])
+
+    assert clock.sleeps == [0.5, 1.0, 2.0, 0.5, 1.0]
+
+
+def test_watchdog_aborts_stalled_connection():
+    clock = VirtualClock()
+    ws = make_shard(clock)
+    sock = FakeSocket(clock)
+    ws.conns["primary"] = sock
+    ws.health["primary"] = {"connected": True, "last_msg": 0.0, "reconnects": 0, "stalls": 0}
+    ws.active = "primary"
+
+    async def scenario():
+        task = asyncio.create_task(ws._watchdog())
+        while not sock.transport.aborted:
+            await asyncio.sleep(0)
+        task.cancel()
+
+    asyncio.run(scenario())
+    assert ws.stall_timeout <= clock.now <= ws.stall_timeout + 1
+    assert ws.health["primary"]["stalls"] == 1 and ws.active == "primary"
+
+
+def test_failover_promotes_only_fresh_standby():
+    clock = VirtualClock(100)
+    ws = make_shard(clock)
+    ws.conns = {"primary": None, "standby": object()}
+    ws.health = {
+        "primary": {"connected": False, "last_msg": 50.0},
+        "standby": {"connected": True, "last_msg": 60.0},
+    }
+    ws.active = "primary"
+
+    ws._failover("primary")
+    assert ws.active == "primary"  # резерв теж мовчить довше stall_timeout
+
+    ws.health["standby"]["last_msg"] = 95.0
+    ws._failover("standby")  # падає неактивне з'єднання - нічого не міняємо
+    assert ws.active == "primary"
+    ws._failover("primary")
+    assert ws.active == "standby"
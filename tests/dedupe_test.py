@@ -0,0 +1,101 @@
+import os
+import sys
+import time
+import sqlite3
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clock import VirtualClock
+from dedupe import MemoryStore, SqliteStore
+from test import MarketAnalyzer
+
+
+def check_store(a, b):
+    # a і b - два "процеси" над одним сховищем
+    assert a.check_and_set("WIF-USDT:volume:1", ttl=60, now=100)
+    assert not b.check_and_set("WIF-USDT:volume:1", ttl=60, now=159)
+    assert b.check_and_set("WIF-USDT:volume:1", ttl=60, now=160)  # TTL минув
+
+    bump = lambda old: {"n": (old or {"n": 0})["n"] + 1}
+    assert a.update("k", bump, 10, 0) == (True, {"n": 1})
+    assert b.update("k", bump, 10, 1) == (True, {"n": 2})
+    assert b.update("k", lambda old: None, 10, 2) == (False, {"n": 2})
+    assert a.get("k", 11) is None
+
+
+def test_memory_store():
+    store = MemoryStore()
+    check_store(store, store)
+
+
+def test_sqlite_store_is_shared_between_connections(tmp_path):
+    path = str(tmp_path / "dedupe.db")
+    a, b = SqliteStore(path), SqliteStore(path)
+    try:
+        check_store(a, b)
+    finally:
+        a.close()
+        b.close()
+
+
+def test_sqlite_store_decides_locally_when_locked(tmp_path):
+    path = str(tmp_path / "dedupe.db")
+    store = SqliteStore(path)
+    assert store.check_and_set("k", ttl=60, now=0)
+
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")  # інший процес тримає лок запису
+    try:
+        start = time.perf_counter()
+        assert not store.check_and_set("k", ttl=60, now=1)  # відповідь з локального дзеркала
+        assert store.check_and_set("k2", ttl=60, now=1)
+        assert time.perf_counter() - start < 0.5
+        assert store.stats["contended"] == 2
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+        store.close()
+
+
+def test_same_symbol_in_two_shards_alerts_once():
+    clock = VirtualClock(1_700_000_000)
+    store = MemoryStore()
+    events = []
+    analyzers = [MarketAnalyzer("TEST-USDT", clock, store) for _ in range(2)]
+    for a in analyzers:
+        a.on_event = lambda event, details: events.append(event)
+
+    for _ in range(30):
+        for a in analyzers:
+            a.update_price(1.0)
+        clock.advance(1)
+    for a in analyzers:
+        a.update_price(1.15)
+        a.detect_events()
+
+    assert events == ["PUMP"]
+    assert all(a.last_pump_price == 1.15 and a.last_event_ts == clock.now for a in analyzers)
+
+
+def test_repeat_price_is_suppressed_without_store_round_trip():
+    class CountingStore(MemoryStore):
+        calls = 0
+
+        def update(self, key, fn, ttl, now):
+            CountingStore.calls += 1
+            return super().update(key, fn, ttl, now)
+
+    clock = VirtualClock(1_700_000_000)
+    a = MarketAnalyzer("REPEAT-USDT", clock, CountingStore())
+    events = []
+    a.on_event = lambda event, details: events.append(event)
+    for _ in range(30):
+        a.update_price(1.0)
+        clock.advance(1)
+    for _ in range(20):  # після cooldown ціна тримається за порогом на тому ж рівні
+        a.update_price(1.15)
+        a.detect_events()
+        clock.advance(10)
+
+    assert events == ["PUMP"]
+    assert CountingStore.calls == 1
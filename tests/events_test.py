@@ -0,0 +1,70 @@
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import test as analyzer_module
+from clock import VirtualClock
+from events import EventBus, Event
+from test import MarketAnalyzer
+
+
+def test_slow_subscriber_drops_oldest_without_blocking():
+    async def scenario():
+        bus = EventBus()
+        fast, slow = [], []
+
+        async def slow_handler(event):
+            await asyncio.sleep(0.05)
+            slow.append(event.symbol)
+
+        bus.subscribe("fast", lambda event: fast.append(event.symbol))
+        bus.subscribe("slow", slow_handler, maxsize=2)
+        bus.start()
+        for i in range(5):
+            bus.publish(Event("PUMP", f"S{i}", i, None))
+        await asyncio.sleep(0.2)
+        return bus.stats(), fast, slow
+
+    stats, fast, slow = asyncio.run(scenario())
+    assert fast == ["S0", "S1", "S2", "S3", "S4"]
+    assert slow == ["S3", "S4"]
+    assert stats["subscribers"]["slow"]["dropped"] == 3
+    assert stats["subscribers"]["slow"]["lag_max"] >= 0.05
+    assert stats["published"] == {"PUMP": 5}
+
+
+def test_kind_filter_and_failing_handler():
+    async def scenario():
+        bus = EventBus()
+        seen = []
+        bus.subscribe("dumps", lambda event: seen.append(event.kind), kinds=["DUMP"])
+        bus.subscribe("broken", lambda event: 1 / 0)
+        bus.start()
+        bus.publish(Event("PUMP", "A", 0, None))
+        bus.publish(Event("DUMP", "A", 1, None))
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        return bus.stats(), seen
+
+    stats, seen = asyncio.run(scenario())
+    assert seen == ["DUMP"]
+    assert stats["subscribers"]["broken"]["errors"] == 2
+
+
+def test_analyzer_publishes_to_bus(monkeypatch):
+    bus = EventBus()
+    sub = bus.subscribe("collector", lambda event: None)
+    monkeypatch.setattr(analyzer_module, "bus", bus)
+    clock = VirtualClock(1_700_000_000)
+    a = MarketAnalyzer("TEST-USDT", clock)
+    for _ in range(30):
+        a.update_price(1.0)
+        clock.advance(1)
+    a.update_price(1.15)
+    a.detect_events()
+
+    _, event = sub.queue.get_nowait()
+    assert (event.kind, event.symbol, event.ts) == ("PUMP", "TEST-USDT", 1_700_000_030)
+    assert event.details["percent"] == "15.00"
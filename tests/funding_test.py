@@ -0,0 +1,82 @@
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import test
+from clock import VirtualClock
+from test import MarketAnalyzer, funding
+
+
+def test_overpump_waits_for_fresh_funding():
+    clock = VirtualClock(1_700_000_000)
+    a = MarketAnalyzer("OVER-USDT", clock)
+    events, requests = [], []
+    a.on_event = lambda event, details: events.append((event, details))
+    a.request_funding = requests.append
+
+    funding.set(a.sid, 0.05, clock.now - 90)  # кеш є, але застарілий
+    for _ in range(30):
+        a.update_price(1.0)
+        clock.advance(1)
+    a.update_price(1.05)  # +5%: над VWAP x1.03, але нижче pump_min
+    a.detect_events()
+    a.detect_events()
+
+    assert events == [] and requests == [a]
+
+    funding.set(a.sid, 0.02, clock.now)
+    a.confirm_overpump()
+    assert [e for e, _ in events] == ["OVERPUMP — SHORT ZONE"]
+    assert events[0][1]["funding_rate"] == 0.02 and events[0][1]["percent"] is not None
+
+
+def test_concurrent_refreshes_share_one_request(monkeypatch):
+    calls = []
+
+    async def fake_fetch(symbol, sid, clock):
+        calls.append(symbol)
+        await asyncio.sleep(0.01)
+        funding.set(sid, 0.001, clock.time())
+        return 0.001
+
+    monkeypatch.setattr(test, "_fetch_funding", fake_fetch)
+
+    async def scenario():
+        return await asyncio.gather(*(test.get_funding_rate_async("FLIGHT-USDT", max_age=5) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == [0.001] * 5
+    assert calls == ["FLIGHT-USDT"]
+    assert asyncio.run(scenario()) == [0.001] * 5 and len(calls) == 1  # тепер із кешу
+
+
+def test_just_fetched_rate_is_fresh():
+    funding.set(7, 0.003, 1_700_000_000)
+    assert funding.is_fresh(7, 1_700_000_000, 60)
+    assert not funding.is_fresh(7, 1_700_000_060, 60)
+    assert not funding.is_fresh(10_000, 1_700_000_000, 60)
+
+
+def test_stop_cancels_pending_overpump_checks(monkeypatch):
+    confirmed = []
+
+    async def slow_fetch(symbol, sid, clock):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(test, "_fetch_funding", slow_fetch)
+
+    async def scenario():
+        ws = test.BingXWS(["STOP-USDT"], clock=VirtualClock(1_700_000_000))
+        a = ws.analyzers["STOP-USDT"]
+        a.confirm_overpump = lambda: confirmed.append(a)
+        ws._detect_tasks = [asyncio.create_task(ws._overpump_worker())]
+        a.request_funding(a)
+        await asyncio.sleep(0.01)
+        pending = list(ws._overpump_tasks)
+        await ws.stop()
+        return pending
+
+    pending = asyncio.run(scenario())
+    assert len(pending) == 1 and pending[0].cancelled()
+    assert confirmed == []
@@ -0,0 +1,49 @@
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from telegram.error import TimedOut
+from http_pools import MeteredRequest
+
+URL = "https://api.telegram.org/botTOKEN/sendMessage"
+
+
+def slow_transport(delay):
+    async def handler(request):
+        await asyncio.sleep(delay)
+        return httpx.Response(200, json={"ok": True, "result": True})
+    return httpx.MockTransport(handler)
+
+
+def test_pool_wait_is_recorded():
+    async def scenario():
+        req = MeteredRequest("t-wait", 1, pool_timeout=1.0, httpx_kwargs={"transport": slow_transport(0.05)})
+        await req.initialize()
+        await asyncio.gather(req.do_request(URL, "POST"), req.do_request(URL, "POST"))
+        await req.shutdown()
+        return req.stats
+
+    stats = asyncio.run(scenario())
+    assert stats["requests"] == 2
+    assert stats["waited"] == 1
+    assert stats["wait_max"] >= 0.04
+    assert stats["in_flight"] == 0
+
+
+def test_busy_pool_times_out_without_sending():
+    async def scenario():
+        req = MeteredRequest("t-timeout", 1, pool_timeout=0.01, httpx_kwargs={"transport": slow_transport(0.1)})
+        await req.initialize()
+        results = await asyncio.gather(req.do_request(URL, "POST"), req.do_request(URL, "POST"),
+                                       return_exceptions=True)
+        await req.shutdown()
+        return results, req.stats
+
+    results, stats = asyncio.run(scenario())
+    assert results[0] == (200, b'{"ok":true,"result":true}')
+    assert isinstance(results[1], TimedOut)
+    assert stats["pool_timeouts"] == 1
+    assert stats["requests"] == 1
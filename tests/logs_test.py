@@ -0,0 +1,53 @@
+import os
+import sys
+import json
+import queue
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logs import LazyQueueHandler, RateLimitFilter, JsonFormatter
+
+
+def make_record(msg, *args, symbol=None, level=logging.WARNING):
+    record = logging.LogRecord("root", level, __file__, 1, msg, args, None)
+    if symbol:
+        record.symbol = symbol
+    return record
+
+
+def test_rate_limit_per_symbol_and_template():
+    now = [0.0]
+    f = RateLimitFilter(rate=2, window=60, clock=lambda: now[0])
+
+    passed = [f.filter(make_record("Pump on %s: %.2f", "A", i, symbol="A")) for i in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert f.filter(make_record("Pump on %s: %.2f", "B", 1.0, symbol="B"))
+    assert f.filter(make_record("boom", level=logging.ERROR))
+
+    now[0] = 61.0
+    record = make_record("Pump on %s: %.2f", "A", 9.0, symbol="A")
+    assert f.filter(record)
+    assert record.suppressed == 3
+
+
+def test_queue_handler_defers_formatting():
+    class Boom:
+        def __str__(self):
+            raise AssertionError("formatted on the caller's thread")
+
+    q = queue.SimpleQueue()
+    handler = LazyQueueHandler(q)
+    handler.handle(make_record("value %s", Boom()))
+
+    record = q.get_nowait()
+    assert record.msg == "value %s" and isinstance(record.args[0], Boom)
+
+
+def test_json_output_carries_extra_fields():
+    record = make_record("Pump on %s: %.2f%%", "WIF-USDT", 12.5, symbol="WIF-USDT")
+    record.shard = "WIF-USDT"
+    doc = json.loads(JsonFormatter().format(record))
+
+    assert doc["msg"] == "Pump on WIF-USDT: 12.50%"
+    assert (doc["symbol"], doc["shard"], doc["level"]) == ("WIF-USDT", "WIF-USDT", "WARNING")
@@ -0,0 +1,51 @@
+import os
+import sys
+import gzip
+import json
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp.test_utils import TestClient, TestServer
+from clock import VirtualClock
+from mock_exchange import MockMarket, make_app, WS_PATH, PUBLISH_KEY
+from test import BingXWS
+
+
+def test_injected_pump_moves_price():
+    market = MockMarket(10, seed=3, tick_interval=1.0, volatility=0.0, events_per_min=0)
+    start = market.prices[2]
+    market.inject("M0002-USDT", 0.2, 10)
+    for n in range(12):
+        market.step(1_700_000_000 + n)
+
+    assert abs(market.prices[2] / start - 1.2) < 1e-9
+    assert market.prices[3] == MockMarket(10, seed=3).prices[3]
+
+
+def test_rest_and_websocket_feed_the_analyzer():
+    market = MockMarket(20, seed=1, tick_interval=1.0, tick_prob=1.0, events_per_min=0)
+    ws_client = BingXWS(["M0001-USDT"], clock=VirtualClock(1_700_000_000))
+
+    async def scenario():
+        app = make_app(market, autostart=False)
+        async with TestClient(TestServer(app)) as client:
+            contracts = await (await client.get("/openApi/swap/v2/quote/contracts")).json()
+            funding = await (await client.get("/openApi/swap/v2/quote/fundingRate",
+                                              params={"symbol": "M0001-USDT"})).json()
+            ws = await client.ws_connect(WS_PATH)
+            await ws.send_str(json.dumps({"id": "1", "reqType": "sub", "dataType": "M0001-USDT@lastPrice"}))
+            ack = json.loads(gzip.decompress(await ws.receive_bytes()))
+
+            app[PUBLISH_KEY](market.step(1_700_000_000))
+            await ws_client.process_message(await ws.receive_bytes())
+            await ws.close()
+            return contracts, funding, ack
+
+    contracts, funding, ack = asyncio.run(scenario())
+    assert len(contracts["data"]) == 20
+    assert funding["data"]["symbol"] == "M0001-USDT"
+    assert ack == {"id": "1", "code": 0, "msg": ""}
+    a = ws_client.analyzers["M0001-USDT"]
+    assert a.last.ts == 1_700_000_000
+    assert abs(a.last.price / market.prices[1] - 1) < 1e-5
@@ -0,0 +1,47 @@
+import os
+import sys
+import json
+import time
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import profiler
+
+
+def busy_loop(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(1000))
+
+
+def test_profile_captures_running_coroutine_and_waiting_tasks(tmp_path):
+    async def waiter():
+        await asyncio.sleep(10)
+
+    async def scenario():
+        task = asyncio.create_task(waiter(), name="idle-waiter")
+
+        async def hot():
+            await asyncio.sleep(0.05)
+            busy_loop(0.6)
+
+        hot_task = asyncio.create_task(hot())
+        path, prof = await profiler.profile(1, "speedscope", directory=str(tmp_path))
+        await hot_task
+        task.cancel()
+        return path, prof
+
+    path, prof = asyncio.run(scenario())
+    assert path.endswith(".speedscope.json") and os.path.exists(path)
+
+    collapsed = prof.collapsed()
+    assert "busy_loop (profiler_test.py:" in collapsed
+    assert any(stack[0] == "task:idle-waiter" for stack in prof.counts)
+    assert dict(prof.top(2)).get(f"busy_loop (profiler_test.py:{busy_loop.__code__.co_firstlineno})", 0) > 0.2
+
+    doc = json.loads(prof.speedscope())
+    frames = doc["shared"]["frames"]
+    main = next(p for p in doc["profiles"] if p["name"] == "thread:MainThread")
+    assert len(main["samples"]) == len(main["weights"])
+    assert all(0 <= i < len(frames) for s in main["samples"] for i in s)
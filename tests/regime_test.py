@@ -0,0 +1,42 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from regime import MarketRegime
+
+
+def test_rolling_correlation_matches_numpy():
+    rng = np.random.default_rng(7)
+    m = MarketRegime()
+    n = 12
+    logp = np.cumsum(rng.normal(0, 0.01, (m.corr_window + 50, n)), axis=0)
+    for row in logp:
+        m.update(np.exp(row))
+
+    r = np.diff(logp, axis=0)[-m.corr_window:]
+    ref = np.median(r, axis=1)
+    expected = [np.corrcoef(r[:, i], ref)[0, 1] for i in range(n)]
+    assert np.allclose(m.corr[:n], expected)
+
+
+def test_market_wide_dump_is_relabeled_but_lone_dump_is_not():
+    rng = np.random.default_rng(1)
+    m = MarketRegime()
+    symbols = [f"S{i}-USDT" for i in range(30)]
+    cols = [m.column(s) for s in symbols]
+    prices = np.ones(len(symbols))
+    for step in range(200):
+        market = 0.999 if step >= 100 else 1.0  # ринок -10% за останні 100 с
+        prices = prices * market * np.exp(rng.normal(0, 0.0005, len(symbols)))
+        prices[0] *= 0.998 if step >= 100 else 1.0  # S0 падає ще й сам по собі
+        m.update(prices[cols])
+
+    assert m.median_return < -8
+    assert m.breadth_down > 0.9
+    assert m.classify("S1-USDT", -1, -11.0)[0] == "relabel"
+    assert m.classify("S1-USDT", 1, 12.0)[0] is None
+    assert m.classify("S0-USDT", -1, -35.0)[0] is None
+    # Низьковолатильний символ спрацював на власному порозі 1%: надлишок 1.25% - його рух
+    assert m.classify("S1-USDT", -1, -11.0, threshold=1.0)[0] is None
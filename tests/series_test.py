@@ -0,0 +1,111 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pytest
+from clock import VirtualClock
+from series import TieredHistory, RingTier, EwmaVolatility
+
+
+def test_ring_tier_builds_ohlc_buckets():
+    tier = RingTier(10.0, 4)
+    for ts, price in ((100, 1.0), (103, 1.5), (107, 0.8), (109, 1.2), (112, 2.0)):
+        tier.add(ts, price)
+
+    assert tier.rows().tolist() == [[100, 1.0, 1.5, 0.8, 1.2], [110, 2.0, 2.0, 2.0, 2.0]]
+
+
+def test_ring_tier_wraps_at_capacity():
+    tier = RingTier(1.0, 3)
+    for ts in range(10):
+        tier.add(ts, float(ts))
+
+    assert tier.count == 3
+    assert tier.chrono(tier.t).tolist() == [7, 8, 9]
+    assert tier.scan(8)[:2] == (2, 8.0)
+
+
+def test_window_query_picks_covering_tier():
+    h = TieredHistory()
+    now = 100_000.0
+    for i in range(3 * 3600):
+        h.add(now - 3 * 3600 + i, 1.0 + (i % 100) / 1000)
+
+    assert h.tier_for(30, now) is h.raw
+    assert h.tier_for(300, now).interval == 1.0
+    assert h.tier_for(3600, now).interval == 10.0
+    assert h.tier_for(4 * 3600, now).interval == 60.0
+
+    n, low, low_ts, high, high_ts, _ = h.extremes(300, now)
+    assert n == 300
+    assert (low, high) == (1.0, 1.099)
+    assert low_ts < high_ts
+
+
+def test_ewma_volatility_tracks_return_scale():
+    rng = np.random.default_rng(5)
+    vol = EwmaVolatility(halflife=300, interval=1.0)
+    prices = np.exp(np.cumsum(rng.normal(0, 0.002, 3000)))
+    for ts, p in enumerate(prices):
+        vol.add(float(ts), float(p))
+        vol.add(ts + 0.5, float(p))  # другий тік у тому ж бакеті не рахується окремо
+
+    assert vol.ready
+    assert 0.0015 < vol.sigma < 0.0025
+    assert abs(vol.zscore(np.expm1(0.002 * 10), 100) - 1.0) < 0.35
+
+
+def test_candle_volume_counts_each_push_once():
+    from series import CandleVolume
+
+    v = CandleVolume(baseline=3)
+    for candle, pushes in ((0, (10, 40, 100)), (60_000, (50, 200)), (120_000, (30, 60, 300))):
+        for total in pushes:
+            v.update(candle, total)
+    v.update(60_000, 999)  # запізнілий пуш закритої свічки ігнорується
+
+    assert list(v.closed) == [100, 200]
+    assert v.current == 300 and v.delta == 240
+    assert v.baseline == 150
+    assert v.rvol == 2.0
+
+    v.update(180_000, 5)
+    v.update(240_000, 5)
+    assert list(v.closed) == [200, 300, 5]
+    assert v.baseline == 505 / 3
+
+
+def test_raw_tier_stays_sorted_under_clock_skew():
+    tier = RingTier(0, 8)
+    for ts in (1.0, 2.0, 0.5, 3.0, 2.9, 4.0):
+        tier.add(ts, ts)
+
+    assert list(tier.chrono(tier.t)) == [1.0, 2.0, 3.0, 4.0] and tier.late == 2
+
+
+def test_scan_on_wrapped_ring_matches_full_copy():
+    rng = np.random.default_rng(7)
+    tier = RingTier(1.0, 50)
+    for i in range(137):
+        tier.add(float(i), float(rng.uniform(1, 2)))
+
+    t, low, high, close = (tier.chrono(a) for a in (tier.t, tier.l, tier.h, tier.c))
+    for since in (0.0, 87.0, 100.5, 120.0, 136.0):
+        start = int(np.searchsorted(t, since))
+        li, hi = start + int(low[start:].argmin()), start + int(high[start:].argmax())
+        expected = (len(t) - start, low[li], t[li], high[hi], t[hi], close[start:].sum())
+        assert tier.scan(since) == pytest.approx(expected)
+    assert tier.scan(137.0) is None
+
+
+def test_fine_tier_keeps_one_bucket_per_interval(make_analyzer):
+    clock = VirtualClock(1_700_000_000)
+    a, _ = make_analyzer(clock)
+    for i in range(100):
+        a.update_price(1.0 + i / 1000, clock.time() + i * 0.05)  # 20 тіків/с
+
+    rows = a.history.fine.rows()
+    assert rows[:, 0].tolist() == [1_700_000_000.0 + i for i in range(5)]
+    assert rows[-1, 4] == 1.099 and rows[0, 1] == 1.0
@@ -0,0 +1,42 @@
+import os
+import sys
+import math
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from clock import VirtualClock
+from dedupe import MemoryStore
+from test import MarketAnalyzer
+from snapshot import save_snapshot, load_snapshot, restore
+
+
+def test_snapshot_round_trip(tmp_path):
+    clock = VirtualClock(1_700_000_000)
+    a = MarketAnalyzer("SNAP-USDT", clock, MemoryStore())
+    rng = np.random.default_rng(3)
+    for p in np.exp(np.cumsum(rng.normal(0, 0.002, 200))):
+        a.update_price(float(p))
+        clock.advance(1)
+    a.last_event_ts = a.last_pump_time = clock.now - 10
+    a.last_pump_price = 1.2
+    minute = int(clock.now // 60 * 60 * 1000)
+    candles = [{"time": minute - (4 - i) * 60_000, "open": 1.0, "high": 1.1, "low": 0.9, "close": 1.0,
+                "volume": 100.0 * (i + 1)} for i in range(5)]
+    a.candles.extend(candles)
+
+    path = str(tmp_path / "state.npz")
+    assert save_snapshot([a], path) == 1
+    state = load_snapshot(path)
+
+    clock.advance(5)  # віртуальний час далеко від time.time(): вік рахується за годинником аналізатора
+    store = MemoryStore()
+    b = MarketAnalyzer("SNAP-USDT", clock, store)
+    assert restore({"SNAP-USDT": b}, state) == 1
+
+    assert store.get("SNAP-USDT", clock.now) == {"ts": a.last_event_ts, "PUMP": [1.2, a.last_pump_time]}
+    assert not b.claim("PUMP", 1.2, clock.now)  # cooldown пережив рестарт
+    assert np.array_equal(b.history.fine.rows(), a.history.fine.rows())
+    assert b.vol.ready and math.isclose(b.vol.sigma, a.vol.sigma, rel_tol=1e-9)
+    assert list(b.candles) == candles
+    assert list(b.volume.closed) == [100.0, 200.0, 300.0, 400.0] and b.volume.current == 500.0
@@ -0,0 +1,14 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from startup_profile import profile_imports, HEAVY
+
+
+def test_rendering_stack_is_not_imported_at_startup():
+    rows = profile_imports(["test", "ws_manager", "alerts", "main"])
+    names = {name for name, *_ in rows}
+
+    assert "test" in names
+    assert not [n for n in names if n.split(".")[0] in HEAVY]
@@ -0,0 +1,98 @@
+import os
+import sys
+import socket
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiohttp
+from aiohttp.test_utils import TestClient, TestServer
+from clock import VirtualClock
+from test import BingXWS
+import startup
+import status
+from status import make_status_app, serve_status
+
+
+def make_shard(clock, connected=True, age=1.0):
+    ws = BingXWS(["WIF-USDT", "PEPE-USDT"], clock=clock)
+    ws.active = "primary"
+    ws.health["primary"] = {"connected": connected, "last_msg": clock.monotonic() - age,
+                            "reconnects": 2, "stalls": 1}
+    ws.analyzers["WIF-USDT"].update_price(1.0)
+    return ws
+
+
+async def fetch(shards, *paths):
+    app = make_status_app(lambda: shards)
+    results = []
+    async with TestClient(TestServer(app)) as client:
+        for path in paths:
+            resp = await client.get(path)
+            body = await (resp.json() if path != "/metrics" else resp.text())
+            results.append((resp.status, body))
+    return results
+
+
+def test_readiness_follows_shard_freshness(monkeypatch):
+    monkeypatch.setitem(startup.marks, "first_subscription", 1.0)
+    clock = VirtualClock(1_700_000_000)
+    fresh, stalled = make_shard(clock), make_shard(clock, age=600)
+
+    (ok, body), = asyncio.run(fetch([fresh], "/readyz"))
+    assert ok == 200 and body["ready"] and body["stale_symbols"] == 1
+
+    (status, body), = asyncio.run(fetch([fresh, stalled], "/readyz"))
+    assert status == 503 and body["reasons"] == ["stale shards: WIF-USDT"]
+
+    (status, body), = asyncio.run(fetch([], "/readyz"))
+    assert status == 503 and "no shards" in body["reasons"]
+
+
+def test_metrics_and_status_expose_shards():
+    clock = VirtualClock(1_700_000_000)
+    (status, text), (_, doc) = asyncio.run(fetch([make_shard(clock, age=2.5)], "/metrics", "/status"))
+
+    assert status == 200
+    assert 'bot_shard_message_age_seconds{shard="WIF-USDT"} 2.5' in text
+    assert 'bot_shard_reconnects_total{shard="WIF-USDT"} 2' in text
+    assert "# TYPE bot_shard_stalls_total counter" in text
+    assert doc["symbols"] == 2 and doc["shards"][0]["connected"]
+
+
+def test_taken_port_does_not_stop_siblings(monkeypatch):
+    monkeypatch.setattr(status, "STATUS_RETRY_BASE", 0.01)
+    monkeypatch.setattr(status, "STATUS_RETRY_MAX", 0.05)
+    other = socket.socket()
+    other.bind(("127.0.0.1", 0))
+    other.listen()  # інший екземпляр уже тримає порт
+    port = other.getsockname()[1]
+
+    async def scenario():
+        ticks = 0
+
+        async def ingestion():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        async def probe():
+            await asyncio.sleep(0.1)
+            other.close()
+            await asyncio.sleep(0.3)
+            async with aiohttp.ClientSession() as session:
+                async with session.get(f"http://127.0.0.1:{port}/healthz") as resp:
+                    return resp.status
+
+        async with asyncio.TaskGroup() as tg:
+            server = tg.create_task(serve_status(lambda: [], host="127.0.0.1", port=port))
+            feed = tg.create_task(ingestion())
+            code = await probe()
+            server.cancel()
+            feed.cancel()
+        return ticks, code
+
+    ticks, code = asyncio.run(scenario())
+    assert ticks > 10
+    assert code in (200, 503)  # сервер піднявся, щойно порт звільнився
@@ -0,0 +1,51 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage
+from events import Event
+
+
+def candle(minute, close, volume):
+    return {"time": minute * 60_000, "open": 1.0, "high": 1.2, "low": 0.9, "close": close, "volume": volume}
+
+
+def test_sink_round_trip_and_close_flushes(tmp_path):
+    path = str(tmp_path / "market.db")
+    sink = storage.open_sink(path, flush_interval=60)  # без close() нічого не запишеться ще хвилину
+    try:
+        sink.record_tick("WIF-USDT", "last", 100.0, 0.33)
+        sink.record_tick("WIF-USDT", "bid", 100.5, 0.32, 10.0)
+        sink.record_tick("WIF-USDT", "last", 101.0, 0.34)
+        sink.record_candle("WIF-USDT", candle(1, 1.0, 10.0))
+        sink.record_candle("WIF-USDT", candle(1, 1.1, 25.0))  # той самий kline, новіший стан
+        storage.record_bus_event(Event("PUMP", "WIF-USDT", 101.0, {"symbol": "WIF-USDT", "price": 0.34,
+                                                                   "percent": "12.00", "candles": [{}]}))
+        storage.record_bus_event(Event("Bot started", None, 99.0, None))
+    finally:
+        storage.close_sink()
+
+    assert sink.stats["written"] == 6 and sink.backlog == 0
+    ts, price, qty = storage.load_ticks(path, "WIF-USDT", end=200)
+    assert ts.tolist() == [100.0, 101.0] and price.tolist() == [0.33, 0.34]
+    candles = storage.load_candles(path, "WIF-USDT", end=200)
+    assert candles["close"].tolist() == [1.1] and candles["volume"].tolist() == [25.0]
+    assert storage.load_events(path, end=200) == [
+        {"symbol": "WIF-USDT", "event": "PUMP", "ts": 101.0, "price": 0.34, "percent": "12.00"}
+    ]
+    assert storage.list_symbols(path) == ["WIF-USDT"]
+
+
+def test_full_buffer_drops_and_counts(tmp_path):
+    path = str(tmp_path / "market.db")
+    sink = storage.StorageSink(path, flush_interval=60, max_pending=3)
+    time.sleep(0.05)  # писач уже чекає flush_interval
+    for i in range(5):
+        sink.record_tick("WIF-USDT", "last", float(i), 1.0 + i)
+
+    assert sink.backlog == 3 and sink.stats["dropped"] == 2
+    sink.close()
+    assert sink.stats["written"] == 3
+    assert storage.load_ticks(path, "WIF-USDT", end=10)[0].tolist() == [0.0, 1.0, 2.0]
@@ -0,0 +1,72 @@
+import os
+import sys
+import json
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from clock import VirtualClock
+from test import BingXWS
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.frames = []
+
+    async def send(self, frame):
+        msg = json.loads(frame)
+        self.frames.append((msg["reqType"], msg["dataType"]))
+
+
+def make_shard(clock, symbols=("HOT-USDT",), **overrides):
+    ws = BingXWS(list(symbols), clock=clock)
+    ws.apply_config({**config.get(), **overrides})
+    sock = ws.conns["primary"] = RecordingSocket()
+    return ws, sock
+
+
+def test_symbol_is_deescalated_during_cooldown():
+    clock = VirtualClock(1_700_000_000)
+    ws, sock = make_shard(clock, cooldown=1800.0, calm_timeout=120.0)
+    a = ws.analyzers["HOT-USDT"]
+    events = []
+    a.on_event = lambda event, details: events.append(event)
+
+    async def step(price):
+        a.update_price(price)
+        a.detect_events()
+        await ws._update_escalation(a.symbol)
+
+    async def scenario():
+        for _ in range(30):
+            await step(1.0)
+            clock.advance(1)
+        await step(1.15)
+        hot = list(sock.frames)
+        # Ціна стоїть: після виходу стрибка з вікна і calm_timeout підписки знімаються
+        for _ in range(60):
+            clock.advance(10)
+            await step(1.15)
+        return hot
+
+    hot = asyncio.run(scenario())
+    assert events == ["PUMP"]
+    assert hot == [("sub", "HOT-USDT@depth5@500ms"), ("sub", "HOT-USDT@bookTicker")]
+    assert sock.frames[2:] == [("unsub", "HOT-USDT@depth5@500ms"), ("unsub", "HOT-USDT@bookTicker")]
+    assert "HOT-USDT" not in ws.escalated
+    assert clock.now - a.last_event_ts < a.cooldown
+
+
+def test_profile_change_keeps_escalated_channels():
+    clock = VirtualClock(1_700_000_000)
+    ws, sock = make_shard(clock, symbols=("HOT-USDT", "CALM-USDT"), subscription_profile="deep")
+    ws.escalated["HOT-USDT"] = clock.monotonic()
+
+    async def scenario():
+        ws.apply_config({**config.get(), "subscription_profile": "minimal"})
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert sock.frames == [("unsub", "CALM-USDT@depth5@500ms"), ("unsub", "CALM-USDT@bookTicker")]
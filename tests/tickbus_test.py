@@ -0,0 +1,55 @@
+import os
+import sys
+import json
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from symbols import registry
+from tickbus import TickRing, LAST, BID, KLINE
+
+READER = """
+import json, sys
+from tickbus import TickReader
+r = TickReader(sys.argv[1], from_start=True)
+batch, lost = r.poll()
+print(json.dumps({"lost": lost, "seq": batch["seq"].tolist(), "price": batch["price"].tolist(),
+                  "stream": batch["stream"].tolist(), "symbols": [r.symbol(int(s)) for s in batch["symbol"]]}))
+del batch
+r.close()
+"""
+
+
+def read_in_subprocess(name):
+    out = subprocess.run([sys.executable, "-c", READER, name], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+
+def test_other_process_reads_ticks():
+    ring = TickRing(f"tickbus_test_{os.getpid()}", capacity=16)
+    try:
+        wif, pepe = registry.intern("WIF-USDT"), registry.intern("PEPE-USDT")
+        ring.publish(wif, LAST, 1_700_000_000.5, 0.33)
+        ring.publish(pepe, BID, 1_700_000_000.6, 0.0001, 5e6)
+        ring.publish(wif, KLINE, 1_700_000_000.0, 0.34, 1200.0)
+
+        got = read_in_subprocess(ring.name)
+        assert got["lost"] == 0 and got["seq"] == [1, 2, 3]
+        assert got["symbols"] == ["WIF-USDT", "PEPE-USDT", "WIF-USDT"]
+        assert got["stream"] == [LAST, BID, KLINE] and got["price"][1] == 0.0001
+    finally:
+        ring.close()
+
+
+def test_overrun_is_reported_as_lost():
+    ring = TickRing(f"tickbus_test_{os.getpid()}", capacity=8)
+    try:
+        for i in range(20):
+            ring.publish(registry.intern("WIF-USDT"), LAST, float(i), 1.0 + i)
+
+        got = read_in_subprocess(ring.name)
+        assert got["lost"] == 12
+        assert got["seq"] == list(range(13, 21)) and got["price"][-1] == 20.0
+    finally:
+        ring.close()
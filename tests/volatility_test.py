@@ -0,0 +1,51 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from clock import VirtualClock
+
+
+def test_zscore_thresholds_follow_symbol_volatility(make_analyzer):
+    clock = VirtualClock(1_700_000_000)
+    a, events = make_analyzer(clock)
+    a.apply_config({**config.get(), "threshold_mode": "zscore", "pump_z": 6.0, "zscore_floor": 3.0})
+
+    # "Сонна" монета: коливання ±0.1%, тож +5% за 20 с - це десятки сигм
+    for i in range(120):
+        a.update_price(1.0 + (0.001 if i % 2 else -0.001))
+        clock.advance(1)
+    for i in range(20):
+        a.update_price(1.0 + 0.05 * (i + 1) / 20)
+        clock.advance(1)
+    a.detect_events()
+
+    assert [e for e, _ in events] == ["PUMP"]
+    assert float(events[0][1]["zscore"]) >= 6.0
+    assert float(events[0][1]["percent"]) < config.get()["pump_min"]
+
+
+def test_zscore_mode_classifies_excess_against_own_threshold(make_analyzer):
+    clock = VirtualClock(1_700_000_000)
+    a, events = make_analyzer(clock)
+    cfg = {**config.get(), "threshold_mode": "zscore", "pump_z": 6.0, "zscore_floor": 3.0}
+    a.apply_config(cfg)
+    thresholds = []
+
+    class StubRegime:
+        def classify(self, symbol, direction, move, threshold=None):
+            thresholds.append(threshold)
+            return None, None
+
+    a.regime = StubRegime()
+    for i in range(120):
+        a.update_price(1.0 + (0.001 if i % 2 else -0.001))
+        clock.advance(1)
+    for i in range(20):
+        a.update_price(1.0 + 0.05 * (i + 1) / 20)
+        clock.advance(1)
+    a.detect_events()
+
+    assert [e for e, _ in events] == ["PUMP"]
+    assert cfg["zscore_floor"] <= thresholds[0] < cfg["pump_min"]
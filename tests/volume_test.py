@@ -0,0 +1,26 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from clock import VirtualClock
+
+
+def test_volume_spike_once_per_candle(make_analyzer):
+    clock = VirtualClock(1_700_000_000)
+    a, events = make_analyzer(clock)
+    for i in range(30):
+        a.update_price(1.0)
+        a.update_volume(1000.0, (i // 3) * 60_000)  # 10 свічок по 1000
+        clock.advance(1)
+
+    a.update_volume(2000.0, 10 * 60_000)
+    a.detect_events()
+    assert events == []
+
+    a.update_volume(6000.0, 10 * 60_000)
+    a.detect_events()
+    a.update_volume(7000.0, 10 * 60_000)
+    a.detect_events()
+    assert [e for e, _ in events] == ["VOLUME SPIKE"]
+    assert (events[0][1]["volume"], events[0][1]["rvol"]) == (6000.0, "6.0")
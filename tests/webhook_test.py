@@ -0,0 +1,90 @@
+import os
+import sys
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp.test_utils import TestClient, TestServer
+import webhook
+from webhook import make_webhook_app, run_update_intake, SECRET_HEADER, STATS_KEY
+
+UPDATE = {
+    "update_id": 1,
+    "message": {
+        "message_id": 7,
+        "date": 1_700_000_000,
+        "chat": {"id": 42, "type": "private"},
+        "text": "/start",
+    },
+}
+
+
+class StubApplication:
+    def __init__(self):
+        self.bot = None
+        self.update_queue = asyncio.Queue()
+
+
+async def post(app, headers=None, data=None):
+    async with TestClient(TestServer(app)) as client:
+        resp = await client.post("/telegram", json=data if data is not None else UPDATE, headers=headers or {})
+        return resp.status
+
+
+def test_update_is_queued():
+    async def scenario():
+        stub = StubApplication()
+        status = await post(make_webhook_app(stub, "s3cret", "/telegram"), {SECRET_HEADER: "s3cret"})
+        return status, stub.update_queue
+
+    status, queue = asyncio.run(scenario())
+    assert status == 200
+    update = queue.get_nowait()
+    assert (update.update_id, update.message.chat.id, update.message.text) == (1, 42, "/start")
+
+
+def test_wrong_secret_is_rejected():
+    async def scenario():
+        stub = StubApplication()
+        app = make_webhook_app(stub, "s3cret", "/telegram")
+        status = await post(app, {SECRET_HEADER: "nope"})
+        return status, stub.update_queue.qsize(), app[STATS_KEY]
+
+    status, queued, stats = asyncio.run(scenario())
+    assert status == 403
+    assert queued == 0
+    assert stats["rejected"] == 1
+
+
+def test_intake_failure_is_retried_without_touching_siblings(monkeypatch):
+    attempts = []
+
+    async def flaky_polling(application):
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise OSError("Telegram unreachable")
+        await asyncio.Event().wait()
+
+    monkeypatch.setattr(webhook, "serve_polling", flaky_polling)
+    monkeypatch.setattr(webhook, "INTAKE_RETRY_BASE", 0.01)
+
+    async def scenario():
+        ticks = 0
+
+        async def ingestion():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        try:
+            async with asyncio.timeout(0.3), asyncio.TaskGroup() as tg:
+                tg.create_task(run_update_intake(StubApplication(), webhook_url=None))
+                tg.create_task(ingestion())
+        except TimeoutError:
+            pass
+        return ticks
+
+    ticks = asyncio.run(scenario())
+    assert len(attempts) == 3
+    assert ticks > 10
@@ -0,0 +1,211 @@
+import os
+import time
+import struct
+import logging
+import argparse
+import numpy as np
+from multiprocessing import shared_memory, resource_tracker
+from symbols import registry
+
+TICKBUS_NAME = os.getenv("TICKBUS_NAME")  # не задано -> шина вимкнена
+TICKBUS_CAPACITY = int(os.getenv("TICKBUS_CAPACITY", str(1 << 20)))  # записів, ~40 МБ
+MAX_SYMBOLS = 8192
+
+LAST, BID, ASK, KLINE = 0, 1, 2, 3
+STREAMS = {"last": LAST, "bid": BID, "ask": ASK, "kline": KLINE}
+
+# Заголовок: magic, version, capacity, record_size, max_symbols, symbol_count, write_seq
+MAGIC = b"TICK"
+VERSION = 1
+HEADER = struct.Struct("<4sIQIIQQ")
+HEADER_SIZE = 64
+SYMBOL_COUNT_OFFSET = 24
+WRITE_SEQ_OFFSET = 32
+NAME_SIZE = 32
+
+# Запис 40 байт; seq пишеться останнім, щоб читач міг відсіяти перезаписані слоти
+RECORD = struct.Struct("<QdddIB3x")
+RECORD_DTYPE = np.dtype([("seq", "<u8"), ("ts", "<f8"), ("price", "<f8"), ("qty", "<f8"),
+                         ("symbol", "<u4"), ("stream", "u1"), ("_pad", "V3")])
+assert RECORD.size == RECORD_DTYPE.itemsize
+
+
+def _layout(capacity, max_symbols):
+    records_at = HEADER_SIZE + max_symbols * NAME_SIZE
+    records_at = (records_at + 63) // 64 * 64
+    return records_at, records_at + capacity * RECORD.size
+
+
+class TickRing:
+    """
+    Single-writer ring of fixed-size tick records in POSIX shared memory.
+    The ingest loop is the only writer; any number of local processes read
+    it with TickReader. Sequence numbers start at 1 and never wrap, so a
+    reader that falls more than `capacity` records behind knows exactly
+    how many it lost. Symbol ids are the process registry ids; their names
+    are copied into a table in the same segment on first use.
+    """
+
+    def __init__(self, name, capacity=TICKBUS_CAPACITY, max_symbols=MAX_SYMBOLS):
+        self.name = name
+        self.capacity = capacity
+        self.max_symbols = max_symbols
+        self._records_at, size = _layout(capacity, max_symbols)
+        try:
+            self.shm = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            # Сегмент від процесу, що впав: читачі перепідключаться до нового
+            stale = shared_memory.SharedMemory(name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name, create=True, size=size)
+        self.buf = self.shm.buf
+        HEADER.pack_into(self.buf, 0, MAGIC, VERSION, capacity, RECORD.size, max_symbols, 0, 0)
+        # 8-байтові слова сегмента: seq і голова пишуться одним присвоєнням
+        self._words = self.buf.cast("Q")
+        self._pack = RECORD.pack_into
+        self.named = 0
+        self.seq = 0
+
+    def _name_symbols(self, sid):
+        if sid >= self.max_symbols:
+            raise ValueError(f"tick bus symbol table is full ({self.max_symbols})")
+        for i in range(self.named, sid + 1):
+            raw = registry.name(i).encode()[:NAME_SIZE]
+            self.buf[HEADER_SIZE + i * NAME_SIZE:HEADER_SIZE + i * NAME_SIZE + len(raw)] = raw
+        self.named = sid + 1
+        struct.pack_into("<Q", self.buf, SYMBOL_COUNT_OFFSET, self.named)
+
+    def publish(self, sid, stream, ts, price, qty=0.0):
+        if sid >= self.named:
+            self._name_symbols(sid)
+        seq = self.seq + 1
+        offset = self._records_at + ((seq - 1) % self.capacity) * RECORD.size
+        # Поля з seq=0 (слот "в роботі"), потім справжній seq і голова кільця
+        self._pack(self.buf, offset, 0, ts, price, qty or 0.0, sid, stream)
+        words = self._words
+        words[offset >> 3] = seq
+        words[WRITE_SEQ_OFFSET >> 3] = seq
+        self.seq = seq
+
+    def close(self):
+        self._words.release()
+        self.buf = self._words = None
+        self.shm.close()
+        self.shm.unlink()
+
+
+class TickReader:
+    """
+    Attaches to a TickRing by name. poll() returns new records as a numpy
+    structured array viewing the shared segment directly (a copy only when
+    the batch wraps around the end of the ring) plus the number of records
+    lost to overrun. Views stay valid until the writer laps them, i.e. for
+    `capacity` further ticks.
+    """
+
+    def __init__(self, name, from_start=False):
+        self.shm = shared_memory.SharedMemory(name)
+        # Читач не володіє сегментом: не даємо resource_tracker видалити його на виході
+        resource_tracker.unregister(self.shm._name, "shared_memory")
+        magic, version, capacity, record_size, max_symbols, _, head = HEADER.unpack_from(self.shm.buf, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+            self.shm.close()
+            raise ValueError(f"{name} is not a tick bus v{VERSION} segment")
+        self.capacity = capacity
+        records_at, _ = _layout(capacity, max_symbols)
+        self.records = np.ndarray((capacity,), RECORD_DTYPE, buffer=self.shm.buf, offset=records_at)
+        self.symbols = []
+        self.next = 1 if from_start else head + 1
+        self.lost = 0
+
+    def head(self):
+        return struct.unpack_from("<Q", self.shm.buf, WRITE_SEQ_OFFSET)[0]
+
+    def symbol_count(self):
+        return struct.unpack_from("<Q", self.shm.buf, SYMBOL_COUNT_OFFSET)[0]
+
+    def symbol(self, sid):
+        if sid >= len(self.symbols):
+            for i in range(len(self.symbols), self.symbol_count()):
+                raw = bytes(self.shm.buf[HEADER_SIZE + i * NAME_SIZE:HEADER_SIZE + (i + 1) * NAME_SIZE])
+                self.symbols.append(raw.rstrip(b"\0").decode())
+        return self.symbols[sid]
+
+    def poll(self, max_records=65536):
+        head = self.head()
+        first = self.next
+        lost = 0
+        if head - first + 1 > self.capacity:
+            lost = head - self.capacity + 1 - first
+            first = head - self.capacity + 1
+        n = min(head - first + 1, max_records)
+        if n <= 0:
+            return self.records[:0], lost
+
+        start = (first - 1) % self.capacity
+        if start + n <= self.capacity:
+            batch = self.records[start:start + n]
+        else:
+            batch = np.concatenate((self.records[start:], self.records[:start + n - self.capacity]))
+        # Слоти, які письменник встиг перезаписати під час читання, відкидаємо
+        expected = np.arange(first, first + n, dtype=np.uint64)
+        ok = batch["seq"] == expected
+        if not ok.all():
+            lost += int(n - ok.sum())
+            batch = batch[ok]
+        self.next = first + n
+        self.lost += lost
+        return batch, lost
+
+    def close(self):
+        self.records = None
+        self.shm.close()
+
+
+ring = None
+
+
+def open_ring(name=TICKBUS_NAME, **kwargs):
+    global ring
+    if not name:
+        return None
+    ring = TickRing(name, **kwargs)
+    logging.warning("Tick bus enabled: /dev/shm/%s (%d records)", name, ring.capacity)
+    return ring
+
+
+def close_ring():
+    global ring
+    if ring:
+        ring.close()
+        ring = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tail the shared-memory tick bus of a running bot")
+    parser.add_argument("--name", default=TICKBUS_NAME, required=TICKBUS_NAME is None)
+    parser.add_argument("--symbol", help="print ticks of one symbol instead of rates")
+    args = parser.parse_args(argv)
+
+    reader = TickReader(args.name)
+    names = {v: k for k, v in STREAMS.items()}
+    try:
+        while True:
+            time.sleep(1)
+            batch, lost = reader.poll(reader.capacity)
+            if args.symbol:
+                for r in batch:
+                    if reader.symbol(int(r["symbol"])) == args.symbol:
+                        print(f"{r['seq']} {names[int(r['stream'])]:5} {r['ts']:.3f} {r['price']:g} {r['qty']:g}")
+            else:
+                print(f"seq={reader.next - 1} ticks/s={len(batch)} lost={lost} symbols={reader.symbol_count()}")
+            del batch
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+
+
+if __name__ == "__main__":
+    main()
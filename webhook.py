@@ -0,0 +1,95 @@
+import os
+import hmac
+import asyncio
+import logging
+from aiohttp import web
+from telegram import Update
+
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")  # публічна https-адреса; не задано -> long polling
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+INTAKE_RETRY_BASE = 1.0
+INTAKE_RETRY_MAX = 60.0
+INTAKE_STABLE_AFTER = 60.0  # стільки пропрацював без помилок -> backoff з початку
+STATS_KEY = web.AppKey("stats", dict)
+
+
+def make_webhook_app(application, secret_token=WEBHOOK_SECRET, path=WEBHOOK_PATH):
+    """
+    application only needs .bot and .update_queue, so tests can pass a stub.
+    """
+    stats = {"received": 0, "rejected": 0}
+
+    async def handle_update(request):
+        if secret_token and not hmac.compare_digest(request.headers.get(SECRET_HEADER, ""), secret_token):
+            stats["rejected"] += 1
+            return web.Response(status=403)
+        try:
+            data = await request.json()
+            update = Update.de_json(data, application.bot)
+        except Exception as e:
+            logging.error("Bad webhook payload: %s", e)
+            stats["rejected"] += 1
+            return web.Response(status=400)
+
+        # Обробка йде звичайним шляхом Application; Telegram отримує 200 одразу
+        await application.update_queue.put(update)
+        stats["received"] += 1
+        return web.Response()
+
+    app = web.Application()
+    app[STATS_KEY] = stats
+    app.router.add_post(path, handle_update)
+    return app
+
+
+async def serve_webhook(application, url=WEBHOOK_URL, host=WEBHOOK_HOST, port=WEBHOOK_PORT,
+                        path=WEBHOOK_PATH, secret_token=WEBHOOK_SECRET):
+    """Runs the local webhook server until cancelled."""
+    runner = web.AppRunner(make_webhook_app(application, secret_token, path), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    logging.warning("Webhook server listening on %s:%s%s", host, port, path)
+    try:
+        await application.bot.set_webhook(url=url.rstrip("/") + path, secret_token=secret_token)
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+async def serve_polling(application, timeout=90):
+    """Long polling on the Application's dedicated get_updates request pool."""
+    await application.bot.delete_webhook()
+    await application.updater.start_polling(timeout=timeout)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await application.updater.stop()
+
+
+async def run_update_intake(application, webhook_url=WEBHOOK_URL):
+    """
+    Update intake, supervised on its own: webhook when WEBHOOK_URL is set,
+    long polling otherwise. Failures (port already bound, Telegram briefly
+    unreachable in set/delete_webhook) are logged and retried with backoff
+    and never leave this coroutine, so they can't cancel market ingestion
+    running next to it. Only cancellation stops it.
+    """
+    serve = serve_webhook if webhook_url else serve_polling
+    delay = INTAKE_RETRY_BASE
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        try:
+            await serve(application)
+        except Exception as e:
+            logging.error("Update intake failed: %r; retrying in %gs", e, delay)
+        if loop.time() - started > INTAKE_STABLE_AFTER:
+            delay = INTAKE_RETRY_BASE
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, INTAKE_RETRY_MAX)
@@ -1,21 +1,75 @@
 import asyncio
 import logging
+import config
+import snapshot
+import regime
+import dedupe
 from utils import chunked
 from symbols import get_filtered_symbols
 from test import BingXWS
 
+SHARD_SIZE = 40
+
+shards = []
+active_symbols = set()
+restored_state = {}
+
+
+def all_analyzers():
+    return [a for ws in shards for a in ws.analyzers.values()]
+
+
+def _start_shard(group):
+    # Одне сховище на процес: символ, що переїхав у інший шард, зберігає cooldown
+    ws = BingXWS(group, store=dedupe.store)
+    if restored_state:
+        snapshot.restore(ws.analyzers, restored_state)
+    shards.append(ws)
+    active_symbols.update(group)
+    asyncio.create_task(ws.start())
+
+
 async def start_all_ws():
     symbols = get_filtered_symbols()
     #symbols = ["WIF-USDT"]
-    
+
     if not symbols:
         logging.error("No symbols retrieved from API. Cannot start WebSocket connections.")
         return
 
-    logging.info(f"Starting WebSocket connections for {len(symbols)} symbols")
+    logging.info("Starting WebSocket connections for %d symbols", len(symbols))
+
+    global restored_state
+    restored_state = snapshot.load_snapshot()
+    if restored_state:
+        logging.warning("Loaded snapshot state for %d symbols", len(restored_state))
+    asyncio.create_task(snapshot.snapshot_loop(all_analyzers))
+    asyncio.create_task(regime.regime_loop(all_analyzers))
+
+    for group in chunked(symbols, SHARD_SIZE):
+        _start_shard(group)
+
+        await asyncio.sleep(0.2)  # анти-флуд
+
+
+async def extend_universe():
+    # Нові символи з оновленого цінового діапазону отримують власні шарди,
+    # існуючі сокети та буфери аналізаторів не чіпаємо
+    loop = asyncio.get_running_loop()
+    symbols = await loop.run_in_executor(None, get_filtered_symbols)
+    new_symbols = [s for s in symbols if s not in active_symbols]
+    if not new_symbols:
+        return
+
+    logging.warning("Price band changed: starting %d new symbols", len(new_symbols))
+    for group in chunked(new_symbols, SHARD_SIZE):
+        _start_shard(group)
+        await asyncio.sleep(0.2)  # анти-флуд
+
+
+def _on_config_change(old, new, changed):
+    if changed & {"min_price", "max_price"} and shards:
+        asyncio.get_running_loop().create_task(extend_universe())
 
-    for group in chunked(symbols, 40):
-        ws = BingXWS(group)
-        asyncio.create_task(ws.start())
 
-        await asyncio.sleep(0.2)  # анти-флуд
\ No newline at end of file
+config.add_listener(_on_config_change)